@@ -0,0 +1,34 @@
+"""
+Benchmark batched versus per-proof range proof verification
+
+Usage: python benchmarks/bench_bulletproofs.py
+"""
+
+import time
+from bytechan.crypto.bulletproofs import Bulletproof, np
+
+
+def timed(func, rounds: int) -> float:
+    """Average seconds per call"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds
+
+
+def main():
+    bp = Bulletproof()
+    print(f"NumPy available: {np is not None}")
+    print(f"{'proofs':>8} {'loop ms':>10} {'batch ms':>10} {'speedup':>8}")
+    
+    for count in (16, 128, 1024, 8192):
+        proofs = [bp.generate_range_proof(value=float(i)) for i in range(count)]
+        rounds = max(3, 20000 // count)
+        
+        loop = timed(lambda: [bp.verify_range_proof(proof) for proof in proofs], rounds)
+        batch = timed(lambda: bp.verify_batch(proofs), rounds)
+        print(f"{count:>8} {loop * 1000:>10.3f} {batch * 1000:>10.3f} {loop / batch:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
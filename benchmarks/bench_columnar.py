@@ -0,0 +1,81 @@
+"""
+Benchmark aggregate queries over columnar storage against object scans
+
+Builds a chain of many transactions and times address totals, a
+time-window count and the largest transfers, once by looping over
+Transaction objects and once over the columns.
+
+Usage: python benchmarks/bench_columnar.py [blocks] [txs_per_block]
+"""
+
+import heapq
+import sys
+import time
+from bytechan import Block, Transaction
+from bytechan.core import columnar
+from bytechan.core.columnar import ColumnarChain
+
+
+def build_blocks(blocks: int, txs_per_block: int):
+    chain = []
+    previous_hash = "00" * 32
+    for i in range(blocks):
+        transactions = [
+            Transaction(sender=f"bc1sender{j % 500}", recipient=f"bc1peer{(i * j) % 2000}",
+                        amount=(i * 7 + j) % 1000 + 0.5)
+            for j in range(txs_per_block)
+        ]
+        block = Block(index=i, timestamp=1704067200.0 + i * 120, transactions=transactions,
+                      previous_hash=previous_hash)
+        chain.append(block)
+        previous_hash = block.hash
+    return chain
+
+
+def object_totals(chain):
+    totals = {}
+    for block in chain:
+        for tx in block.transactions:
+            totals[tx.sender] = totals.get(tx.sender, 0.0) - tx.amount
+            totals[tx.recipient] = totals.get(tx.recipient, 0.0) + tx.amount
+    return totals
+
+
+def object_window(chain, start, end):
+    return sum(1 for block in chain for tx in block.transactions if start <= tx.timestamp < end)
+
+
+def object_largest(chain, count):
+    return heapq.nlargest(count, (tx for block in chain for tx in block.transactions),
+                          key=lambda tx: tx.amount)
+
+
+def timed(function) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main():
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    txs_per_block = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    
+    chain = build_blocks(blocks, txs_per_block)
+    start = time.perf_counter()
+    columns = ColumnarChain.from_blocks(chain)
+    print(f"{len(columns)} transactions, columns built in {time.perf_counter() - start:.2f} s "
+          f"({'numpy' if columnar.np is not None else 'pure Python'} aggregates)")
+    
+    window = (min(columns.timestamps), max(columns.timestamps) / 2 + min(columns.timestamps) / 2)
+    queries = (
+        ("address totals", lambda: object_totals(chain), columns.address_totals),
+        ("window count", lambda: object_window(chain, *window), lambda: columns.count_in_window(*window)),
+        ("largest 100", lambda: object_largest(chain, 100), lambda: columns.largest_transfers(100)),
+    )
+    print(f"{'query':>16} {'objects':>8} {'columns':>8}")
+    for name, objects, vectorized in queries:
+        print(f"{name:>16} {timed(objects):>8.3f} {timed(vectorized):>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark decoy selection from the global output index
+
+Compares building rings of 51 members by walking the chain for every
+ring against sampling from the OutputIndex. The chain is a stand-in:
+blocks two minutes apart with a varying number of transactions.
+
+Usage: python benchmarks/bench_decoys.py [blocks] [rings]
+"""
+
+import random
+import sys
+import time
+from collections import namedtuple
+from bytechan.core.outputs import OutputIndex
+
+FakeBlock = namedtuple("FakeBlock", "timestamp transactions")
+
+RING_SIZE = 51
+
+
+def build_chain(blocks: int):
+    rng = random.Random(1)
+    return [FakeBlock(1704067200 + height * 120.0, [None] * rng.randint(1, 20))
+            for height in range(blocks)]
+
+
+def walk_chain(chain, rng):
+    """Ring decoys picked by walking every block for its outputs"""
+    outputs = [(height, position)
+               for height, block in enumerate(chain)
+               for position in range(len(block.transactions))]
+    return rng.sample(outputs, RING_SIZE - 1)
+
+
+def main():
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rings = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    chain = build_chain(blocks)
+    rng = random.Random(2)
+    
+    start = time.perf_counter()
+    index = OutputIndex()
+    for block in chain:
+        index.apply_block(block)
+    build = time.perf_counter() - start
+    print(f"Indexed {len(index)} outputs in {blocks} blocks: {build * 1000:.1f} ms")
+    
+    walk_rings = max(1, rings // 20)
+    start = time.perf_counter()
+    for _ in range(walk_rings):
+        walk_chain(chain, rng)
+    walk = (time.perf_counter() - start) / walk_rings
+    
+    start = time.perf_counter()
+    for _ in range(rings):
+        index.sample(RING_SIZE - 1, rng=rng)
+    indexed = (time.perf_counter() - start) / rings
+    
+    print(f"{'method':>12} {'ms/ring':>10} {'decoys/s':>12}")
+    print(f"{'chain walk':>12} {walk * 1000:>10.2f} {(RING_SIZE - 1) / walk:>12.0f}")
+    print(f"{'index':>12} {indexed * 1000:>10.2f} {(RING_SIZE - 1) / indexed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
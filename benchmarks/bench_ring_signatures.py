@@ -0,0 +1,60 @@
+"""
+Benchmark batched ring signature verification by ring size
+
+Each block-sized batch draws its decoys from a shared pool of popular
+outputs, so many rings reference the same members.
+
+Usage: python benchmarks/bench_ring_signatures.py [signatures] [decoy_pool]
+"""
+
+import random
+import sys
+import time
+from bytechan.crypto.ring_signature import MemberKeyCache, RingSignature
+from bytechan.wallet import Wallet
+
+
+def signed_batch(count: int, ring_size: int, decoy_pool):
+    ring_sig = RingSignature(ring_size=ring_size, key_cache=MemberKeyCache(0))
+    items = []
+    for i in range(count):
+        wallet = Wallet.create()
+        ring = ring_sig.generate_ring(wallet.get_address(), random.sample(decoy_pool, ring_size - 1))
+        items.append((f"tx_{i}", ring_sig.sign(f"tx_{i}", wallet.keypair.private_key, ring)))
+    return items
+
+
+def timed(func, rounds: int) -> float:
+    """Average seconds per call"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    pool_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    decoy_pool = [f"output_{i:08d}" for i in range(pool_size)]
+    
+    print(f"{count} signatures per batch, {pool_size} popular decoys")
+    print(f"{'ring':>6} {'loop ms':>10} {'batch ms':>10} {'warm ms':>10} {'speedup':>8}")
+    for ring_size in (5, 11, 21, 51):
+        items = signed_batch(count, ring_size, decoy_pool)
+        
+        # Per-signature verification that decodes every member each time
+        uncached = RingSignature(key_cache=MemberKeyCache(0))
+        loop = timed(lambda: [uncached.verify(message, sig) for message, sig in items], 5)
+        
+        # Batch with a cold cache, then with keys left over from earlier blocks
+        cold = timed(lambda: RingSignature(key_cache=MemberKeyCache()).verify_batch(items), 5)
+        shared = RingSignature(key_cache=MemberKeyCache())
+        shared.verify_batch(items)
+        warm = timed(lambda: shared.verify_batch(items), 5)
+        
+        print(f"{ring_size:>6} {loop * 1000:>10.2f} {cold * 1000:>10.2f} {warm * 1000:>10.2f} "
+              f"{loop / warm:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark JSON versus binary encoding of blocks and transactions
+
+Usage: python benchmarks/bench_serialization.py [transactions per block]
+"""
+
+import json
+import sys
+import time
+from bytechan import Block, Transaction
+
+
+def build_block(tx_count: int) -> Block:
+    """Block with a mix of plain and private transactions"""
+    transactions = []
+    for i in range(tx_count):
+        tx = Transaction(
+            sender=f"bc1{i:040x}",
+            recipient=f"bc1{i + 1:040x}",
+            amount=1.0 + i / 100,
+            privacy_level="HIGH" if i % 2 else "MEDIUM"
+        )
+        if i % 2:
+            tx.apply_ring_signature(ring_size=21)
+            tx.apply_stealth_address()
+        transactions.append(tx)
+    return Block(index=1, timestamp=time.time(), transactions=transactions,
+                 previous_hash="00" * 32)
+
+
+def timed(func, rounds: int) -> float:
+    """Average seconds per call"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds
+
+
+def main():
+    tx_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rounds = 20
+    block = build_block(tx_count)
+    
+    json_data = json.dumps(block.to_dict()).encode()
+    binary_data = block.to_bytes()
+    
+    json_encode = timed(lambda: json.dumps(block.to_dict()).encode(), rounds)
+    json_decode = timed(lambda: Block.from_dict(json.loads(json_data)), rounds)
+    binary_encode = timed(block.to_bytes, rounds)
+    binary_decode = timed(lambda: Block.from_bytes(binary_data), rounds)
+    
+    print(f"Block with {tx_count} transactions")
+    print(f"{'format':<8} {'bytes':>10} {'encode ms':>10} {'decode ms':>10}")
+    print(f"{'json':<8} {len(json_data):>10} {json_encode * 1000:>10.2f} {json_decode * 1000:>10.2f}")
+    print(f"{'binary':<8} {len(binary_data):>10} {binary_encode * 1000:>10.2f} {binary_decode * 1000:>10.2f}")
+    print(f"Size ratio: {len(binary_data) / len(json_data):.2f}")
+
+
+if __name__ == "__main__":
+    main()
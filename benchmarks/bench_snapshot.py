@@ -0,0 +1,81 @@
+"""
+Benchmark bootstrapping a node from a chain snapshot
+
+Compares replaying every block through add_block with importing a
+snapshot, fully validated and trusted up to a checkpoint at the tip.
+
+Usage: python benchmarks/bench_snapshot.py [blocks] [txs_per_block]
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from bytechan import Blockchain, Transaction
+
+
+def new_node() -> Blockchain:
+    """
+    Chain at the fixed difficulty build_chain mines at, so it accepts those
+    blocks; mined milliseconds apart they would otherwise retarget upwards
+    """
+    blockchain = Blockchain(fixed_difficulty=True)
+    blockchain.difficulty = 1
+    return blockchain
+
+
+def build_chain(blocks: int, txs_per_block: int) -> Blockchain:
+    blockchain = new_node()
+    for i in range(blocks):
+        for j in range(txs_per_block):
+            blockchain.add_transaction(
+                Transaction(sender=f"bc1sender{j}", recipient=f"bc1peer{i}", amount=j + 1.0)
+            )
+        blockchain.mine_pending_transactions("bc1miner")
+    return blockchain
+
+
+def timed(function) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def replay(source: Blockchain):
+    node = new_node()
+    for block in source.chain[1:]:
+        assert node.add_block(block)
+
+
+def main():
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    txs_per_block = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    
+    print(f"Mining {blocks} blocks of {txs_per_block} transactions...")
+    with contextlib.redirect_stdout(io.StringIO()):
+        source = build_chain(blocks, txs_per_block)
+    
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "chain.snap")
+        export = timed(lambda: source.export_snapshot(path))
+        size = os.path.getsize(path)
+        raw = sum(len(block.to_bytes()) for block in source.chain)
+        print(f"Export: {export:.2f} s, {size / 1024:.0f} KB ({raw / 1024:.0f} KB uncompressed)")
+        
+        def trusted():
+            node = new_node()
+            node.add_checkpoint(source.get_latest_block().index, source.get_latest_block().hash)
+            node.import_snapshot(path, trust_checkpoints=True)
+        
+        print(f"{'method':>16} {'seconds':>8} {'blocks/s':>10}")
+        for name, function in (("add_block replay", lambda: replay(source)),
+                               ("snapshot", lambda: new_node().import_snapshot(path)),
+                               ("snapshot trusted", trusted)):
+            elapsed = timed(function)
+            print(f"{name:>16} {elapsed:>8.2f} {blocks / elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
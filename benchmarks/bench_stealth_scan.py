@@ -0,0 +1,57 @@
+"""
+Benchmark multi-wallet stealth scanning against per-wallet scanning
+
+Usage: python benchmarks/bench_stealth_scan.py [wallets] [blocks] [outputs_per_block]
+"""
+
+import contextlib
+import io
+import sys
+import time
+from bytechan import Blockchain, Transaction, Wallet
+from bytechan.wallet import StealthScanner
+
+
+def build_chain(wallets, blocks: int, per_block: int) -> Blockchain:
+    # Blocks mined back to back would otherwise retarget upwards
+    blockchain = Blockchain(fixed_difficulty=True)
+    blockchain.difficulty = 1
+    for height in range(blocks):
+        for i in range(per_block):
+            owner = wallets[(height * per_block + i) % len(wallets)]
+            tx = Transaction(sender=f"bc1sender{i}", recipient="bc1placeholder", amount=1.0)
+            tx.apply_stealth_address(owner.get_stealth_output())
+            blockchain.add_transaction(tx)
+        blockchain.mine_pending_transactions("bc1miner")
+    return blockchain
+
+
+def main():
+    wallet_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    blocks = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    per_block = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+    
+    wallets = [Wallet.create() for _ in range(wallet_count)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        blockchain = build_chain(wallets, blocks, per_block)
+    print(f"{wallet_count} wallets, {blocks} blocks, {blocks * per_block} outputs")
+    
+    start = time.perf_counter()
+    found = sum(len(wallet.stealth_generator.scan_for_outputs(blockchain, wallet.get_address()))
+                for wallet in wallets)
+    per_wallet = time.perf_counter() - start
+    print(f"{'per-wallet scan_for_outputs':<32} {per_wallet:>8.3f}s  ({found} outputs)")
+    
+    keys = {f"w{i}": wallet.stealth_generator for i, wallet in enumerate(wallets)}
+    for workers in (1, 4):
+        scanner = StealthScanner(keys, workers=workers, chunk_size=max(1, blocks // 16))
+        start = time.perf_counter()
+        result = scanner.scan(blockchain)
+        elapsed = time.perf_counter() - start
+        found = sum(len(outputs) for outputs in result.outputs.values())
+        label = f"StealthScanner workers={workers}"
+        print(f"{label:<32} {elapsed:>8.3f}s  ({found} outputs, {per_wallet / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark headers-first sync throughput against local stand-in peers
+
+Each stand-in peer serves the same pre-mined chain and delays every
+block response to imitate a round trip over a real network, which is
+what parallel downloads from several peers hide.
+
+Usage: python benchmarks/bench_sync.py [blocks] [latency_ms]
+"""
+
+import asyncio
+import contextlib
+import io
+import sys
+import time
+from bytechan import Blockchain, Network, Transaction
+from bytechan.network.protocol import MessageType
+
+
+def new_node() -> Blockchain:
+    """
+    Chain at the fixed difficulty build_chain mines at, so it accepts those
+    blocks; mined milliseconds apart they would otherwise retarget upwards
+    """
+    blockchain = Blockchain(fixed_difficulty=True)
+    blockchain.difficulty = 1
+    return blockchain
+
+
+def build_chain(blocks: int) -> Blockchain:
+    blockchain = new_node()
+    for i in range(blocks):
+        for j in range(4):
+            blockchain.add_transaction(
+                Transaction(sender=f"bc1sender{j}", recipient="bc1bob", amount=i + j + 1.0)
+            )
+        blockchain.mine_pending_transactions("bc1miner")
+    return blockchain
+
+
+async def start_peer(blockchain: Blockchain, latency: float) -> Network:
+    peer = Network(port=0, blockchain=blockchain)
+    serve_blocks = peer.handlers[MessageType.GET_BLOCKS]
+    
+    async def delayed(connection, payload):
+        await asyncio.sleep(latency)
+        serve_blocks(connection, payload)
+    
+    def serve_later(connection, payload):
+        # Not awaited by the read loop, so requests overlap like real round trips
+        peer._spawn(delayed(connection, payload))
+    
+    peer.handlers[MessageType.GET_BLOCKS] = serve_later
+    await peer.start()
+    return peer
+
+
+async def run(source: Blockchain, peer_count: int, latency: float) -> float:
+    peers = [await start_peer(source, latency) for _ in range(peer_count)]
+    node = Network(port=0, blockchain=new_node())
+    await node.start()
+    for peer in peers:
+        await node.connect_to_peer("127.0.0.1", peer.port)
+    
+    start = time.perf_counter()
+    stats = await node.sync_blockchain(batch_size=16, window=256)
+    elapsed = time.perf_counter() - start
+    
+    assert node.blockchain.get_latest_block().hash == source.get_latest_block().hash
+    for network in peers + [node]:
+        await network.stop()
+    return stats.blocks / elapsed
+
+
+def main():
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 20.0) / 1000
+    
+    print(f"Mining {blocks} blocks...")
+    with contextlib.redirect_stdout(io.StringIO()):
+        source = build_chain(blocks)
+    
+    print(f"{'peers':>6} {'blocks/s':>10}")
+    for peer_count in (1, 2, 4, 8):
+        with contextlib.redirect_stdout(io.StringIO()):
+            rate = asyncio.run(run(source, peer_count, latency))
+        print(f"{peer_count:>6} {rate:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark transaction memory use and repeated hashing on a large block
+
+Builds one block of many transactions and reports the memory held by
+the transactions and the time to hash and encode the block several
+times over, as validation and relay do.
+
+Usage: python benchmarks/bench_transactions.py [transactions] [rounds]
+"""
+
+import sys
+import time
+import tracemalloc
+from bytechan import Block, Transaction
+from bytechan.core.block import BLOCK_VERSION_LEGACY
+
+
+def make_transactions(count: int):
+    transactions = []
+    for i in range(count):
+        tx = Transaction(sender=f"bc1sender{i % 1000}", recipient=f"bc1recipient{i}", amount=i + 1.0)
+        if i % 4 == 0:
+            tx.apply_stealth_address()
+        transactions.append(tx)
+    return transactions
+
+
+def timed(function, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        function()
+    return (time.perf_counter() - start) / rounds
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    tracemalloc.start()
+    transactions = make_transactions(count)
+    created = tracemalloc.get_traced_memory()[0]
+    block = Block(index=1, timestamp=1704067300.0, transactions=transactions, previous_hash="ab" * 32)
+    hashed = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{count} transactions: {created / count:.0f} bytes each after creation, "
+          f"{hashed / count:.0f} after hashing the block")
+
+    legacy = Block(index=1, timestamp=1704067300.0, transactions=transactions,
+                   previous_hash="ab" * 32, version=BLOCK_VERSION_LEGACY)
+
+    print(f"{'operation':>22} {'seconds':>8}")
+    for name, function in (("header hash", block.calculate_hash),
+                           ("legacy hash", legacy.calculate_hash),
+                           ("encode block", block.to_bytes)):
+        print(f"{name:>22} {timed(function, rounds):>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
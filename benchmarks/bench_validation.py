@@ -0,0 +1,60 @@
+"""
+Benchmark block acceptance throughput as the worker count changes
+
+Builds blocks of ring-signed, confidential transactions and accepts
+them onto a fresh chain through the validation pipeline, once per
+worker count.
+
+Usage: python benchmarks/bench_validation.py [blocks] [txs_per_block] [ring_size]
+"""
+
+import contextlib
+import io
+import os
+import sys
+import time
+from bytechan import Block, Blockchain, Transaction
+from bytechan.crypto.ring_signature import RingSignature
+
+
+def build_blocks(blocks: int, txs_per_block: int, ring_size: int):
+    ring = [f"{member:064x}" for member in range(ring_size)]
+    signer = RingSignature(ring_size=ring_size)
+    tip = Blockchain().get_latest_block()
+    chain = []
+    for height in range(blocks):
+        transactions = []
+        for i in range(txs_per_block):
+            tx = Transaction(sender=f"bc1sender{i}", recipient=f"bc1peer{height}", amount=i + 1.0)
+            tx.apply_ring_signature(ring_size, signer.sign(tx.tx_id, f"key{height}-{i}", ring))
+            tx.apply_confidential_transaction()
+            transactions.append(tx)
+        tip = Block(index=height + 1, timestamp=tip.timestamp + 120, transactions=transactions,
+                    previous_hash=tip.hash)
+        tip.mine_block(1)
+        chain.append(tip)
+    return chain
+
+
+def main():
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    txs_per_block = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    ring_size = int(sys.argv[3]) if len(sys.argv) > 3 else 11
+    
+    print(f"Building {blocks} blocks of {txs_per_block} transactions, ring size {ring_size}...")
+    with contextlib.redirect_stdout(io.StringIO()):
+        chain = build_blocks(blocks, txs_per_block, ring_size)
+    
+    print(f"{'workers':>8} {'seconds':>8} {'blocks/s':>9}")
+    counts = sorted({1, 2, 4, os.cpu_count() or 1})
+    for workers in counts:
+        node = Blockchain()
+        node.difficulty = 1
+        start = time.perf_counter()
+        assert node.add_blocks(chain, workers=workers) == blocks
+        elapsed = time.perf_counter() - start
+        print(f"{workers:>8} {elapsed:>8.2f} {blocks / elapsed:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
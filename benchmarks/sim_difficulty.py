@@ -0,0 +1,85 @@
+"""
+Simulate block times under the old and the LWMA difficulty retarget
+
+Solve times are drawn from the exponential distribution a miner with a
+given hashrate sees at a given target. The hashrate changes partway
+through to show how each rule recovers. The old rule is the previous
+adjust_difficulty: one hex digit (16x work) up or down whenever the last
+10 blocks took more than 20% away from 10 block times.
+
+Usage: python benchmarks/sim_difficulty.py [blocks] [window] [seed]
+"""
+
+import random
+import statistics
+import sys
+from bytechan.core.difficulty import (
+    TARGET_BLOCK_TIME, LWMARetarget, difficulty_to_target, target_to_work
+)
+
+
+# Hashrate multipliers by share of the run: steady, a 5x jump, then a 10x drop
+PHASES = ((0.0, 1.0), (0.4, 5.0), (0.7, 0.5))
+
+# Starts between two hex digit steps, where the old rule cannot settle
+BASE_HASHRATE = 16 ** 4 * 4 / TARGET_BLOCK_TIME
+
+
+def hashrate_at(block: int, blocks: int) -> float:
+    rate = BASE_HASHRATE
+    for start, multiplier in PHASES:
+        if block >= start * blocks:
+            rate = BASE_HASHRATE * multiplier
+    return rate
+
+
+def simulate_old(blocks: int, rng: random.Random):
+    difficulty = 4
+    timestamps = [0.0]
+    for block in range(blocks):
+        work = target_to_work(difficulty_to_target(difficulty))
+        timestamps.append(timestamps[-1] + rng.expovariate(hashrate_at(block, blocks) / work))
+        if len(timestamps) >= 10:
+            time_taken = timestamps[-1] - timestamps[-10]
+            expected_time = 10 * TARGET_BLOCK_TIME
+            if time_taken < expected_time * 0.8:
+                difficulty += 1
+            elif time_taken > expected_time * 1.2:
+                difficulty = max(1, difficulty - 1)
+    return [b - a for a, b in zip(timestamps, timestamps[1:])]
+
+
+def simulate_lwma(blocks: int, window: int, rng: random.Random):
+    target = difficulty_to_target(4)
+    retarget = LWMARetarget(window=window)
+    timestamps = [0.0]
+    retarget.add_block(0.0, target)
+    for block in range(blocks):
+        work = target_to_work(target)
+        timestamps.append(timestamps[-1] + rng.expovariate(hashrate_at(block, blocks) / work))
+        retarget.add_block(timestamps[-1], target)
+        target = retarget.next_target(target)
+    return [b - a for a, b in zip(timestamps, timestamps[1:])]
+
+
+def report(name: str, solve_times):
+    slow = sum(1 for t in solve_times if t > 5 * TARGET_BLOCK_TIME) / len(solve_times)
+    # Mean block time over windows of 20 blocks, a proxy for how long swings last
+    means = [statistics.mean(solve_times[i:i + 20]) for i in range(0, len(solve_times) - 19, 20)]
+    print(f"{name:>6} {statistics.mean(solve_times):>8.1f} {statistics.pstdev(solve_times):>8.1f} "
+          f"{statistics.pstdev(means):>12.1f} {slow:>9.1%}")
+
+
+def main():
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    window = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    
+    print(f"{blocks} blocks, {TARGET_BLOCK_TIME} s target, LWMA window {window}")
+    print(f"{'rule':>6} {'mean s':>8} {'stdev s':>8} {'20-blk stdev':>12} {'>5x slow':>9}")
+    report("old", simulate_old(blocks, random.Random(seed)))
+    report("lwma", simulate_lwma(blocks, window, random.Random(seed)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+Core blockchain components
+"""
+
+from bytechan.core.blockchain import Blockchain
+from bytechan.core.block import Block, BlockHeader
+from bytechan.core.columnar import ColumnarChain
+from bytechan.core.transaction import Transaction, PrivacyLevel
+from bytechan.core.key_images import KeyImageSet
+from bytechan.core.ledger import BalanceIndex
+from bytechan.core.mempool import Mempool
+from bytechan.core.merkle import MerkleTree, MerkleProof
+from bytechan.core.outputs import OutputIndex
+from bytechan.core.storage import BlockStore
+from bytechan.core.utxo import UTXOSet
+from bytechan.core.validation import BlockValidator
+
+__all__ = [
+    "Blockchain",
+    "Block",
+    "BlockHeader",
+    "Transaction",
+    "PrivacyLevel",
+    "BalanceIndex",
+    "ColumnarChain",
+    "KeyImageSet",
+    "Mempool",
+    "MerkleTree",
+    "MerkleProof",
+    "OutputIndex",
+    "BlockStore",
+    "UTXOSet",
+    "BlockValidator",
+]
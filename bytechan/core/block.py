@@ -4,61 +4,352 @@ Block structure for ByteChan blockchain
 
 import hashlib
 import json
+import struct
 import time
-from typing import List
+from dataclasses import dataclass
+from typing import List, Optional
+from bytechan.core.difficulty import MAX_TARGET, difficulty_to_target, hash_meets_target, target_hex
+from bytechan.core.merkle import MerkleProof, MerkleTree, merkle_root
+from bytechan.core.mining import MiningResult, ParallelMiner
+from bytechan.core.serialization import decode_block, encode_block
 from bytechan.core.transaction import Transaction
 
 
+# Hash format versions
+# 1: SHA-256 over the JSON document of the whole block (pre-header chains)
+# 2: SHA-256 over a fixed-layout header committing to a transaction merkle root
+#    and the proof of work target
+BLOCK_VERSION_LEGACY = 1
+BLOCK_VERSION_HEADER = 2
+CURRENT_BLOCK_VERSION = BLOCK_VERSION_HEADER
+
+# version, index, timestamp, previous hash, merkle root, target (nonce follows)
+HEADER_PREFIX = struct.Struct("<IQd32s32s32s")
+NONCE = struct.Struct("<Q")
+HEADER_SIZE = HEADER_PREFIX.size + NONCE.size
+
+
+@dataclass
+class BlockHeader:
+    """
+    Block metadata without the transaction bodies
+    Header blocks can be hash-checked from the header alone; legacy
+    blocks only once their transactions are known
+    """
+    version: int
+    index: int
+    timestamp: float
+    previous_hash: str
+    merkle_root: bytes
+    target: int
+    nonce: int
+    hash: str
+    
+    # Header fields followed by the 32-byte block hash
+    WIRE_SIZE = HEADER_SIZE + 32
+    
+    @classmethod
+    def from_block(cls, block: 'Block') -> 'BlockHeader':
+        """Header of an existing block"""
+        return cls(
+            version=block.version,
+            index=block.index,
+            timestamp=block.timestamp,
+            previous_hash=block.previous_hash,
+            merkle_root=block.merkle_root,
+            target=block.target,
+            nonce=block.nonce,
+            hash=block.hash
+        )
+    
+    def prefix(self) -> bytes:
+        """Header bytes up to the nonce, as hashed by header blocks"""
+        return HEADER_PREFIX.pack(
+            self.version,
+            self.index,
+            self.timestamp,
+            bytes.fromhex(self.previous_hash),
+            self.merkle_root,
+            self.target.to_bytes(32, "big")
+        )
+    
+    def to_bytes(self) -> bytes:
+        """Fixed-size wire form"""
+        return self.prefix() + NONCE.pack(self.nonce) + bytes.fromhex(self.hash)
+    
+    @classmethod
+    def from_bytes(cls, data) -> 'BlockHeader':
+        """Parse the fixed-size wire form"""
+        version, index, timestamp, previous_hash, root, target = HEADER_PREFIX.unpack_from(data, 0)
+        nonce = NONCE.unpack_from(data, HEADER_PREFIX.size)[0]
+        block_hash = bytes(data[HEADER_SIZE:HEADER_SIZE + 32])
+        if len(block_hash) != 32:
+            raise ValueError("Truncated block header")
+        return cls(version, index, timestamp, previous_hash.hex(), root,
+                   int.from_bytes(target, "big"), nonce, block_hash.hex())
+    
+    def is_self_consistent(self) -> bool:
+        """
+        Check the stored hash, and that it meets the committed target
+        Legacy headers never pass: their hash covers the transactions and
+        they commit to no target, so the header proves no work
+        """
+        if self.version == BLOCK_VERSION_LEGACY:
+            return False
+        if not hash_meets_target(self.hash, self.target):
+            return False
+        return hashlib.sha256(self.prefix() + NONCE.pack(self.nonce)).hexdigest() == self.hash
+    
+    def matches(self, block: 'Block') -> bool:
+        """Check that a downloaded block body belongs to this header"""
+        return (
+            block.index == self.index
+            and block.version == self.version
+            and block.previous_hash == self.previous_hash
+            and block.hash == self.hash
+            and block.calculate_hash() == self.hash
+            and (self.version == BLOCK_VERSION_LEGACY
+                 or block.compute_merkle_root() == self.merkle_root)
+        )
+
+
 class Block:
     """Individual block in the blockchain"""
     
-    def __init__(self, index: int, timestamp: float, transactions: List[Transaction], 
-                 previous_hash: str, nonce: int = 0):
+    def __init__(self, index: int, timestamp: float, transactions: List[Transaction],
+                 previous_hash: str, nonce: int = 0,
+                 version: int = CURRENT_BLOCK_VERSION, target: int = MAX_TARGET):
         self.index = index
         self.timestamp = timestamp
+        # Committed transactions keep their digests for every later hash
+        for tx in transactions:
+            tx.commit()
         self.transactions = transactions
         self.previous_hash = previous_hash
         self.nonce = nonce
+        self.version = version
+        # Committed by header blocks; legacy blocks do not record a target
+        self.target = target
+        self._merkle_tree: Optional[MerkleTree] = None
         self.hash = self.calculate_hash()
     
-    def calculate_hash(self) -> str:
-        """Calculate SHA-256 hash of block contents"""
-        block_string = json.dumps({
+    def hash_payload(self) -> dict:
+        """Block contents covered by the legacy (version 1) hash"""
+        return {
             "index": self.index,
             "timestamp": self.timestamp,
             "transactions": [tx.to_dict() for tx in self.transactions],
             "previous_hash": self.previous_hash,
             "nonce": self.nonce
-        }, sort_keys=True)
-        
-        return hashlib.sha256(block_string.encode()).hexdigest()
+        }
+    
+    def compute_merkle_root(self) -> bytes:
+        """
+        Merkle root recomputed from the current transactions
+        Validation uses this so that edited transactions are detected
+        """
+        return merkle_root([tx.digest() for tx in self.transactions])
+    
+    @property
+    def merkle_tree(self) -> MerkleTree:
+        """
+        Cached merkle tree over the block's transactions
+        Transactions appended to the list since the last call are added
+        incrementally; any other change to the list triggers a rebuild
+        """
+        tree = self._merkle_tree
+        if tree is None or len(tree) > len(self.transactions):
+            tree = MerkleTree(tx.digest() for tx in self.transactions)
+            self._merkle_tree = tree
+        else:
+            for tx in self.transactions[len(tree):]:
+                tree.append(tx.digest())
+        return tree
+    
+    @property
+    def merkle_root(self) -> bytes:
+        """Merkle root from the cached tree"""
+        return self.merkle_tree.root
+    
+    def add_transaction(self, transaction: Transaction):
+        """Add a transaction while the block is being assembled"""
+        # The cached tree picks up the new transaction as one appended leaf
+        self.transactions.append(transaction.commit())
+        self.hash = self._hash_with_root(self.merkle_root)
     
-    def mine_block(self, difficulty: int):
-        """Proof of Work mining with RandomX-like algorithm"""
-        target = "0" * difficulty
+    def get_merkle_proof(self, tx_id: str) -> MerkleProof:
+        """Inclusion proof for the transaction with the given ID"""
+        for position, tx in enumerate(self.transactions):
+            if tx.tx_id == tx_id:
+                return self.merkle_tree.proof(position)
+        raise KeyError(f"Transaction {tx_id} is not in block {self.index}")
+    
+    @staticmethod
+    def verify_merkle_proof(transaction: Transaction, proof: MerkleProof,
+                            root: bytes) -> bool:
+        """
+        Check that a transaction is committed by a header's merkle root
+        Light clients only need the header and the proof, not the block
+        """
+        return proof.leaf == transaction.digest() and proof.verify(root)
+    
+    def header_prefix(self, root: Optional[bytes] = None) -> bytes:
+        """
+        Serialized header up to, but not including, the nonce
+        The merkle root is recomputed unless one is passed in
+        """
+        if root is None:
+            root = self.compute_merkle_root()
+        return HEADER_PREFIX.pack(
+            self.version,
+            self.index,
+            self.timestamp,
+            bytes.fromhex(self.previous_hash),
+            root,
+            self.target.to_bytes(32, "big")
+        )
+    
+    def calculate_hash(self) -> str:
+        """Calculate SHA-256 hash of block contents"""
+        return self._hash_with_root(None)
+    
+    def meets_target(self, target: Optional[int] = None) -> bool:
+        """
+        True if the hash meets target, by default the one the header
+        commits to. Legacy blocks commit to none and only meet a given one
+        """
+        if target is None:
+            if self.version == BLOCK_VERSION_LEGACY:
+                return False
+            target = self.target
+        return hash_meets_target(self.hash, target)
+    
+    def _hash_with_root(self, root: Optional[bytes]) -> str:
+        """Hash the block, reusing a known merkle root for header blocks"""
+        if self.version == BLOCK_VERSION_LEGACY:
+            block_string = json.dumps(self.hash_payload(), sort_keys=True)
+            return hashlib.sha256(block_string.encode()).hexdigest()
         
+        return hashlib.sha256(
+            self.header_prefix(root) + NONCE.pack(self.nonce)
+        ).hexdigest()
+    
+    def mining_template(self):
+        """
+        Data a miner needs to hash any nonce for this block:
+        the header prefix for header blocks, the JSON payload for legacy ones
+        """
+        if self.version == BLOCK_VERSION_LEGACY:
+            return self.hash_payload()
+        return self.header_prefix(self.merkle_root)
+    
+    def mine_block(self, difficulty: Optional[int] = None, workers: int = 1,
+                   target: Optional[int] = None) -> MiningResult:
+        """
+        Proof of Work mining with RandomX-like algorithm
+        The hash must be at most target, or have difficulty leading zero
+        hex digits. With workers > 1 the nonce space is split across
+        processes
+        """
+        if target is None:
+            target = difficulty_to_target(difficulty)
+        self.target = target
         print(f"Mining block {self.index}...")
+        
+        if workers > 1:
+            result = ParallelMiner(workers).mine(self, target=target)
+            self.nonce = result.nonce
+            self.hash = result.hash
+        else:
+            result = self._mine_serial(target)
+        
+        print(f"Block mined! Hash: {self.hash}")
+        print(f"Time taken: {result.elapsed:.2f} seconds, Nonce: {self.nonce}, "
+              f"Hashrate: {result.hashrate:.0f} H/s ({result.workers} workers)")
+        return result
+    
+    def _mine_serial(self, target: int) -> MiningResult:
+        """Search nonces in the current process"""
+        # Fixed-width hex strings compare like the integers they encode
+        target = target_hex(target)
         start_time = time.time()
+        start_nonce = self.nonce
+        
+        if self.version == BLOCK_VERSION_LEGACY:
+            payload = self.hash_payload()
+            
+            def hash_nonce(nonce: int) -> str:
+                payload["nonce"] = nonce
+                return hashlib.sha256(
+                    json.dumps(payload, sort_keys=True).encode()
+                ).hexdigest()
+        else:
+            # Hash the fixed prefix once and only feed the nonce per attempt
+            prefix_state = hashlib.sha256(self.header_prefix(self.merkle_root))
+            pack_nonce = NONCE.pack
+            
+            def hash_nonce(nonce: int) -> str:
+                state = prefix_state.copy()
+                state.update(pack_nonce(nonce))
+                return state.hexdigest()
         
-        while self.hash[:difficulty] != target:
+        self.hash = hash_nonce(self.nonce)
+        while self.hash > target:
             self.nonce += 1
-            self.hash = self.calculate_hash()
+            self.hash = hash_nonce(self.nonce)
             
             # Progress indicator
             if self.nonce % 10000 == 0:
                 print(f"  Nonce: {self.nonce}, Hash: {self.hash[:10]}...")
         
-        elapsed = time.time() - start_time
-        print(f"Block mined! Hash: {self.hash}")
-        print(f"Time taken: {elapsed:.2f} seconds, Nonce: {self.nonce}")
+        return MiningResult(
+            nonce=self.nonce,
+            hash=self.hash,
+            attempts=self.nonce - start_nonce + 1,
+            elapsed=time.time() - start_time,
+            workers=1
+        )
     
     def to_dict(self) -> dict:
         """Convert block to dictionary"""
-        return {
+        data = {
             "index": self.index,
             "timestamp": self.timestamp,
             "transactions": [tx.to_dict() for tx in self.transactions],
             "previous_hash": self.previous_hash,
             "nonce": self.nonce,
-            "hash": self.hash
+            "hash": self.hash,
+            "version": self.version
         }
+        if self.version >= BLOCK_VERSION_HEADER:
+            data["merkle_root"] = self.merkle_root.hex()
+            data["target"] = target_hex(self.target)
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Block':
+        """
+        Rebuild a block from its dictionary form
+        Dictionaries without a version predate the header format and are
+        loaded as legacy blocks, so existing chains keep their hashes
+        """
+        block = cls.__new__(cls)
+        block.index = data["index"]
+        block.timestamp = data["timestamp"]
+        block.transactions = [Transaction.from_dict(tx).commit() for tx in data["transactions"]]
+        block.previous_hash = data["previous_hash"]
+        block.nonce = data["nonce"]
+        block.version = data.get("version", BLOCK_VERSION_LEGACY)
+        block.target = int(data["target"], 16) if "target" in data else MAX_TARGET
+        block._merkle_tree = None
+        block.hash = data["hash"]
+        return block
+    
+    def to_bytes(self) -> bytes:
+        """Encode block in the compact binary format"""
+        return encode_block(self)
+    
+    @classmethod
+    def from_bytes(cls, data) -> 'Block':
+        """Decode a block from bytes or a buffer such as a memoryview"""
+        return cls.from_dict(decode_block(data))
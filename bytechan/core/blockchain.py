@@ -4,20 +4,79 @@ Blockchain implementation for ByteChan
 
 import hashlib
 import time
-from typing import List, Optional
-from bytechan.core.block import Block
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional
+from bytechan.core.block import Block, BLOCK_VERSION_LEGACY, CURRENT_BLOCK_VERSION
+from bytechan.core.columnar import ColumnarChain
+from bytechan.core.difficulty import LWMARetarget, difficulty_to_target, target_to_difficulty
+from bytechan.core.key_images import KeyImageSet
+from bytechan.core.ledger import BalanceIndex
+from bytechan.core.mempool import Mempool
+from bytechan.core.outputs import OutputIndex
+from bytechan.core.snapshot import SnapshotError, read_snapshot, write_snapshot
+from bytechan.core.storage import BlockStore, StoredChain
 from bytechan.core.transaction import Transaction
+from bytechan.core.utxo import UTXOSet
+from bytechan.core.validation import BlockValidator, verify_proofs
+from bytechan.crypto.signature_cache import SignatureCache
+
+
+def _block_hash_is_valid(data: bytes) -> bool:
+    """Process pool task: decode a block, check its stored hash and proofs"""
+    block = Block.from_bytes(data)
+    if block.hash != block.calculate_hash():
+        return False
+    return all(verify_proofs(tx) for tx in block.transactions)
 
 
 class Blockchain:
     """Main blockchain class managing the chain of blocks"""
     
-    def __init__(self):
+    def __init__(self, block_version: int = CURRENT_BLOCK_VERSION,
+                 store: Optional[BlockStore] = None, live_blocks: int = 128,
+                 fixed_difficulty: bool = False):
+        """
+        Without a store the chain lives in memory. With a BlockStore the
+        chain is persisted and reloaded lazily on restart, keeping at most
+        live_blocks recent blocks as objects, and spent key images and
+        snapshots of the unspent output set are kept next to the blocks.
+        With fixed_difficulty=True every block is held to the starting
+        target instead of the LWMA retarget, as on a test network
+        """
         self.chain: List[Block] = []
-        self.difficulty = 4
-        self.pending_transactions: List[Transaction] = []
+        self.key_images = KeyImageSet()
+        self.utxos = UTXOSet()
+        if store is not None:
+            self.chain = StoredChain(store, window=live_blocks)
+            self.key_images = KeyImageSet(directory=store.directory)
+            self.utxos = UTXOSet(directory=store.directory)
+        # Starting proof of work target, a hash must be at most this as an
+        # integer; later header blocks follow the retarget over their ancestors
+        self.target = difficulty_to_target(4)
+        self.retarget = LWMARetarget()
+        self.fixed_difficulty = fixed_difficulty
+        self.block_version = block_version
+        self.mempool = Mempool()
         self.mining_reward = 10.0
-        self.create_genesis_block()
+        self.balances = BalanceIndex()
+        self.outputs = OutputIndex()
+        self.checkpoints: Dict[int, str] = {}
+        # Proofs verified at mempool admission are not re-checked in blocks
+        self.signature_cache = SignatureCache()
+        self._validated_height = 0
+        self._validated_hash = ""
+        
+        if len(self.chain) == 0:
+            self.create_genesis_block()
+        else:
+            # Blocks stream from disk one at a time while the index is rebuilt
+            self.balances.rebuild(self.chain)
+            self.outputs.rebuild(self.chain)
+            self.key_images.catch_up(self.chain)
+            self.utxos.catch_up(self.chain)
+            self._rebuild_retarget()
+        
+        self._validated_hash = self.chain[0].hash
     
     def create_genesis_block(self) -> Block:
         """Create the first block in the chain"""
@@ -26,18 +85,58 @@ class Blockchain:
             timestamp=1704067200,  # Jan 1, 2024
             transactions=[],
             previous_hash="0" * 64,
-            nonce=0
+            nonce=0,
+            version=BLOCK_VERSION_LEGACY  # Keeps the genesis hash of existing chains
         )
         genesis_block.hash = genesis_block.calculate_hash()
-        self.chain.append(genesis_block)
+        self._append_block(genesis_block)
         return genesis_block
     
     def get_latest_block(self) -> Block:
         """Get the most recent block in the chain"""
         return self.chain[-1]
     
-    def mine_pending_transactions(self, mining_reward_address: str):
-        """Mine all pending transactions and add them to a new block"""
+    @property
+    def difficulty(self) -> int:
+        """Leading zero hex digits the starting target requires"""
+        return target_to_difficulty(self.target)
+    
+    @difficulty.setter
+    def difficulty(self, difficulty: int):
+        self.target = difficulty_to_target(difficulty)
+    
+    def next_target(self, version: Optional[int] = None,
+                    window: Optional[LWMARetarget] = None) -> int:
+        """
+        Target the next block of the given version, by default ours, must meet
+        window defaults to the chain's retarget; a copy extended with later
+        blocks gives the target past them. Legacy blocks commit to no
+        target, so like every block on a fixed difficulty chain they are
+        held to the starting one
+        """
+        if version is None:
+            version = self.block_version
+        if version == BLOCK_VERSION_LEGACY or self.fixed_difficulty:
+            return self.target
+        if window is None:
+            window = self.retarget
+        return window.next_target(self.target)
+    
+    @property
+    def pending_transactions(self) -> List[Transaction]:
+        """Transactions waiting in the mempool, in arrival order"""
+        return self.mempool.transactions()
+    
+    def mine_pending_transactions(self, mining_reward_address: str, workers: int = 1,
+                                  max_txs: Optional[int] = None,
+                                  max_bytes: Optional[int] = None):
+        """
+        Mine pending transactions and add them to a new block
+        The highest fee-rate transactions within max_txs/max_bytes are
+        included; workers > 1 spreads the nonce search across processes
+        """
+        transactions = self.mempool.select_for_block(max_txs, max_bytes)
+        
         # Create reward transaction
         reward_tx = Transaction(
             sender="NETWORK",
@@ -45,77 +144,336 @@ class Blockchain:
             amount=self.mining_reward,
             privacy_level="MEDIUM"
         )
-        self.pending_transactions.append(reward_tx)
+        transactions.append(reward_tx)
         
         # Create new block
         block = Block(
             index=len(self.chain),
             timestamp=time.time(),
-            transactions=self.pending_transactions,
-            previous_hash=self.get_latest_block().hash
+            transactions=transactions,
+            previous_hash=self.get_latest_block().hash,
+            version=self.block_version
         )
         
         # Mine the block
-        block.mine_block(self.difficulty)
-        
-        # Add to chain
-        self.chain.append(block)
+        block.mine_block(target=self.next_target(block.version), workers=workers)
         
-        # Reset pending transactions
-        self.pending_transactions = []
+        # Add to chain (this also removes the mined transactions from the mempool)
+        self._append_block(block)
+    
+    def add_block(self, block: Block) -> bool:
+        """Append a block received from elsewhere if it extends the tip"""
+        return BlockValidator(self).accept(block)
     
-    def add_transaction(self, transaction: Transaction) -> bool:
-        """Add a new transaction to pending transactions"""
-        if not transaction.is_valid():
+    def add_blocks(self, blocks: Iterable[Block], workers: int = 1) -> int:
+        """
+        Append blocks in order until one fails validation
+        With workers > 1 their ring signatures and range proofs are
+        verified across a process pool shared by the whole batch.
+        Returns how many blocks were added
+        """
+        added = 0
+        with BlockValidator(self, workers=workers) as validator:
+            for block in blocks:
+                if not validator.accept(block):
+                    break
+                added += 1
+        return added
+    
+    def _extends_tip(self, block: Block) -> bool:
+        """
+        True if the block links to the tip, its hash is correct and it
+        meets the target its ancestors call for
+        """
+        if block.index != len(self.chain):
+            return False
+        
+        if block.previous_hash != self.get_latest_block().hash:
             return False
         
-        self.pending_transactions.append(transaction)
+        # Hash format upgrades are one-way
+        if block.version < self.get_latest_block().version:
+            return False
+        
+        return (block.hash == block.calculate_hash()
+                and self._meets_required_target(block, self.next_target(block.version)))
+    
+    @staticmethod
+    def _meets_required_target(block: Block, required: int) -> bool:
+        """True if the hash meets required, and a header block commits to it or a harder target"""
+        if block.version == BLOCK_VERSION_LEGACY:
+            return block.meets_target(required)
+        return block.target <= required and block.meets_target()
+    
+    def _key_images_unspent(self, transactions: Iterable[Transaction]) -> bool:
+        """True if no key image is spent twice in the list or already on chain"""
+        seen = set()
+        for tx in transactions:
+            if tx.key_image is None:
+                continue
+            if tx.key_image in seen or tx.key_image in self.key_images:
+                return False
+            seen.add(tx.key_image)
         return True
     
+    def rollback_to(self, height: int) -> List[Block]:
+        """
+        Remove every block above the given height (used on reorg)
+        Returns the removed blocks, tip first
+        """
+        if height < 0:
+            raise ValueError("Cannot roll back past the genesis block")
+        
+        removed = []
+        balances_reverted = True
+        utxos_reverted = True
+        while len(self.chain) - 1 > height:
+            block = self.chain.pop()
+            if balances_reverted:
+                try:
+                    self.balances.revert_block(block)
+                except ValueError:
+                    balances_reverted = False
+            if utxos_reverted:
+                try:
+                    self.utxos.revert_block(block)
+                except ValueError:
+                    utxos_reverted = False
+            self.outputs.revert_block(block)
+            self.key_images.revert_block(block)
+            removed.append(block)
+            
+            # Transactions from orphaned blocks go back to the pool
+            for tx in block.transactions:
+                if tx.sender != "NETWORK":
+                    self.mempool.add(tx)
+        
+        # Deeper than the kept undo data: rebuild from the chain instead
+        if not balances_reverted:
+            self.balances.rebuild(self.chain)
+        if not utxos_reverted:
+            self.utxos.rebuild(self.chain)
+        
+        if self._validated_height > height:
+            self._validated_height = height
+            self._validated_hash = self.chain[height].hash
+        
+        if removed:
+            self._rebuild_retarget()
+        
+        return removed
+    
+    def _append_block(self, block: Block):
+        """Append a block and update the indexes derived from the chain"""
+        self.chain.append(block)
+        self.balances.apply_block(block)
+        self.outputs.apply_block(block)
+        self.key_images.apply_block(block)
+        self.utxos.apply_block(block)
+        self.retarget.add_block(block.timestamp, self._window_target(block))
+        self.mempool.remove_many(block.transactions)
+        self.mempool.remove_conflicts(block.transactions)
+    
+    def add_transaction(self, transaction: Transaction, fee: float = 0.0) -> bool:
+        """
+        Add a new transaction to the mempool
+        The fee only affects its priority for inclusion in a block.
+        A key image or output already spent on chain or in the pool is
+        refused
+        """
+        if not transaction.is_valid(self.utxos):
+            return False
+        
+        if not verify_proofs(transaction, self.signature_cache):
+            return False
+        
+        if transaction.key_image is not None and (
+                transaction.key_image in self.key_images
+                or self.mempool.spends_key_image(transaction.key_image)):
+            return False
+        
+        return self.mempool.add(transaction, fee)
+    
     def get_balance(self, address: str) -> float:
         """Get the balance of an address"""
-        balance = 0.0
+        return self.balances.get_balance(address)
+    
+    def get_balances(self, addresses: Iterable[str]) -> Dict[str, float]:
+        """Get the balances of many addresses at once"""
+        return self.balances.get_balances(addresses)
+    
+    def add_checkpoint(self, height: int, block_hash: str):
+        """
+        Register a trusted block hash
+        Incremental validation does not re-check blocks at or below it
+        """
+        self.checkpoints[height] = block_hash
+    
+    def to_columnar(self) -> ColumnarChain:
+        """Copy the chain into columnar form for analytics and bulk scans"""
+        return ColumnarChain.from_blocks(self.chain)
+    
+    def export_snapshot(self, path: str, blocks_per_chunk: int = 256, level: int = 6) -> int:
+        """
+        Write the whole chain to a compressed snapshot file
+        Blocks stream from the chain one at a time; returns how many
+        were written
+        """
+        with open(path, "wb") as f:
+            return write_snapshot(iter(self.chain), f, blocks_per_chunk, level)
+    
+    def import_snapshot(self, path: str, trust_checkpoints: bool = False) -> int:
+        """
+        Append the blocks of a snapshot that extend this chain
+        Blocks already on the chain must match and are skipped. Every
+        new block is checked like add_block, except that with
+        trust_checkpoints=True blocks up to the highest registered
+        checkpoint only have their hashes and linkage checked, and the
+        checkpoint hash must be reached. Returns how many blocks were
+        added; on a bad block or unreadable data the import stops with
+        the error and the chain keeps the checked blocks before it, but
+        none trusted short of the checkpoint
+        """
+        trusted_height = max(self.checkpoints) if trust_checkpoints and self.checkpoints else -1
+        start_height = len(self.chain)
+        added = 0
         
-        for block in self.chain:
-            for tx in block.transactions:
-                if tx.sender == address:
-                    balance -= tx.amount
-                if tx.recipient == address:
-                    balance += tx.amount
+        try:
+            with open(path, "rb") as f:
+                for block in read_snapshot(f):
+                    if block.index < len(self.chain):
+                        if self.chain[block.index].hash != block.hash:
+                            raise SnapshotError(f"Block {block.index} conflicts with the chain")
+                        continue
+                    
+                    if block.index <= trusted_height:
+                        accepted = self._extends_tip(block)
+                        if accepted and block.index in self.checkpoints:
+                            accepted = self.checkpoints[block.index] == block.hash
+                        if accepted:
+                            self._append_block(block)
+                    else:
+                        accepted = self.add_block(block)
+                    
+                    if not accepted:
+                        raise SnapshotError(f"Invalid block {block.index} in snapshot")
+                    added += 1
+            
+            if len(self.chain) - 1 < trusted_height:
+                raise SnapshotError("Snapshot ends before the trusted checkpoint")
+        except Exception:
+            # Unreadable chunks and bad blocks alike leave no block trusted unchecked
+            self._discard_unverified(start_height, trusted_height)
+            raise
         
-        return balance
+        tip = self.get_latest_block()
+        self._validated_height = tip.index
+        self._validated_hash = tip.hash
+        return added
+    
+    def _discard_unverified(self, start_height: int, trusted_height: int):
+        """Drop imported blocks that were only trusted on the checkpoint's word"""
+        if len(self.chain) <= start_height or len(self.chain) > trusted_height:
+            return
+        removed = self.rollback_to(start_height - 1)
+        for block in removed:
+            self.mempool.remove_many(block.transactions)
     
-    def is_chain_valid(self) -> bool:
-        """Validate the entire blockchain"""
-        for i in range(1, len(self.chain)):
+    def is_chain_valid(self, incremental: bool = False, workers: int = 1) -> bool:
+        """
+        Validate the blockchain
+        With incremental=True only blocks above the last verified height,
+        or above the highest trusted checkpoint, are checked. With
+        workers > 1 block hashes and transaction proofs are checked
+        across processes before the sequential linkage, target and
+        transaction checks
+        """
+        # Checkpoints must agree with the chain we have
+        for height, block_hash in self.checkpoints.items():
+            if height < len(self.chain) and self.chain[height].hash != block_hash:
+                return False
+        
+        start = 1
+        if incremental:
+            start = self._verified_height() + 1
+        
+        if workers > 1 and len(self.chain) - start > 1:
+            if not self._verify_hashes_parallel(start, workers):
+                return False
+            checked_in_pool = True
+        else:
+            checked_in_pool = False
+        
+        # Replay the retarget from the blocks below start
+        window = LWMARetarget(self.retarget.window, self.retarget.block_time)
+        window.rebuild((block.timestamp, self._window_target(block))
+                       for block in self._window_blocks(start))
+        
+        for i in range(start, len(self.chain)):
             current_block = self.chain[i]
             previous_block = self.chain[i - 1]
             
-            # Verify block hash
-            if current_block.hash != current_block.calculate_hash():
+            # Verify block hash and proof of work
+            if not checked_in_pool and current_block.hash != current_block.calculate_hash():
+                return False
+            if not self._meets_required_target(
+                    current_block, self.next_target(current_block.version, window)):
                 return False
+            window.add_block(current_block.timestamp, self._window_target(current_block))
             
             # Verify previous hash linkage
             if current_block.previous_hash != previous_block.hash:
                 return False
             
+            # Verify the hash format never downgrades
+            if current_block.version < previous_block.version:
+                return False
+            
             # Verify all transactions
             for tx in current_block.transactions:
                 if not tx.is_valid():
                     return False
+                if not checked_in_pool and not verify_proofs(tx, self.signature_cache):
+                    return False
         
+        tip = self.get_latest_block()
+        self._validated_height = tip.index
+        self._validated_hash = tip.hash
         return True
     
-    def adjust_difficulty(self):
-        """Dynamically adjust mining difficulty based on block time"""
-        if len(self.chain) < 10:
-            return
+    def _verified_height(self) -> int:
+        """Highest height known good from a previous run or a checkpoint"""
+        height = 0
+        if (self._validated_height < len(self.chain)
+                and self.chain[self._validated_height].hash == self._validated_hash):
+            height = self._validated_height
         
-        last_10_blocks = self.chain[-10:]
-        time_taken = last_10_blocks[-1].timestamp - last_10_blocks[0].timestamp
-        expected_time = 10 * 120  # 10 blocks * 2 minutes
+        for checkpoint in self.checkpoints:
+            if checkpoint < len(self.chain):
+                height = max(height, checkpoint)
+        
+        return height
+    
+    def _verify_hashes_parallel(self, start: int, workers: int) -> bool:
+        """Recompute block hashes and verify proofs from start to the tip in a process pool"""
+        encoded = (self.chain[i].to_bytes() for i in range(start, len(self.chain)))
+        chunksize = max(1, (len(self.chain) - start) // (workers * 4))
         
-        if time_taken < expected_time * 0.8:
-            self.difficulty += 1
-        elif time_taken > expected_time * 1.2:
-            self.difficulty = max(1, self.difficulty - 1)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return all(executor.map(_block_hash_is_valid, encoded, chunksize=chunksize))
+    
+    def _window_target(self, block: Block) -> int:
+        """Target a block was held to; the starting one for legacy blocks, which record none"""
+        if block.version == BLOCK_VERSION_LEGACY:
+            return self.target
+        return block.target
+    
+    def _window_blocks(self, end: int) -> Iterable[Block]:
+        """The blocks below end that the retarget window covers, oldest first"""
+        for i in range(max(0, end - self.retarget.window - 1), end):
+            yield self.chain[i]
+    
+    def _rebuild_retarget(self):
+        """Refill the retarget window from the targets recorded in the chain"""
+        self.retarget.rebuild((block.timestamp, self._window_target(block))
+                              for block in self._window_blocks(len(self.chain)))
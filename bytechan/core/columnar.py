@@ -0,0 +1,316 @@
+"""
+Columnar form of committed blocks for analytics and bulk scans
+
+Transactions are stored as parallel columns instead of objects: amounts
+and timestamps as float64 arrays, senders, recipients and privacy levels
+as integer IDs into an interned string table, and tx_ids, block
+hashes and targets as fixed-width 32-byte records. Rarely set fields (ring
+signatures, stealth data, key images, inputs, proofs) are kept sparsely
+by row.
+
+Confidential rows keep their amount, as decoded blocks do, so balances
+and address totals agree with Blockchain.get_balance. Queries that list
+individual transfers skip them.
+
+Aggregates run over NumPy views of the columns when NumPy is installed
+and fall back to pure Python over the same arrays otherwise.
+"""
+
+import heapq
+from array import array
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, aggregates fall back to pure Python
+    np = None
+
+from bytechan.core.block import Block
+
+
+# Per-row flags
+ROW_CONFIDENTIAL = 0x01
+ROW_INT_AMOUNT = 0x02
+ROW_INT_TIMESTAMP = 0x04
+
+# Optional transaction fields kept sparsely, outside the columns
+SPARSE_FIELDS = ("ring_signature", "stealth_address", "tx_public_key", "view_tag",
+                 "key_image", "inputs", "ring_proof", "range_proof")
+
+HASH_SIZE = 32
+
+
+class StringTable:
+    """Interns strings as dense integer IDs"""
+    
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.strings: List[str] = []
+    
+    def __len__(self) -> int:
+        return len(self.strings)
+    
+    def __getitem__(self, string_id: int) -> str:
+        return self.strings[string_id]
+    
+    def intern(self, string: str) -> int:
+        string_id = self.ids.get(string)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.ids[string] = string_id
+            self.strings.append(string)
+        return string_id
+    
+    def lookup(self, string: str) -> Optional[int]:
+        """ID of a string, or None if it was never interned"""
+        return self.ids.get(string)
+
+
+@dataclass
+class Transfer:
+    """One row of the columns, as returned by queries"""
+    tx_id: str
+    height: int
+    sender: str
+    recipient: str
+    amount: float
+    timestamp: float
+
+
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+class ColumnarChain:
+    """
+    Committed blocks stored column by column.
+    
+    Rows are transactions in chain order; block_starts holds the first
+    row of each block, so a block is a slice of every column. Blocks are
+    appended with append_block and rebuilt with block(height), and the
+    chain can be cut back with truncate for reorgs.
+    """
+    
+    def __init__(self):
+        self.strings = StringTable()
+        # Transaction columns
+        self.heights = array("I")
+        self.senders = array("I")
+        self.recipients = array("I")
+        self.privacy_levels = array("I")
+        self.amounts = array("d")
+        self.timestamps = array("d")
+        self.flags = array("B")
+        self.tx_ids = bytearray()
+        self.sparse: Dict[int, dict] = {}
+        # Block columns
+        self.block_starts = array("Q")
+        self.block_timestamps = array("d")
+        self.block_flags = array("B")
+        self.block_nonces = array("Q")
+        self.block_versions = array("I")
+        self.block_hashes = bytearray()
+        self.block_targets = bytearray()
+        self.previous_hashes = bytearray()
+    
+    def __len__(self) -> int:
+        return len(self.amounts)
+    
+    @property
+    def height(self) -> int:
+        """Number of blocks stored"""
+        return len(self.block_starts)
+    
+    @classmethod
+    def from_blocks(cls, blocks: Iterable[Block]) -> 'ColumnarChain':
+        columns = cls()
+        for block in blocks:
+            columns.append_block(block)
+        return columns
+    
+    def append_block(self, block: Block):
+        """Add the next block's transactions as rows"""
+        if block.index != self.height:
+            raise ValueError(f"Expected block {self.height}, got {block.index}")
+        
+        self.block_starts.append(len(self.amounts))
+        self.block_timestamps.append(block.timestamp)
+        self.block_flags.append(ROW_INT_TIMESTAMP if _is_int(block.timestamp) else 0)
+        self.block_nonces.append(block.nonce)
+        self.block_versions.append(block.version)
+        self.block_hashes += bytes.fromhex(block.hash)
+        self.block_targets += block.target.to_bytes(HASH_SIZE, "big")
+        self.previous_hashes += bytes.fromhex(block.previous_hash)
+        
+        intern = self.strings.intern
+        for tx in block.transactions:
+            flags = ROW_CONFIDENTIAL if tx.is_confidential else 0
+            amount = tx.amount
+            if _is_int(amount):
+                flags |= ROW_INT_AMOUNT
+            if _is_int(tx.timestamp):
+                flags |= ROW_INT_TIMESTAMP
+            
+            row = len(self.amounts)
+            self.heights.append(block.index)
+            self.senders.append(intern(tx.sender))
+            self.recipients.append(intern(tx.recipient))
+            self.privacy_levels.append(intern(tx.privacy_level))
+            self.amounts.append(amount)
+            self.timestamps.append(tx.timestamp)
+            self.flags.append(flags)
+            self.tx_ids += bytes.fromhex(tx.tx_id)
+            
+            extra = {name: getattr(tx, name) for name in SPARSE_FIELDS
+                     if getattr(tx, name) is not None}
+            if extra:
+                self.sparse[row] = extra
+    
+    def _block_rows(self, height: int) -> range:
+        start = self.block_starts[height]
+        end = self.block_starts[height + 1] if height + 1 < self.height else len(self.amounts)
+        return range(start, end)
+    
+    def _row_dict(self, row: int) -> dict:
+        """
+        Dictionary form of a row, as Transaction.to_dict produces, with
+        the amount of a confidential row under "confidential_amount" as
+        the binary codec decodes it
+        """
+        flags = self.flags[row]
+        amount = self.amounts[row]
+        if flags & ROW_INT_AMOUNT:
+            amount = int(amount)
+        timestamp = self.timestamps[row]
+        if flags & ROW_INT_TIMESTAMP:
+            timestamp = int(timestamp)
+        
+        extra = self.sparse.get(row, {})
+        data = {
+            "tx_id": self.tx_ids[row * HASH_SIZE:(row + 1) * HASH_SIZE].hex(),
+            "sender": self.strings[self.senders[row]],
+            "recipient": self.strings[self.recipients[row]],
+            "amount": "CONFIDENTIAL" if flags & ROW_CONFIDENTIAL else amount,
+            "timestamp": timestamp,
+            "privacy_level": self.strings[self.privacy_levels[row]],
+            "ring_signature": extra.get("ring_signature"),
+            "stealth_address": extra.get("stealth_address")
+        }
+        for name in SPARSE_FIELDS[2:]:
+            if name in extra:
+                data[name] = extra[name]
+        if flags & ROW_CONFIDENTIAL:
+            data["confidential_amount"] = amount
+        return data
+    
+    def block(self, height: int) -> Block:
+        """Rebuild the block at a height as objects"""
+        if not 0 <= height < self.height:
+            raise IndexError("Block height out of range")
+        timestamp = self.block_timestamps[height]
+        if self.block_flags[height] & ROW_INT_TIMESTAMP:
+            timestamp = int(timestamp)
+        return Block.from_dict({
+            "index": height,
+            "timestamp": timestamp,
+            "transactions": [self._row_dict(row) for row in self._block_rows(height)],
+            "previous_hash": self.previous_hashes[height * HASH_SIZE:(height + 1) * HASH_SIZE].hex(),
+            "nonce": self.block_nonces[height],
+            "hash": self.block_hashes[height * HASH_SIZE:(height + 1) * HASH_SIZE].hex(),
+            "version": self.block_versions[height],
+            "target": self.block_targets[height * HASH_SIZE:(height + 1) * HASH_SIZE].hex()
+        })
+    
+    def truncate(self, height: int):
+        """Drop every block at or above height"""
+        if height >= self.height:
+            return
+        start = self.block_starts[height]
+        for column in (self.heights, self.senders, self.recipients, self.privacy_levels,
+                       self.amounts, self.timestamps, self.flags):
+            del column[start:]
+        del self.tx_ids[start * HASH_SIZE:]
+        self.sparse = {row: extra for row, extra in self.sparse.items() if row < start}
+        for column in (self.block_starts, self.block_timestamps, self.block_flags,
+                       self.block_nonces, self.block_versions):
+            del column[height:]
+        del self.block_hashes[height * HASH_SIZE:]
+        del self.block_targets[height * HASH_SIZE:]
+        del self.previous_hashes[height * HASH_SIZE:]
+    
+    def _transfer(self, row: int) -> Transfer:
+        return Transfer(
+            tx_id=self.tx_ids[row * HASH_SIZE:(row + 1) * HASH_SIZE].hex(),
+            height=self.heights[row],
+            sender=self.strings[self.senders[row]],
+            recipient=self.strings[self.recipients[row]],
+            amount=self.amounts[row],
+            timestamp=self.timestamps[row]
+        )
+    
+    # Aggregates
+    
+    def address_totals(self) -> Dict[str, float]:
+        """Net amount received minus sent for every address"""
+        count = len(self.strings)
+        if np is not None:
+            amounts = np.frombuffer(self.amounts, dtype=np.float64)
+            received = np.bincount(np.frombuffer(self.recipients, dtype=np.uint32),
+                                   weights=amounts, minlength=count)
+            sent = np.bincount(np.frombuffer(self.senders, dtype=np.uint32),
+                               weights=amounts, minlength=count)
+            totals = (received - sent).tolist()
+        else:
+            totals = [0.0] * count
+            for sender, recipient, amount in zip(self.senders, self.recipients, self.amounts):
+                totals[sender] -= amount
+                totals[recipient] += amount
+        return dict(zip(self.strings.strings, totals))
+    
+    def balance(self, address: str) -> float:
+        """Net amount received minus sent by one address"""
+        address_id = self.strings.lookup(address)
+        if address_id is None:
+            return 0.0
+        if np is not None:
+            amounts = np.frombuffer(self.amounts, dtype=np.float64)
+            received = amounts[np.frombuffer(self.recipients, dtype=np.uint32) == address_id].sum()
+            sent = amounts[np.frombuffer(self.senders, dtype=np.uint32) == address_id].sum()
+            return float(received - sent)
+        received = sum(amount for recipient, amount in zip(self.recipients, self.amounts)
+                       if recipient == address_id)
+        sent = sum(amount for sender, amount in zip(self.senders, self.amounts)
+                   if sender == address_id)
+        return received - sent
+    
+    def count_in_window(self, start: float, end: float) -> int:
+        """Number of transactions with start <= timestamp < end"""
+        if np is not None:
+            timestamps = np.frombuffer(self.timestamps, dtype=np.float64)
+            return int(np.count_nonzero((timestamps >= start) & (timestamps < end)))
+        return sum(1 for timestamp in self.timestamps if start <= timestamp < end)
+    
+    def largest_transfers(self, count: int = 10) -> List[Transfer]:
+        """
+        The count largest visible transfers, largest first and earliest
+        first among equal amounts; confidential rows are left out
+        """
+        if np is not None:
+            amounts = np.frombuffer(self.amounts, dtype=np.float64)
+            flags = np.frombuffer(self.flags, dtype=np.uint8)
+            visible = np.flatnonzero((flags & ROW_CONFIDENTIAL) == 0)
+            count = min(count, len(visible))
+            if count <= 0:
+                return []
+            # Partition for the smallest amount kept, then take ties in row order like nlargest
+            values = amounts[visible]
+            threshold = np.partition(values, len(values) - count)[len(values) - count]
+            above = visible[values > threshold]
+            tied = visible[values == threshold][:count - len(above)]
+            candidates = np.concatenate((above, tied))
+            rows = candidates[np.lexsort((candidates, -amounts[candidates]))].tolist()
+        else:
+            visible = [row for row, flags in enumerate(self.flags) if not flags & ROW_CONFIDENTIAL]
+            rows = heapq.nlargest(count, visible, key=self.amounts.__getitem__)
+        return [self._transfer(row) for row in rows]
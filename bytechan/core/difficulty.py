@@ -0,0 +1,144 @@
+"""
+Target-based proof of work difficulty and LWMA retargeting
+
+A block hash meets a target when, read as a 256-bit integer, it is at
+most the target. The old difficulty d (d leading zero hex digits) is
+the target 16**(64 - d) - 1, so each old step was a 16x change in work;
+targets can move by any ratio instead.
+
+Because hashes are fixed-width lowercase hex, comparing the hash string
+with the target in the same form orders them like the integers, and
+miners compare strings without converting each attempt.
+"""
+
+from collections import deque
+from typing import Deque, Iterable, Optional, Tuple
+
+
+HASH_HEX_LENGTH = 64
+MAX_TARGET = 2 ** 256 - 1
+
+# Seconds between blocks the retarget aims for (2 minutes)
+TARGET_BLOCK_TIME = 120
+DEFAULT_WINDOW = 60
+
+# Solve times are clamped so a skewed timestamp cannot swing the target
+MAX_SOLVE_TIME_FACTOR = 6
+
+
+def difficulty_to_target(difficulty: int) -> int:
+    """Target equivalent to requiring difficulty leading zero hex digits"""
+    if not 0 <= difficulty <= HASH_HEX_LENGTH:
+        raise ValueError("Difficulty must be between 0 and 64")
+    return 16 ** (HASH_HEX_LENGTH - difficulty) - 1
+
+
+def target_to_difficulty(target: int) -> int:
+    """Leading zero hex digits every hash meeting target has"""
+    return HASH_HEX_LENGTH - len(format(target, "x"))
+
+
+def target_hex(target: int) -> str:
+    """Target in the fixed-width form hashes are compared against"""
+    return format(target, "064x")
+
+
+def hash_meets_target(block_hash: str, target: int) -> bool:
+    return int(block_hash, 16) <= target
+
+
+def target_to_work(target: int) -> int:
+    """Expected number of hashes to find one meeting target"""
+    return (MAX_TARGET + 1) // (target + 1)
+
+
+class LWMARetarget:
+    """
+    Linearly weighted moving average retarget.
+    
+    The next target is the average target of the last window blocks
+    scaled by their linearly weighted solve time, newest weighted most,
+    over the block time aimed for. Recent blocks dominate, so the target
+    follows hashrate changes within a few blocks without the
+    oscillation of a plain average.
+    
+    The sum of targets, the sum of solve times and the weighted sum are
+    kept as running totals: adding a block when the window is full
+    subtracts the oldest solve time and lowers every remaining weight
+    by one at once (weighted sum minus solve time sum), so each block
+    and each next_target call is O(1). Solve times are whole
+    milliseconds, so the totals are exact integers that never drift.
+    """
+    
+    def __init__(self, window: int = DEFAULT_WINDOW, block_time: float = TARGET_BLOCK_TIME):
+        if window < 1:
+            raise ValueError("Window must hold at least one block")
+        self.window = window
+        self.block_time = block_time
+        self._solve_times: Deque[int] = deque()
+        self._targets: Deque[int] = deque()
+        self._last_timestamp: Optional[float] = None
+        self._target_sum = 0
+        self._solve_time_sum = 0
+        self._weighted_sum = 0
+    
+    def __len__(self) -> int:
+        """Number of solve times in the window"""
+        return len(self._solve_times)
+    
+    def add_block(self, timestamp: float, target: int):
+        """Record a block's timestamp and the target it was mined at"""
+        if self._last_timestamp is None:
+            self._last_timestamp = timestamp
+            return
+        
+        limit = MAX_SOLVE_TIME_FACTOR * self.block_time
+        seconds = min(max(timestamp - self._last_timestamp, 1.0), limit)
+        solve_time = int(round(seconds * 1000))
+        self._last_timestamp = timestamp
+        
+        if len(self._solve_times) == self.window:
+            self._weighted_sum -= self._solve_time_sum
+            self._solve_time_sum -= self._solve_times.popleft()
+            self._target_sum -= self._targets.popleft()
+        
+        self._solve_times.append(solve_time)
+        self._targets.append(target)
+        self._solve_time_sum += solve_time
+        self._weighted_sum += len(self._solve_times) * solve_time
+        self._target_sum += target
+    
+    def next_target(self, default: int) -> int:
+        """Target for the next block, or default while the window is empty"""
+        count = len(self._solve_times)
+        if count == 0:
+            return default
+        
+        # Weighted solve time the window would have at exactly block_time
+        expected = int(round(self.block_time * 1000)) * count * (count + 1) // 2
+        # A burst of fast blocks can shrink the target at most tenfold
+        weighted = max(self._weighted_sum, expected // 10)
+        target = self._target_sum * weighted // (count * expected)
+        return min(max(target, 1), MAX_TARGET)
+    
+    def copy(self) -> 'LWMARetarget':
+        """Independent retarget with the same window"""
+        other = LWMARetarget(self.window, self.block_time)
+        other._solve_times = deque(self._solve_times)
+        other._targets = deque(self._targets)
+        other._last_timestamp = self._last_timestamp
+        other._target_sum = self._target_sum
+        other._solve_time_sum = self._solve_time_sum
+        other._weighted_sum = self._weighted_sum
+        return other
+    
+    def rebuild(self, blocks: Iterable[Tuple[float, int]]):
+        """Reset to the given (timestamp, target) pairs, oldest first"""
+        self._solve_times.clear()
+        self._targets.clear()
+        self._last_timestamp = None
+        self._target_sum = 0
+        self._solve_time_sum = 0
+        self._weighted_sum = 0
+        for timestamp, target in blocks:
+            self.add_block(timestamp, target)
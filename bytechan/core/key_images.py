@@ -0,0 +1,259 @@
+"""
+Spent key image index for double-spend detection
+"""
+
+import json
+import math
+import mmap
+import os
+from heapq import merge
+from typing import Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+
+KEY_IMAGE_SIZE = 32
+
+
+def _key_image_bytes(key_image: Union[str, bytes]) -> bytes:
+    return key_image if isinstance(key_image, bytes) else bytes.fromhex(key_image)
+
+
+class BloomFilter:
+    """
+    Bit array filter with no false negatives
+    Key images are already uniform hash outputs, so the bit positions are
+    taken from the image itself by double hashing instead of rehashing it
+    """
+    
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+    
+    def _positions(self, item: bytes) -> Iterator[int]:
+        first = int.from_bytes(item[:8], "little")
+        second = int.from_bytes(item[8:16], "little") | 1
+        for i in range(self.hashes):
+            yield (first + i * second) % self.size
+    
+    def add(self, item: bytes):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+    
+    def __contains__(self, item: bytes) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(item))
+
+
+class SortedKeyImageFile:
+    """
+    Key images stored as sorted fixed-width 32-byte records.
+    
+    Membership is a binary search over a memory map of the file, so a
+    set of millions of images costs about 32 bytes each on disk and
+    almost nothing in memory. The file is rewritten by merging in new
+    sorted records, which only happens when recent blocks are flushed.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "a+b")
+        self._mmap: Optional[mmap.mmap] = None
+        self._count = 0
+        self._remap()
+    
+    def _remap(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.seek(0, os.SEEK_END)
+        size = self._file.tell()
+        self._count = size // KEY_IMAGE_SIZE
+        if self._count:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def _record(self, index: int) -> bytes:
+        start = index * KEY_IMAGE_SIZE
+        return self._mmap[start:start + KEY_IMAGE_SIZE]
+    
+    def __contains__(self, key_image: bytes) -> bool:
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            record = self._record(middle)
+            if record == key_image:
+                return True
+            if record < key_image:
+                low = middle + 1
+            else:
+                high = middle
+        return False
+    
+    def __iter__(self) -> Iterator[bytes]:
+        for index in range(self._count):
+            yield self._record(index)
+    
+    def merge(self, added: Iterable[bytes] = (), removed: Set[bytes] = frozenset()):
+        """Rewrite the file with records added and removed, keeping it sorted"""
+        temporary = self.path + ".tmp"
+        with open(temporary, "wb") as out:
+            for record in merge(iter(self), sorted(added)):
+                if record not in removed:
+                    out.write(record)
+        self.close()
+        os.replace(temporary, self.path)
+        self._file = open(self.path, "a+b")
+        self._remap()
+    
+    def clear(self):
+        """Remove every record"""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.truncate(0)
+        self._file.flush()
+        self._remap()
+    
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+
+class KeyImageSet:
+    """
+    Every key image spent on the chain.
+    
+    Images from recent blocks live in a hash set, with a per-block undo
+    list so reorgs can take them back out. With a directory, blocks
+    deeper than flush_depth are merged, a batch at a time, into a sorted
+    on-disk file that sits behind a bloom filter: a lookup is a set
+    probe, then a bloom probe, and only a possible hit pays for the
+    binary search.
+    """
+    
+    DATA_FILE = "key_images.dat"
+    META_FILE = "key_images.json"
+    
+    def __init__(self, directory: Optional[str] = None, flush_depth: int = 100,
+                 bloom_capacity: int = 1_000_000):
+        self.directory = directory
+        self.flush_depth = flush_depth
+        self.bloom_capacity = bloom_capacity
+        self._recent: Set[bytes] = set()
+        self._blocks: List[Tuple[int, List[bytes]]] = []
+        self._flushed_height = 0
+        self._file: Optional[SortedKeyImageFile] = None
+        self._bloom: Optional[BloomFilter] = None
+        
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self._file = SortedKeyImageFile(os.path.join(directory, self.DATA_FILE))
+            meta = os.path.join(directory, self.META_FILE)
+            if os.path.exists(meta):
+                with open(meta) as f:
+                    self._flushed_height = json.load(f)["height"]
+            self._rebuild_bloom()
+    
+    @property
+    def height(self) -> int:
+        """Number of blocks applied to the set"""
+        return self._flushed_height + len(self._blocks)
+    
+    def __len__(self) -> int:
+        return len(self._recent) + (len(self._file) if self._file is not None else 0)
+    
+    def __contains__(self, key_image: Union[str, bytes]) -> bool:
+        image = _key_image_bytes(key_image)
+        if image in self._recent:
+            return True
+        if self._file is None or image not in self._bloom:
+            return False
+        return image in self._file
+    
+    @staticmethod
+    def block_key_images(block) -> List[bytes]:
+        return [bytes.fromhex(tx.key_image) for tx in block.transactions if tx.key_image is not None]
+    
+    def apply_block(self, block):
+        """Record the key images spent by a newly appended block"""
+        images = self.block_key_images(block)
+        self._recent.update(images)
+        self._blocks.append((block.index, images))
+        # Flushing in batches of flush_depth blocks amortizes the file rewrite
+        if self._file is not None and len(self._blocks) >= 2 * self.flush_depth:
+            self._flush(self.flush_depth)
+    
+    def revert_block(self, block):
+        """Take back the key images of the most recently applied block"""
+        if self._blocks:
+            _, images = self._blocks.pop()
+            self._recent.difference_update(images)
+            return
+        
+        # The block was already flushed to disk: rewrite without its images
+        if self._flushed_height == 0:
+            raise ValueError("No blocks to revert")
+        images = set(self.block_key_images(block))
+        if images:
+            self._file.merge(removed=images)
+            self._rebuild_bloom()
+        self._flushed_height -= 1
+        self._save_meta()
+    
+    def _flush(self, count: int):
+        """Move the oldest recent blocks into the sorted file"""
+        flushed, self._blocks = self._blocks[:count], self._blocks[count:]
+        images = [image for _, block_images in flushed for image in block_images]
+        if images:
+            self._file.merge(added=images)
+            for image in images:
+                self._recent.discard(image)
+                self._bloom.add(image)
+        self._flushed_height += count
+        self._save_meta()
+    
+    def _save_meta(self):
+        path = os.path.join(self.directory, self.META_FILE)
+        with open(path + ".tmp", "w") as f:
+            json.dump({"height": self._flushed_height}, f)
+        os.replace(path + ".tmp", path)
+    
+    def _rebuild_bloom(self):
+        self._bloom = BloomFilter(max(self.bloom_capacity, 2 * len(self._file)))
+        for image in self._file:
+            self._bloom.add(image)
+    
+    def catch_up(self, blocks):
+        """
+        Bring the set in line with a chain on startup
+        Blocks already flushed to disk are skipped; if the file is ahead
+        of the chain (e.g. after a crash mid-truncate) it is rebuilt
+        """
+        if self._flushed_height > len(blocks):
+            self.rebuild(blocks)
+            return
+        self._recent = set()
+        self._blocks = []
+        for height in range(self._flushed_height, len(blocks)):
+            self.apply_block(blocks[height])
+    
+    def rebuild(self, blocks: Iterable):
+        """Reset the set and replay the given blocks"""
+        self._recent = set()
+        self._blocks = []
+        self._flushed_height = 0
+        if self._file is not None:
+            self._file.clear()
+            self._rebuild_bloom()
+            self._save_meta()
+        for block in blocks:
+            self.apply_block(block)
+    
+    def close(self):
+        if self._file is not None:
+            self._file.close()
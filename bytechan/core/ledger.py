@@ -0,0 +1,79 @@
+"""
+Incrementally maintained balance index for ByteChan
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+
+class BalanceIndex:
+    """
+    Per-address balance ledger kept in step with the chain.
+    
+    Blocks are applied as they are appended and reverted on rollback, so
+    lookups are O(1) instead of a scan over every block. Each applied block
+    records the previous balances of the addresses it touched, which lets a
+    revert restore the exact same floats a full scan would produce.
+    Only the last undo_depth blocks keep that record; a deeper rollback
+    needs a rebuild.
+    """
+    
+    def __init__(self, undo_depth: int = 1000):
+        self.undo_depth = undo_depth
+        self.balances: Dict[str, float] = {}
+        self._undo: List[Dict[str, Optional[float]]] = []
+        self._base_height = 0
+    
+    @property
+    def height(self) -> int:
+        """Number of blocks applied to the index"""
+        return self._base_height + len(self._undo)
+    
+    def apply_block(self, block):
+        """Apply the balance changes of a newly appended block"""
+        previous: Dict[str, Optional[float]] = {}
+        
+        for tx in block.transactions:
+            for address in (tx.sender, tx.recipient):
+                if address not in previous:
+                    previous[address] = self.balances.get(address)
+            
+            # Same order of operations as the chain scan it replaces
+            self.balances[tx.sender] = self.balances.get(tx.sender, 0.0) - tx.amount
+            self.balances[tx.recipient] = self.balances.get(tx.recipient, 0.0) + tx.amount
+        
+        self._undo.append(previous)
+        if len(self._undo) > self.undo_depth:
+            del self._undo[0]
+            self._base_height += 1
+    
+    def revert_block(self, block):
+        """
+        Undo the most recently applied block
+        Raises ValueError once the block is older than the kept undo data
+        """
+        if not self._undo:
+            raise ValueError("No undo data for this block")
+        
+        previous = self._undo.pop()
+        for address, balance in previous.items():
+            if balance is None:
+                self.balances.pop(address, None)
+            else:
+                self.balances[address] = balance
+    
+    def get_balance(self, address: str) -> float:
+        """Get the balance of a single address"""
+        return self.balances.get(address, 0.0)
+    
+    def get_balances(self, addresses: Iterable[str]) -> Dict[str, float]:
+        """Get the balances of many addresses in one call"""
+        balances = self.balances
+        return {address: balances.get(address, 0.0) for address in addresses}
+    
+    def rebuild(self, blocks: Iterable):
+        """Reset the index and replay the given blocks"""
+        self.balances = {}
+        self._undo = []
+        self._base_height = 0
+        for block in blocks:
+            self.apply_block(block)
@@ -0,0 +1,211 @@
+"""
+Memory pool of transactions waiting to be mined
+"""
+
+import heapq
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+from bytechan.core.transaction import Transaction
+
+
+@dataclass
+class MempoolEntry:
+    """A pooled transaction and the metadata used to rank it"""
+    transaction: Transaction
+    fee: float
+    size: int
+    added_at: float
+    sequence: int
+    
+    @property
+    def fee_rate(self) -> float:
+        """Fee per encoded byte"""
+        return self.fee / self.size
+
+
+class Mempool:
+    """
+    Pending transaction pool with deduplication and priority ordering.
+    
+    Entries are indexed by tx_id for O(1) duplicate checks and kept in
+    arrival order for expiry. Two heaps rank them by fee rate: the best
+    first for block assembly and the worst first for eviction when the
+    pool exceeds its count or byte limits. Heap entries are removed
+    lazily and skipped once their transaction has left the pool.
+    """
+    
+    def __init__(self, max_transactions: int = 5000, max_bytes: int = 5_000_000,
+                 max_age: float = 3 * 60 * 60):
+        self.max_transactions = max_transactions
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.total_bytes = 0
+        self._entries: "OrderedDict[str, MempoolEntry]" = OrderedDict()
+        self._key_images: Dict[str, str] = {}
+        self._spent_outputs: Dict[str, str] = {}
+        self._best: List[tuple] = []
+        self._worst: List[tuple] = []
+        self._sequence = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __contains__(self, tx_id: str) -> bool:
+        return tx_id in self._entries
+    
+    def spends_key_image(self, key_image: str) -> bool:
+        """True if a pooled transaction already spends this key image"""
+        return key_image in self._key_images
+    
+    def spends_output(self, tx_id: str) -> bool:
+        """True if a pooled transaction already spends the output of tx_id"""
+        return tx_id in self._spent_outputs
+    
+    def get(self, tx_id: str) -> Optional[Transaction]:
+        """Look up a pooled transaction by ID"""
+        entry = self._entries.get(tx_id)
+        return entry.transaction if entry else None
+    
+    def transactions(self) -> List[Transaction]:
+        """All pooled transactions in arrival order"""
+        return [entry.transaction for entry in self._entries.values()]
+    
+    def add(self, transaction: Transaction, fee: float = 0.0,
+            now: Optional[float] = None) -> bool:
+        """
+        Add a transaction to the pool
+        Returns False for duplicates, for a second spend of a pooled key
+        image or output, and for transactions that do not fit, either
+        alone or because everything else pays more
+        """
+        if transaction.tx_id in self._entries:
+            return False
+        
+        if transaction.key_image is not None and transaction.key_image in self._key_images:
+            return False
+        
+        if any(tx_id in self._spent_outputs for tx_id in transaction.inputs or ()):
+            return False
+        
+        now = time.time() if now is None else now
+        self.expire(now)
+        
+        size = len(transaction.to_bytes())
+        if size > self.max_bytes:
+            return False
+        
+        transaction.seal()
+        self._sequence += 1
+        entry = MempoolEntry(transaction, fee, size, now, self._sequence)
+        self._entries[transaction.tx_id] = entry
+        self.total_bytes += size
+        if transaction.key_image is not None:
+            self._key_images[transaction.key_image] = transaction.tx_id
+        for tx_id in transaction.inputs or ():
+            self._spent_outputs[tx_id] = transaction.tx_id
+        heapq.heappush(self._best, (-entry.fee_rate, entry.sequence, transaction.tx_id))
+        heapq.heappush(self._worst, (entry.fee_rate, -entry.sequence, transaction.tx_id))
+        
+        while len(self._entries) > self.max_transactions or self.total_bytes > self.max_bytes:
+            self._evict_worst()
+        
+        return transaction.tx_id in self._entries
+    
+    def remove(self, tx_id: str) -> Optional[Transaction]:
+        """Remove a transaction, e.g. once it has been mined"""
+        entry = self._entries.pop(tx_id, None)
+        if entry is None:
+            return None
+        
+        self.total_bytes -= entry.size
+        if entry.transaction.key_image is not None:
+            self._key_images.pop(entry.transaction.key_image, None)
+        for spent in entry.transaction.inputs or ():
+            self._spent_outputs.pop(spent, None)
+        self._maybe_compact()
+        return entry.transaction
+    
+    def remove_many(self, transactions: Iterable[Transaction]):
+        """Remove every listed transaction that is in the pool"""
+        for tx in transactions:
+            self.remove(tx.tx_id)
+    
+    def remove_conflicts(self, transactions: Iterable[Transaction]):
+        """Remove pooled transactions spending what the listed ones spend"""
+        for tx in transactions:
+            if tx.key_image is not None and tx.key_image in self._key_images:
+                self.remove(self._key_images[tx.key_image])
+            for spent in tx.inputs or ():
+                if spent in self._spent_outputs:
+                    self.remove(self._spent_outputs[spent])
+    
+    def expire(self, now: Optional[float] = None) -> int:
+        """Drop transactions older than max_age, returns how many"""
+        now = time.time() if now is None else now
+        cutoff = now - self.max_age
+        expired = 0
+        
+        # Arrival order means the oldest entries are always at the front
+        while self._entries:
+            tx_id, entry = next(iter(self._entries.items()))
+            if entry.added_at > cutoff:
+                break
+            self.remove(tx_id)
+            expired += 1
+        
+        return expired
+    
+    def select_for_block(self, max_txs: Optional[int] = None,
+                         max_bytes: Optional[int] = None) -> List[Transaction]:
+        """
+        Pick the highest fee-rate transactions that fit the limits
+        Transactions that would overflow max_bytes are skipped so that
+        smaller ones further down can still fill the block
+        """
+        selected: List[Transaction] = []
+        used_bytes = 0
+        candidates = list(self._best)
+        
+        while candidates:
+            if max_txs is not None and len(selected) >= max_txs:
+                break
+            
+            _, sequence, tx_id = heapq.heappop(candidates)
+            entry = self._entries.get(tx_id)
+            if entry is None or entry.sequence != sequence:
+                continue
+            
+            if max_bytes is not None and used_bytes + entry.size > max_bytes:
+                continue
+            
+            selected.append(entry.transaction)
+            used_bytes += entry.size
+        
+        return selected
+    
+    def _evict_worst(self):
+        """Remove the lowest fee-rate transaction"""
+        while self._worst:
+            _, negative_sequence, tx_id = heapq.heappop(self._worst)
+            entry = self._entries.get(tx_id)
+            if entry is not None and entry.sequence == -negative_sequence:
+                self.remove(tx_id)
+                return
+    
+    def _maybe_compact(self):
+        """Rebuild the heaps once stale entries dominate them"""
+        if len(self._best) <= 2 * len(self._entries) + 64:
+            return
+        
+        self._best = [
+            (-entry.fee_rate, entry.sequence, tx_id)
+            for tx_id, entry in self._entries.items()
+        ]
+        self._worst = [
+            (entry.fee_rate, -entry.sequence, tx_id)
+            for tx_id, entry in self._entries.items()
+        ]
+        heapq.heapify(self._best)
+        heapq.heapify(self._worst)
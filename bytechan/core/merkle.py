@@ -0,0 +1,155 @@
+"""
+Merkle commitments over block transactions
+"""
+
+import hashlib
+from dataclasses import dataclass, field
+from typing import Iterable, List, Tuple
+
+
+# Root committed by a block without transactions
+EMPTY_ROOT = bytes(32)
+
+# Domain separation between leaves and interior nodes
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+
+def hash_leaf(data: bytes) -> bytes:
+    """Hash a transaction digest into a leaf node"""
+    return hashlib.sha256(LEAF_PREFIX + data).digest()
+
+
+def hash_node(left: bytes, right: bytes) -> bytes:
+    """Hash two child nodes into their parent"""
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def merkle_root(leaves: List[bytes]) -> bytes:
+    """
+    Compute the root over a list of transaction digests
+    An unpaired node at the end of a level is carried up unchanged
+    """
+    return MerkleTree(leaves).root
+
+
+@dataclass
+class MerkleProof:
+    """
+    Inclusion proof for one leaf
+    Each step is a sibling hash and whether it sits on the left
+    """
+    index: int
+    leaf: bytes
+    steps: List[Tuple[bytes, bool]] = field(default_factory=list)
+    
+    def to_dict(self) -> dict:
+        """Convert proof to dictionary"""
+        return {
+            "index": self.index,
+            "leaf": self.leaf.hex(),
+            "siblings": [sibling.hex() for sibling, _ in self.steps],
+            "left": [is_left for _, is_left in self.steps]
+        }
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'MerkleProof':
+        """Rebuild a proof from its dictionary form"""
+        steps = [
+            (bytes.fromhex(sibling), bool(is_left))
+            for sibling, is_left in zip(data["siblings"], data["left"])
+        ]
+        return cls(index=data["index"], leaf=bytes.fromhex(data["leaf"]), steps=steps)
+    
+    def compute_root(self) -> bytes:
+        """Fold the proof back up to the root it implies"""
+        node = hash_leaf(self.leaf)
+        for sibling, is_left in self.steps:
+            node = hash_node(sibling, node) if is_left else hash_node(node, sibling)
+        return node
+    
+    def verify(self, root: bytes) -> bool:
+        """Check that the proof leads to the given root"""
+        return self.compute_root() == root
+
+
+class MerkleTree:
+    """
+    Merkle tree that keeps every level in memory.
+    
+    Interior nodes are cached, so the root is free once built and an
+    appended leaf only rehashes the path from its position to the top,
+    which keeps a block that is being assembled cheap to recommit.
+    """
+    
+    def __init__(self, leaves: Iterable[bytes] = ()):
+        self._leaves: List[bytes] = list(leaves)
+        self.levels: List[List[bytes]] = [[hash_leaf(leaf) for leaf in self._leaves]]
+        self._build()
+    
+    def _build(self):
+        """Compute all interior levels from the leaf level"""
+        level = self.levels[0]
+        self.levels = [level]
+        while len(level) > 1:
+            parents = [hash_node(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+            if len(level) % 2:
+                parents.append(level[-1])
+            self.levels.append(parents)
+            level = parents
+    
+    def __len__(self) -> int:
+        return len(self.levels[0])
+    
+    @property
+    def root(self) -> bytes:
+        """Current root, EMPTY_ROOT for an empty tree"""
+        if not self.levels[0]:
+            return EMPTY_ROOT
+        return self.levels[-1][0]
+    
+    def append(self, leaf: bytes):
+        """Add a leaf and update only the nodes on its path to the root"""
+        self._leaves.append(leaf)
+        self.levels[0].append(hash_leaf(leaf))
+        
+        depth = 0
+        position = len(self.levels[0]) - 1
+        while len(self.levels[depth]) > 1:
+            level = self.levels[depth]
+            if position % 2:
+                parent = hash_node(level[position - 1], level[position])
+            else:
+                parent = level[position]
+            
+            if depth + 1 == len(self.levels):
+                self.levels.append([])
+            parents = self.levels[depth + 1]
+            position //= 2
+            if position < len(parents):
+                parents[position] = parent
+            else:
+                parents.append(parent)
+            depth += 1
+    
+    def proof(self, index: int) -> MerkleProof:
+        """Build the inclusion proof for the leaf at index"""
+        if not 0 <= index < len(self):
+            raise IndexError("Leaf index out of range")
+        
+        steps = []
+        position = index
+        for level in self.levels[:-1]:
+            if position % 2:
+                steps.append((level[position - 1], True))
+            elif position + 1 < len(level):
+                steps.append((level[position + 1], False))
+            # A node without a sibling is carried up and adds no step
+            position //= 2
+        
+        return MerkleProof(index=index, leaf=self._leaves[index], steps=steps)
+    
+    @staticmethod
+    def verify_proof(proof: MerkleProof, root: bytes) -> bool:
+        """Verify an inclusion proof against a root"""
+        return proof.verify(root)
@@ -0,0 +1,151 @@
+"""
+Multi-process Proof of Work mining engine
+"""
+
+import hashlib
+import json
+import multiprocessing
+import queue
+import time
+from typing import Optional
+from dataclasses import dataclass
+from bytechan.core.difficulty import difficulty_to_target, target_hex
+
+
+# Attempts between checks of the shared stop flag
+CHECK_INTERVAL = 2048
+
+@dataclass
+class MiningResult:
+    """Outcome of a nonce search"""
+    nonce: int
+    hash: str
+    attempts: int
+    elapsed: float
+    workers: int
+    
+    @property
+    def hashrate(self) -> float:
+        """Aggregate hashes per second across all workers"""
+        if self.elapsed <= 0:
+            return float(self.attempts)
+        return self.attempts / self.elapsed
+
+
+def _search_nonces(template, target: str, start_nonce: int, step: int,
+                   stop_event, result_queue, attempts):
+    """
+    Worker loop: try start_nonce, start_nonce + step, ... until a hash
+    meets the target or another worker signals that it found one
+    
+    template is a header prefix (bytes) for header blocks or the JSON
+    payload (dict) for legacy blocks, see Block.mining_template. target
+    is in the fixed-width hex form of difficulty.target_hex
+    """
+    nonce = start_nonce
+    count = 0
+    
+    if isinstance(template, dict):
+        def hash_nonce(nonce: int) -> str:
+            template["nonce"] = nonce
+            return hashlib.sha256(
+                json.dumps(template, sort_keys=True).encode()
+            ).hexdigest()
+    else:
+        from bytechan.core.block import NONCE
+        
+        prefix_state = hashlib.sha256(template)
+        
+        def hash_nonce(nonce: int) -> str:
+            state = prefix_state.copy()
+            state.update(NONCE.pack(nonce))
+            return state.hexdigest()
+    
+    while True:
+        block_hash = hash_nonce(nonce)
+        count += 1
+        
+        if block_hash <= target:
+            result_queue.put((nonce, block_hash))
+            stop_event.set()
+            break
+        
+        if count % CHECK_INTERVAL == 0:
+            attempts.value = count
+            if stop_event.is_set():
+                break
+        
+        nonce += step
+    
+    attempts.value = count
+
+
+class ParallelMiner:
+    """
+    Splits the nonce space of a block across a pool of processes.
+    
+    Worker i tries nonces start + i, start + i + workers, ... so the
+    ranges never overlap. Workers poll a shared event and stop as soon
+    as any of them has found a valid hash.
+    """
+    
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or multiprocessing.cpu_count()
+    
+    def mine(self, block, difficulty: Optional[int] = None,
+             target: Optional[int] = None) -> MiningResult:
+        """Search for a nonce whose hash meets target (or the target of difficulty)"""
+        if target is None:
+            target = difficulty_to_target(difficulty)
+        template = block.mining_template()
+        start_nonce = block.nonce
+        start_time = time.time()
+        
+        stop_event = multiprocessing.Event()
+        result_queue = multiprocessing.Queue()
+        counters = [multiprocessing.Value("Q", 0) for _ in range(self.workers)]
+        processes = [
+            multiprocessing.Process(
+                target=_search_nonces,
+                args=(template, target_hex(target), start_nonce + i, self.workers,
+                      stop_event, result_queue, counters[i]),
+                daemon=True
+            )
+            for i in range(self.workers)
+        ]
+        
+        for process in processes:
+            process.start()
+        
+        try:
+            nonce, block_hash = self._wait_for_result(result_queue, processes)
+        finally:
+            stop_event.set()
+            for process in processes:
+                process.join()
+        
+        elapsed = time.time() - start_time
+        attempts = sum(counter.value for counter in counters)
+        return MiningResult(
+            nonce=nonce,
+            hash=block_hash,
+            attempts=attempts,
+            elapsed=elapsed,
+            workers=self.workers
+        )
+    
+    @staticmethod
+    def _wait_for_result(result_queue, processes):
+        """Block until a worker reports a solution"""
+        while True:
+            try:
+                return result_queue.get(timeout=0.5)
+            except queue.Empty:
+                if not any(process.is_alive() for process in processes):
+                    break
+        
+        # Workers flush their queue on exit, so one last read settles the race
+        try:
+            return result_queue.get(timeout=0.5)
+        except queue.Empty:
+            raise RuntimeError("All mining workers exited without a solution")
@@ -0,0 +1,153 @@
+"""
+Global output index and decoy selection for ring signatures
+"""
+
+import math
+import secrets
+from array import array
+from bisect import bisect_right
+from typing import Iterable, List, Set, Tuple
+
+
+# Ring members reference outputs by their global number
+OUTPUT_MEMBER_PREFIX = "output_"
+
+# Spend-age distribution measured on real privacy chains: the log of an
+# output's age in seconds is gamma distributed with this shape and rate
+DECOY_GAMMA_SHAPE = 19.28
+DECOY_GAMMA_RATE = 1.61
+
+# Rejected draws per decoy before sampling turns uniform
+MAX_DECOY_REJECTIONS = 20
+
+
+def output_member(number: int) -> str:
+    """Ring member string for a global output number"""
+    return f"{OUTPUT_MEMBER_PREFIX}{number}"
+
+
+def parse_output_member(member: str) -> int:
+    """Global output number of a ring member string"""
+    if not member.startswith(OUTPUT_MEMBER_PREFIX):
+        raise ValueError(f"Not an output reference: {member}")
+    return int(member[len(OUTPUT_MEMBER_PREFIX):])
+
+
+class OutputIndex:
+    """
+    Every output on the chain, numbered in chain order.
+    
+    Each transaction creates one output, so output numbers map to a
+    (height, position) pair. The index is a handful of flat arrays: the
+    position of each output, and per block the number of its first output
+    and its timestamp. That is 4 bytes per output and 16 per block, and a
+    lookup or a rollback is a bisect or a truncation.
+    
+    Decoys are sampled by age the way real spends are distributed: an
+    age is drawn from the gamma distribution over log seconds, mapped to
+    the block mined at that time, and an output is picked uniformly
+    within that block. Ages older than the chain, or landing on a block
+    without outputs, fall back to a uniform pick over every eligible
+    output, which is what young chains mostly get.
+    """
+    
+    def __init__(self):
+        self._positions = array("I")
+        self._block_starts = array("Q")
+        self._block_times = array("d")
+    
+    def __len__(self) -> int:
+        return len(self._positions)
+    
+    @property
+    def height(self) -> int:
+        """Number of blocks applied to the index"""
+        return len(self._block_starts)
+    
+    def apply_block(self, block):
+        """Number the outputs of a newly appended block"""
+        self._block_starts.append(len(self._positions))
+        # Kept non-decreasing so the times can be bisected
+        previous = self._block_times[-1] if self._block_times else block.timestamp
+        self._block_times.append(max(previous, block.timestamp))
+        self._positions.extend(range(len(block.transactions)))
+    
+    def revert_block(self, block):
+        """Drop the outputs of the most recently applied block"""
+        if not self._block_starts:
+            raise ValueError("No blocks to revert")
+        start = self._block_starts.pop()
+        self._block_times.pop()
+        del self._positions[start:]
+    
+    def rebuild(self, blocks: Iterable):
+        """Reset the index and replay the given blocks"""
+        self._positions = array("I")
+        self._block_starts = array("Q")
+        self._block_times = array("d")
+        for block in blocks:
+            self.apply_block(block)
+    
+    def locate(self, number: int) -> Tuple[int, int]:
+        """Height and transaction position of a global output number"""
+        if not 0 <= number < len(self._positions):
+            raise IndexError(f"Output {number} does not exist")
+        return bisect_right(self._block_starts, number) - 1, self._positions[number]
+    
+    def number(self, height: int, position: int) -> int:
+        """Global output number of the transaction at (height, position)"""
+        return self._block_starts[height] + position
+    
+    def sample(self, count: int, exclude: Iterable[int] = (), min_age: int = 0,
+               rng=None) -> List[int]:
+        """
+        Draw count distinct decoy output numbers
+        Outputs from the newest min_age blocks and those in exclude
+        (usually the real input) are never picked
+        """
+        rng = secrets.SystemRandom() if rng is None else rng
+        eligible_height = self.height - min_age
+        if eligible_height <= 0:
+            raise ValueError("Not enough outputs to sample decoys from")
+        
+        end = len(self._positions) if eligible_height == self.height else self._block_starts[eligible_height]
+        excluded = {number for number in exclude if 0 <= number < end}
+        if end - len(excluded) < count:
+            raise ValueError("Not enough outputs to sample decoys from")
+        
+        newest = self._block_times[eligible_height - 1]
+        oldest = self._block_times[0]
+        chosen: Set[int] = set()
+        picked: List[int] = []
+        rejections = 0
+        while len(picked) < count:
+            # A few dense blocks can keep yielding repeats; uniform draws always progress
+            if rejections < MAX_DECOY_REJECTIONS * count:
+                number = self._draw(rng, end, eligible_height, newest, oldest)
+            else:
+                number = rng.randrange(end)
+            if number in excluded or number in chosen:
+                rejections += 1
+                continue
+            chosen.add(number)
+            picked.append(number)
+        return picked
+    
+    def _draw(self, rng, end: int, eligible_height: int, newest: float,
+              oldest: float) -> int:
+        """One age-weighted pick among the first end outputs"""
+        age = math.exp(rng.gammavariate(DECOY_GAMMA_SHAPE, 1 / DECOY_GAMMA_RATE))
+        if age > newest - oldest:
+            return rng.randrange(end)
+        
+        height = bisect_right(self._block_times, newest - age, 0, eligible_height) - 1
+        start = self._block_starts[height]
+        stop = self._block_starts[height + 1] if height + 1 < self.height else len(self._positions)
+        if start == stop:
+            return rng.randrange(end)
+        return rng.randrange(start, stop)
+    
+    def sample_members(self, count: int, exclude: Iterable[str] = (), **options) -> List[str]:
+        """Draw count decoys as ring member strings"""
+        numbers = [parse_output_member(member) for member in exclude]
+        return [output_member(number) for number in self.sample(count, numbers, **options)]
@@ -0,0 +1,370 @@
+"""
+Compact binary wire/storage format for transactions and blocks
+
+Layout (codec version 2, little endian):
+
+    transaction:
+        u8      codec version
+        u8      flags (see TX_FLAG_*)
+        32s     tx_id
+        number  timestamp
+        number  amount              (absent when confidential in version 1)
+        u8      privacy level code  (0xff: custom level string follows)
+        str     sender, recipient
+        str     ring_signature      (if TX_FLAG_RING_SIGNATURE)
+        str     stealth_address     (if TX_FLAG_STEALTH_ADDRESS)
+        str     tx_public_key       (if TX_FLAG_TX_PUBLIC_KEY)
+        u8      view_tag            (if TX_FLAG_VIEW_TAG)
+        32s     key_image           (if TX_FLAG_KEY_IMAGE)
+        varint  input count         (if TX_FLAG_INPUTS)
+                then 32s tx_id per input
+        str     proofs              (if TX_FLAG_PROOFS) JSON object holding
+                                    ring_proof and/or range_proof
+    
+    block:
+        u8      codec version
+        u32     block version
+        varint  index
+        number  timestamp
+        32s     previous_hash
+        u64     nonce
+        32s     hash
+        32s     target              (header blocks, version 2 only)
+        varint  transaction count
+        bytes   transactions (each varint length prefixed)
+
+The amount of a confidential transaction is kept so a node that decodes
+it (from the network or its own store) can still validate it and apply
+it to balances. The decoded dictionary carries it under
+"confidential_amount" for Transaction.from_dict; to_dict still shows
+"CONFIDENTIAL", but Transaction.digest, and so the merkle root and the
+block hash, commit to the amount so it cannot be changed in transit.
+Version 1 left the amount out. Version 2 also records the proof of work target of header blocks
+(block version 2 and up), big endian; version 1 blocks decode without
+one.
+
+number is a one byte tag (0: float64, 1: int64) followed by 8 bytes, so
+ints and floats survive a round trip and the JSON form (which the legacy
+block hash covers) is reproduced exactly. str/bytes are varint length
+prefixed. Hashes are stored as raw 32-byte digests.
+"""
+
+import json
+import struct
+from typing import Tuple
+
+
+CODEC_VERSION = 2
+SUPPORTED_CODEC_VERSIONS = (1, 2)
+
+TX_FLAG_CONFIDENTIAL = 0x01
+TX_FLAG_RING_SIGNATURE = 0x02
+TX_FLAG_STEALTH_ADDRESS = 0x04
+TX_FLAG_TX_PUBLIC_KEY = 0x08
+TX_FLAG_VIEW_TAG = 0x10
+TX_FLAG_KEY_IMAGE = 0x20
+TX_FLAG_INPUTS = 0x40
+TX_FLAG_PROOFS = 0x80
+
+PRIVACY_LEVEL_CODES = {"LOW": 0, "MEDIUM": 1, "HIGH": 2, "MAXIMUM": 3}
+PRIVACY_LEVEL_NAMES = {code: name for name, code in PRIVACY_LEVEL_CODES.items()}
+CUSTOM_PRIVACY_LEVEL = 0xFF
+
+NUMBER_FLOAT = 0
+NUMBER_INT = 1
+
+_U8 = struct.Struct("<B")
+_TX_HEAD = struct.Struct("<BB32s")
+_NUMBER = struct.Struct("<Bd")
+_NUMBER_INT = struct.Struct("<Bq")
+_BLOCK_HEAD = struct.Struct("<BI")
+_BLOCK_LINK = struct.Struct("<32sQ32s")
+
+# Only these may come from the proofs JSON, which must not override other fields
+_PROOF_FIELDS = {"ring_proof", "range_proof"}
+
+# block.BLOCK_VERSION_HEADER, from which blocks commit to a target
+_BLOCK_VERSION_HEADER = 2
+
+
+class CodecError(ValueError):
+    """Raised when bytes cannot be decoded"""
+
+
+def _pack_varint(value: int) -> bytes:
+    """Unsigned LEB128"""
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _unpack_varint(data, offset: int) -> Tuple[int, int]:
+    """Read an unsigned LEB128 value, returns (value, new offset)"""
+    byte = data[offset]
+    if byte < 0x80:
+        return byte, offset + 1
+    
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+
+def _pack_str(value: str) -> bytes:
+    raw = value.encode("utf-8")
+    return _pack_varint(len(raw)) + raw
+
+
+def _unpack_str(data, offset: int) -> Tuple[str, int]:
+    length = data[offset]
+    if length < 0x80:
+        offset += 1
+    else:
+        length, offset = _unpack_varint(data, offset)
+    end = offset + length
+    if end > len(data):
+        raise CodecError("Truncated string")
+    # str() decodes bytes and memoryviews alike without an extra copy
+    return str(data[offset:end], "utf-8"), end
+
+
+def _pack_number(value) -> bytes:
+    if isinstance(value, int) and not isinstance(value, bool):
+        return _NUMBER_INT.pack(NUMBER_INT, value)
+    return _NUMBER.pack(NUMBER_FLOAT, value)
+
+
+def _unpack_number(data, offset: int):
+    tag = data[offset]
+    if tag == NUMBER_INT:
+        value = _NUMBER_INT.unpack_from(data, offset)[1]
+    elif tag == NUMBER_FLOAT:
+        value = _NUMBER.unpack_from(data, offset)[1]
+    else:
+        raise CodecError(f"Unknown number tag {tag}")
+    return value, offset + _NUMBER.size
+
+
+def encode_transaction(tx) -> bytes:
+    """Encode a transaction into the binary format"""
+    flags = 0
+    if tx.is_confidential:
+        flags |= TX_FLAG_CONFIDENTIAL
+    if tx.ring_signature is not None:
+        flags |= TX_FLAG_RING_SIGNATURE
+    if tx.stealth_address is not None:
+        flags |= TX_FLAG_STEALTH_ADDRESS
+    if tx.tx_public_key is not None:
+        flags |= TX_FLAG_TX_PUBLIC_KEY
+    if tx.view_tag is not None:
+        flags |= TX_FLAG_VIEW_TAG
+    if tx.key_image is not None:
+        flags |= TX_FLAG_KEY_IMAGE
+    if tx.inputs is not None:
+        flags |= TX_FLAG_INPUTS
+    proofs = {}
+    if tx.ring_proof is not None:
+        proofs["ring_proof"] = tx.ring_proof
+    if tx.range_proof is not None:
+        proofs["range_proof"] = tx.range_proof
+    if proofs:
+        flags |= TX_FLAG_PROOFS
+    
+    parts = [
+        _TX_HEAD.pack(CODEC_VERSION, flags, bytes.fromhex(tx.tx_id)),
+        _pack_number(tx.timestamp)
+    ]
+    parts.append(_pack_number(tx.amount))
+    
+    level_code = PRIVACY_LEVEL_CODES.get(tx.privacy_level, CUSTOM_PRIVACY_LEVEL)
+    parts.append(_U8.pack(level_code))
+    if level_code == CUSTOM_PRIVACY_LEVEL:
+        parts.append(_pack_str(tx.privacy_level))
+    
+    parts.append(_pack_str(tx.sender))
+    parts.append(_pack_str(tx.recipient))
+    if tx.ring_signature is not None:
+        parts.append(_pack_str(tx.ring_signature))
+    if tx.stealth_address is not None:
+        parts.append(_pack_str(tx.stealth_address))
+    if tx.tx_public_key is not None:
+        parts.append(_pack_str(tx.tx_public_key))
+    if tx.view_tag is not None:
+        parts.append(_U8.pack(tx.view_tag))
+    if tx.key_image is not None:
+        parts.append(bytes.fromhex(tx.key_image))
+    if tx.inputs is not None:
+        parts.append(_pack_varint(len(tx.inputs)))
+        parts.extend(bytes.fromhex(tx_id) for tx_id in tx.inputs)
+    if proofs:
+        parts.append(_pack_str(json.dumps(proofs, sort_keys=True)))
+    
+    return b"".join(parts)
+
+
+def decode_transaction(data, offset: int = 0) -> Tuple[dict, int]:
+    """
+    Decode a transaction starting at offset
+    Returns its dictionary form (as Transaction.to_dict) and the new offset
+    """
+    try:
+        return _decode_transaction(data, offset)
+    except (struct.error, IndexError, KeyError, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise CodecError(f"Malformed transaction: {e}")
+
+
+def _decode_transaction(data, offset: int) -> Tuple[dict, int]:
+    version, flags, tx_id = _TX_HEAD.unpack_from(data, offset)
+    if version not in SUPPORTED_CODEC_VERSIONS:
+        raise CodecError(f"Unsupported transaction codec version {version}")
+    offset += _TX_HEAD.size
+    
+    timestamp, offset = _unpack_number(data, offset)
+    confidential_amount = None
+    if flags & TX_FLAG_CONFIDENTIAL:
+        amount = "CONFIDENTIAL"
+        if version > 1:
+            confidential_amount, offset = _unpack_number(data, offset)
+    else:
+        amount, offset = _unpack_number(data, offset)
+    
+    level_code = data[offset]
+    offset += 1
+    if level_code == CUSTOM_PRIVACY_LEVEL:
+        privacy_level, offset = _unpack_str(data, offset)
+    else:
+        privacy_level = PRIVACY_LEVEL_NAMES[level_code]
+    
+    sender, offset = _unpack_str(data, offset)
+    recipient, offset = _unpack_str(data, offset)
+    ring_signature = stealth_address = None
+    if flags & TX_FLAG_RING_SIGNATURE:
+        ring_signature, offset = _unpack_str(data, offset)
+    if flags & TX_FLAG_STEALTH_ADDRESS:
+        stealth_address, offset = _unpack_str(data, offset)
+    
+    tx = {
+        "tx_id": tx_id.hex(),
+        "sender": sender,
+        "recipient": recipient,
+        "amount": amount,
+        "timestamp": timestamp,
+        "privacy_level": privacy_level,
+        "ring_signature": ring_signature,
+        "stealth_address": stealth_address
+    }
+    if confidential_amount is not None:
+        tx["confidential_amount"] = confidential_amount
+    if flags & TX_FLAG_TX_PUBLIC_KEY:
+        tx["tx_public_key"], offset = _unpack_str(data, offset)
+    if flags & TX_FLAG_VIEW_TAG:
+        tx["view_tag"] = data[offset]
+        offset += 1
+    if flags & TX_FLAG_KEY_IMAGE:
+        if offset + 32 > len(data):
+            raise CodecError("Truncated key image")
+        tx["key_image"] = bytes(data[offset:offset + 32]).hex()
+        offset += 32
+    if flags & TX_FLAG_INPUTS:
+        count, offset = _unpack_varint(data, offset)
+        end = offset + 32 * count
+        if end > len(data):
+            raise CodecError("Truncated inputs")
+        tx["inputs"] = [bytes(data[i:i + 32]).hex() for i in range(offset, end, 32)]
+        offset = end
+    if flags & TX_FLAG_PROOFS:
+        proofs, offset = _unpack_str(data, offset)
+        proofs = json.loads(proofs)
+        if not isinstance(proofs, dict):
+            raise CodecError("Proofs must be a JSON object")
+        if not proofs.keys() <= _PROOF_FIELDS:
+            raise CodecError("Unknown fields in proofs")
+        tx.update(proofs)
+    return tx, offset
+
+
+def encode_block(block) -> bytes:
+    """Encode a block and its transactions into the binary format"""
+    parts = [
+        _BLOCK_HEAD.pack(CODEC_VERSION, block.version),
+        _pack_varint(block.index),
+        _pack_number(block.timestamp),
+        _BLOCK_LINK.pack(
+            bytes.fromhex(block.previous_hash),
+            block.nonce,
+            bytes.fromhex(block.hash)
+        ),
+    ]
+    if block.version >= _BLOCK_VERSION_HEADER:
+        parts.append(block.target.to_bytes(32, "big"))
+    parts.append(_pack_varint(len(block.transactions)))
+    for tx in block.transactions:
+        encoded = tx.to_bytes()
+        parts.append(_pack_varint(len(encoded)))
+        parts.append(encoded)
+    
+    return b"".join(parts)
+
+
+def decode_block(data) -> dict:
+    """
+    Decode a block from bytes or any buffer (e.g. a memoryview of an mmap)
+    Returns its dictionary form as accepted by Block.from_dict
+    """
+    try:
+        return _decode_block(data)
+    except (struct.error, IndexError, KeyError, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise CodecError(f"Malformed block: {e}")
+
+
+def _decode_block(data) -> dict:
+    codec_version, block_version = _BLOCK_HEAD.unpack_from(data, 0)
+    if codec_version not in SUPPORTED_CODEC_VERSIONS:
+        raise CodecError(f"Unsupported block codec version {codec_version}")
+    offset = _BLOCK_HEAD.size
+    
+    index, offset = _unpack_varint(data, offset)
+    timestamp, offset = _unpack_number(data, offset)
+    previous_hash, nonce, block_hash = _BLOCK_LINK.unpack_from(data, offset)
+    offset += _BLOCK_LINK.size
+    
+    target = None
+    if codec_version > 1 and block_version >= _BLOCK_VERSION_HEADER:
+        target = bytes(data[offset:offset + 32])
+        if len(target) != 32:
+            raise CodecError("Truncated target")
+        offset += 32
+    
+    count, offset = _unpack_varint(data, offset)
+    transactions = []
+    for _ in range(count):
+        length, offset = _unpack_varint(data, offset)
+        tx, end = _decode_transaction(data, offset)
+        if end != offset + length:
+            raise CodecError("Transaction length mismatch")
+        transactions.append(tx)
+        offset = end
+    
+    block = {
+        "index": index,
+        "timestamp": timestamp,
+        "transactions": transactions,
+        "previous_hash": bytes(previous_hash).hex(),
+        "nonce": nonce,
+        "hash": bytes(block_hash).hex(),
+        "version": block_version
+    }
+    if target is not None:
+        block["target"] = target.hex()
+    return block
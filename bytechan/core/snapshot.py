@@ -0,0 +1,115 @@
+"""
+Chunked, compressed chain snapshots for bootstrapping nodes
+
+Layout (little endian):
+
+    header:     8s magic, u16 snapshot version
+    chunk:      u32 block count, u32 raw length, u32 compressed length,
+                32s sha256 of the compressed bytes,
+                then the zlib compressed blocks
+                (each u32 length + encoded block)
+    end:        a chunk header with a block count of 0, followed by
+                u64 total block count, 32s tip hash
+
+Blocks are written and read one chunk at a time, so neither side holds
+more than a chunk in memory however long the chain is.
+"""
+
+import hashlib
+import struct
+import zlib
+from typing import BinaryIO, Iterable, Iterator
+from bytechan.core.block import Block
+
+
+SNAPSHOT_MAGIC = b"BCSNAP\x00\x01"
+SNAPSHOT_VERSION = 1
+
+_HEADER = struct.Struct("<8sH")
+_CHUNK = struct.Struct("<III32s")
+_END = struct.Struct("<Q32s")
+_LENGTH = struct.Struct("<I")
+
+
+class SnapshotError(ValueError):
+    """Raised when a snapshot is corrupt or does not fit the chain"""
+
+
+def _write_chunk(out: BinaryIO, encoded: list, level: int):
+    raw = b"".join(encoded)
+    compressed = zlib.compress(raw, level)
+    out.write(_CHUNK.pack(len(encoded) // 2, len(raw), len(compressed),
+                          hashlib.sha256(compressed).digest()))
+    out.write(compressed)
+
+
+def write_snapshot(blocks: Iterable[Block], out: BinaryIO,
+                   blocks_per_chunk: int = 256, level: int = 6) -> int:
+    """Stream blocks into a snapshot file object, returns how many were written"""
+    out.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION))
+    encoded = []
+    count = 0
+    tip_hash = "00" * 32
+    for block in blocks:
+        data = block.to_bytes()
+        encoded.append(_LENGTH.pack(len(data)))
+        encoded.append(data)
+        count += 1
+        tip_hash = block.hash
+        if len(encoded) == 2 * blocks_per_chunk:
+            _write_chunk(out, encoded, level)
+            encoded = []
+    if encoded:
+        _write_chunk(out, encoded, level)
+    
+    out.write(_CHUNK.pack(0, 0, 0, bytes(32)))
+    out.write(_END.pack(count, bytes.fromhex(tip_hash)))
+    return count
+
+
+def _read_exact(source: BinaryIO, size: int) -> bytes:
+    data = source.read(size)
+    if len(data) != size:
+        raise SnapshotError("Truncated snapshot")
+    return data
+
+
+def read_snapshot(source: BinaryIO) -> Iterator[Block]:
+    """
+    Stream blocks out of a snapshot file object
+    Every chunk is checked against its checksum before any of its
+    blocks are yielded
+    """
+    magic, version = _HEADER.unpack(_read_exact(source, _HEADER.size))
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise SnapshotError("Not a snapshot file")
+    
+    count = 0
+    tip_hash = None
+    while True:
+        block_count, raw_length, compressed_length, checksum = _CHUNK.unpack(
+            _read_exact(source, _CHUNK.size)
+        )
+        if block_count == 0:
+            break
+        
+        compressed = _read_exact(source, compressed_length)
+        if hashlib.sha256(compressed).digest() != checksum:
+            raise SnapshotError(f"Checksum mismatch in chunk after block {count}")
+        raw = zlib.decompress(compressed)
+        if len(raw) != raw_length:
+            raise SnapshotError(f"Bad chunk length after block {count}")
+        
+        offset = 0
+        for _ in range(block_count):
+            length = _LENGTH.unpack_from(raw, offset)[0]
+            offset += _LENGTH.size
+            block = Block.from_bytes(raw[offset:offset + length])
+            offset += length
+            count += 1
+            tip_hash = block.hash
+            yield block
+    
+    total, tip = _END.unpack(_read_exact(source, _END.size))
+    if total != count or (count and tip.hex() != tip_hash):
+        raise SnapshotError("Snapshot does not end where its trailer says")
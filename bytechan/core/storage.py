@@ -0,0 +1,206 @@
+"""
+Persistent append-only block storage
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import OrderedDict
+from typing import Iterator, List, Optional
+from bytechan.core.block import Block
+
+
+# Each record in the segment file is a length prefix followed by block bytes
+RECORD_HEADER = struct.Struct("<I")
+INDEX_ENTRY = struct.Struct("<Q")
+
+
+class BlockStore:
+    """
+    Disk-backed block store.
+    
+    Blocks are appended to a single segment file in the binary codec
+    format. A separate index file holds one fixed-width offset per
+    height, so lookups are O(1). Reads go through a memory map of the
+    segment file and decode straight from the mapped pages.
+    """
+    
+    DATA_FILE = "blocks.dat"
+    INDEX_FILE = "blocks.idx"
+    
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._data = open(os.path.join(directory, self.DATA_FILE), "a+b")
+        self._index = open(os.path.join(directory, self.INDEX_FILE), "a+b")
+        self._offsets = array("Q")
+        self._data_size = 0
+        self._mmap: Optional[mmap.mmap] = None
+        self._load_index()
+    
+    def _load_index(self):
+        """Read the offset index and drop any partially written tail"""
+        self._index.seek(0)
+        raw = self._index.read()
+        raw = raw[:len(raw) - len(raw) % INDEX_ENTRY.size]
+        self._offsets = array("Q")
+        self._offsets.frombytes(raw)
+        if sys.byteorder == "big":
+            self._offsets.byteswap()
+        
+        self._data.seek(0, os.SEEK_END)
+        data_size = self._data.tell()
+        
+        # Keep only records that were completely written
+        valid = 0
+        end = 0
+        for offset in self._offsets:
+            if offset + RECORD_HEADER.size > data_size:
+                break
+            self._data.seek(offset)
+            length = RECORD_HEADER.unpack(self._data.read(RECORD_HEADER.size))[0]
+            if offset + RECORD_HEADER.size + length > data_size:
+                break
+            valid += 1
+            end = offset + RECORD_HEADER.size + length
+        
+        if valid != len(self._offsets) or end != data_size:
+            del self._offsets[valid:]
+            self._truncate_files(end)
+        self._data_size = end
+    
+    def _truncate_files(self, data_size: int):
+        """Cut both files back to the current offsets"""
+        self._close_map()
+        self._data.truncate(data_size)
+        self._data.flush()
+        self._index.truncate(len(self._offsets) * INDEX_ENTRY.size)
+        self._index.flush()
+    
+    def __len__(self) -> int:
+        return len(self._offsets)
+    
+    def append(self, block: Block):
+        """Write a block at the next height"""
+        if block.index != len(self._offsets):
+            raise ValueError(f"Expected block {len(self._offsets)}, got {block.index}")
+        
+        data = block.to_bytes()
+        offset = self._data_size
+        self._data.seek(0, os.SEEK_END)
+        self._data.write(RECORD_HEADER.pack(len(data)) + data)
+        self._data.flush()
+        
+        # The index entry is written last, so a crash leaves no dangling offset
+        self._index.seek(0, os.SEEK_END)
+        self._index.write(INDEX_ENTRY.pack(offset))
+        self._index.flush()
+        
+        self._offsets.append(offset)
+        self._data_size = offset + RECORD_HEADER.size + len(data)
+    
+    def _view(self) -> mmap.mmap:
+        """Memory map covering every record written so far"""
+        if self._mmap is None or len(self._mmap) < self._data_size:
+            self._close_map()
+            self._mmap = mmap.mmap(self._data.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+    
+    def _close_map(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+    
+    def get(self, height: int) -> Block:
+        """Decode the block at a height directly from the mapped file"""
+        if not 0 <= height < len(self._offsets):
+            raise IndexError("Block height out of range")
+        
+        mapped = self._view()
+        offset = self._offsets[height]
+        length = RECORD_HEADER.unpack_from(mapped, offset)[0]
+        start = offset + RECORD_HEADER.size
+        with memoryview(mapped) as view, view[start:start + length] as record:
+            return Block.from_bytes(record)
+    
+    def truncate(self, height: int):
+        """Discard every block at or above the given height"""
+        if height >= len(self._offsets):
+            return
+        end = self._offsets[height]
+        del self._offsets[height:]
+        self._truncate_files(end)
+        self._data_size = end
+    
+    def close(self):
+        """Release the map and file handles"""
+        self._close_map()
+        self._data.close()
+        self._index.close()
+
+
+class StoredChain:
+    """
+    List-like view of a BlockStore used as Blockchain.chain.
+    
+    Only a bounded number of recently used blocks are kept as live
+    objects; anything older is decoded from the store on demand.
+    """
+    
+    def __init__(self, store: BlockStore, window: int = 128):
+        self.store = store
+        self.window = window
+        self._live: "OrderedDict[int, Block]" = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self.store)
+    
+    def _normalize(self, height: int) -> int:
+        if height < 0:
+            height += len(self.store)
+        if not 0 <= height < len(self.store):
+            raise IndexError("chain index out of range")
+        return height
+    
+    def _remember(self, block: Block):
+        self._live[block.index] = block
+        self._live.move_to_end(block.index)
+        while len(self._live) > self.window:
+            self._live.popitem(last=False)
+    
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self[height] for height in range(*key.indices(len(self.store)))]
+        
+        height = self._normalize(key)
+        block = self._live.get(height)
+        if block is None:
+            block = self.store.get(height)
+            self._remember(block)
+        else:
+            self._live.move_to_end(height)
+        return block
+    
+    def __iter__(self) -> Iterator[Block]:
+        # Full scans stream from disk without evicting the recent window
+        for height in range(len(self.store)):
+            block = self._live.get(height)
+            yield block if block is not None else self.store.get(height)
+    
+    def append(self, block: Block):
+        """Persist a block and keep it live"""
+        self.store.append(block)
+        self._remember(block)
+    
+    def pop(self) -> Block:
+        """Remove and return the tip block"""
+        block = self[-1]
+        self.store.truncate(block.index)
+        self._live.pop(block.index, None)
+        return block
+    
+    def live_blocks(self) -> List[Block]:
+        """Blocks currently held in memory"""
+        return list(self._live.values())
@@ -5,8 +5,10 @@ Transaction handling with privacy features
 import hashlib
 import json
 import time
-from typing import Optional
+from typing import List, Optional
 from enum import Enum
+from bytechan.core.serialization import decode_transaction, encode_transaction
+from bytechan.crypto.bulletproofs import Bulletproof
 
 
 class PrivacyLevel(Enum):
@@ -17,22 +19,97 @@ class PrivacyLevel(Enum):
     MAXIMUM = "MAXIMUM"   # Ring size: 51+
 
 
+_set = object.__setattr__
+
+
 class Transaction:
-    """Transaction with privacy features"""
+    """
+    Transaction with privacy features.
+    
+    Transactions use __slots__ and are sealed once signed, pooled,
+    placed in a block or decoded. A sealed transaction refuses direct
+    attribute assignment and memoizes its dictionary form, canonical
+    digest and encoded bytes; the apply_* methods are the only way to
+    change it and they drop those caches. Once a block holds the
+    transaction it is committed and the apply_* methods refuse too,
+    since the block's merkle tree and hash cover its digest.
+    """
+    
+    __slots__ = (
+        "sender", "recipient", "amount", "timestamp", "privacy_level",
+        "ring_signature", "stealth_address", "tx_public_key", "view_tag",
+        "key_image", "inputs", "ring_proof", "range_proof", "tx_id", "is_confidential",
+        "_sealed", "_committed", "_dict", "_digest", "_bytes"
+    )
     
     def __init__(self, sender: str, recipient: str, amount: float, 
                  privacy_level: str = "MEDIUM", 
                  ring_signature: Optional[str] = None,
-                 stealth_address: Optional[str] = None):
-        self.sender = sender
-        self.recipient = recipient
-        self.amount = amount
-        self.timestamp = time.time()
-        self.privacy_level = privacy_level
-        self.ring_signature = ring_signature
-        self.stealth_address = stealth_address
-        self.tx_id = self.calculate_id()
-        self.is_confidential = False
+                 stealth_address: Optional[str] = None,
+                 inputs: Optional[List[str]] = None):
+        self._reset()
+        _set(self, "sender", sender)
+        _set(self, "recipient", recipient)
+        _set(self, "amount", amount)
+        _set(self, "timestamp", time.time())
+        _set(self, "privacy_level", privacy_level)
+        _set(self, "ring_signature", ring_signature)
+        _set(self, "stealth_address", stealth_address)
+        _set(self, "tx_public_key", None)
+        _set(self, "view_tag", None)
+        _set(self, "key_image", None)
+        # IDs of the transactions whose outputs this one spends
+        _set(self, "inputs", inputs)
+        # Signature and range proof checked when the transaction is accepted
+        _set(self, "ring_proof", None)
+        _set(self, "range_proof", None)
+        _set(self, "tx_id", self.calculate_id())
+        _set(self, "is_confidential", False)
+    
+    def _reset(self):
+        """Unseal and drop the memoized forms"""
+        _set(self, "_sealed", False)
+        _set(self, "_committed", False)
+        self._invalidate()
+    
+    def _invalidate(self):
+        _set(self, "_dict", None)
+        _set(self, "_digest", None)
+        _set(self, "_bytes", None)
+    
+    def __setattr__(self, name: str, value):
+        if self._sealed:
+            raise AttributeError(f"Transaction {self.tx_id[:16]} is sealed; "
+                                 f"use the apply_* methods to change it")
+        _set(self, name, value)
+    
+    @property
+    def sealed(self) -> bool:
+        return self._sealed
+    
+    def seal(self) -> 'Transaction':
+        """Freeze the transaction so its encoded forms can be memoized"""
+        _set(self, "_sealed", True)
+        return self
+    
+    @property
+    def committed(self) -> bool:
+        return self._committed
+    
+    def commit(self) -> 'Transaction':
+        """Seal the transaction for good once a block holds it"""
+        _set(self, "_sealed", True)
+        _set(self, "_committed", True)
+        return self
+    
+    def _update(self, **fields):
+        """Change fields through a mutator, sealed or not, unless a block holds the transaction"""
+        if self._committed:
+            raise AttributeError(f"Transaction {self.tx_id[:16]} is committed to a block "
+                                 f"and cannot change")
+        for name, value in fields.items():
+            _set(self, name, value)
+        self._invalidate()
     
     def calculate_id(self) -> str:
         """Calculate unique transaction ID"""
@@ -46,25 +123,57 @@ class Transaction:
         
         return hashlib.sha256(tx_string.encode()).hexdigest()
     
-    def apply_ring_signature(self, ring_size: int = 11):
-        """Apply ring signature for sender privacy"""
+    def apply_ring_signature(self, ring_size: int = 11, signature: Optional[dict] = None):
+        """
+        Apply ring signature for sender privacy
+        signature, as made by RingSignature.sign over the tx_id, is
+        carried as the ring proof and publishes its key image so the
+        chain can refuse a second spend of the same input
+        """
         # Simplified ring signature (in production, use actual cryptography)
-        self.ring_signature = f"ring_sig_{ring_size}_{self.tx_id[:16]}"
-        self.sender = "RING_" + self.sender[:10]  # Obfuscate sender
-    
-    def apply_stealth_address(self):
-        """Apply stealth address for recipient privacy"""
-        # Simplified stealth address (in production, use actual cryptography)
-        self.stealth_address = f"stealth_{self.recipient[:16]}"
-        self.recipient = self.stealth_address  # Replace with stealth address
-    
-    def apply_confidential_transaction(self):
-        """Apply confidential transaction to hide amount"""
-        self.is_confidential = True
-        # In production, use Pedersen commitments and range proofs
-    
-    def is_valid(self) -> bool:
-        """Validate transaction"""
+        fields = {
+            "ring_signature": f"ring_sig_{ring_size}_{self.tx_id[:16]}",
+            "sender": "RING_" + self.sender[:10]  # Obfuscate sender
+        }
+        if signature is not None:
+            fields["key_image"] = signature["key_image"]
+            fields["ring_proof"] = signature
+        self._update(**fields)
+    
+    def apply_stealth_address(self, stealth_output: Optional[dict] = None):
+        """
+        Apply stealth address for recipient privacy
+        stealth_output, as made by StealthAddress.generate_stealth_output,
+        also publishes the transaction public key and view tag the
+        recipient scans for
+        """
+        if stealth_output is not None:
+            self._update(
+                stealth_address=stealth_output["stealth_address"],
+                tx_public_key=stealth_output["tx_public_key"],
+                view_tag=stealth_output["view_tag"]
+            )
+        else:
+            # Simplified stealth address (in production, use actual cryptography)
+            self._update(stealth_address=f"stealth_{self.recipient[:16]}")
+        self._update(recipient=self.stealth_address)  # Replace with stealth address
+    
+    def apply_confidential_transaction(self, range_proof: Optional[dict] = None):
+        """
+        Apply confidential transaction to hide amount
+        range_proof, as made by Bulletproof.generate_range_proof, shows
+        the hidden amount is in range; one is generated if not given
+        """
+        if range_proof is None:
+            range_proof = Bulletproof().generate_range_proof(self.amount)
+        self._update(is_confidential=True, range_proof=range_proof)
+    
+    def is_valid(self, utxo_set=None) -> bool:
+        """
+        Validate transaction
+        With a UTXOSet, listed inputs must be unspent outputs owned by the
+        sender and cover the amount; each input is one dictionary lookup
+        """
         if self.amount <= 0:
             return False
         
@@ -75,11 +184,44 @@ class Transaction:
         if self.sender == "NETWORK":
             return True
         
+        if utxo_set is not None and self.inputs is not None:
+            return utxo_set.covers(self)
+        
         return True
     
+    def digest(self) -> bytes:
+        """
+        SHA-256 of the canonical transaction form (merkle leaf data)
+        A confidential amount travels with the transaction, so it is
+        committed here even though to_dict hides it
+        """
+        digest = self._digest
+        if digest is None:
+            # Built from a fresh dict so that header hashing does not keep one per transaction
+            data = self._dict if self._dict is not None else self._build_dict()
+            if self.is_confidential:
+                data = dict(data, confidential_amount=self.amount)
+            tx_string = json.dumps(data, sort_keys=True)
+            digest = hashlib.sha256(tx_string.encode()).digest()
+            if self._sealed:
+                _set(self, "_digest", digest)
+        return digest
+    
     def to_dict(self) -> dict:
-        """Convert transaction to dictionary"""
-        return {
+        """
+        Convert transaction to dictionary
+        Sealed transactions return the same dictionary every time, so it
+        must not be modified
+        """
+        data = self._dict
+        if data is None:
+            data = self._build_dict()
+            if self._sealed:
+                _set(self, "_dict", data)
+        return data
+    
+    def _build_dict(self) -> dict:
+        data = {
             "tx_id": self.tx_id,
             "sender": self.sender,
             "recipient": self.recipient,
@@ -89,3 +231,61 @@ class Transaction:
             "ring_signature": self.ring_signature,
             "stealth_address": self.stealth_address
         }
+        # Optional fields are left out when unset so older hashes are unchanged
+        if self.tx_public_key is not None:
+            data["tx_public_key"] = self.tx_public_key
+        if self.view_tag is not None:
+            data["view_tag"] = self.view_tag
+        if self.key_image is not None:
+            data["key_image"] = self.key_image
+        if self.inputs is not None:
+            data["inputs"] = self.inputs
+        if self.ring_proof is not None:
+            data["ring_proof"] = self.ring_proof
+        if self.range_proof is not None:
+            data["range_proof"] = self.range_proof
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Transaction':
+        """
+        Rebuild a transaction from its dictionary form
+        A confidential amount is restored from "confidential_amount",
+        which decoded transactions carry; without it the amount is 0.0
+        """
+        is_confidential = data["amount"] == "CONFIDENTIAL"
+        
+        # Restore the stored ID and timestamp instead of recomputing them
+        tx = cls.__new__(cls)
+        tx._reset()
+        _set(tx, "sender", data["sender"])
+        _set(tx, "recipient", data["recipient"])
+        _set(tx, "amount", data.get("confidential_amount", 0.0) if is_confidential else data["amount"])
+        _set(tx, "timestamp", data["timestamp"])
+        _set(tx, "privacy_level", data["privacy_level"])
+        _set(tx, "ring_signature", data.get("ring_signature"))
+        _set(tx, "stealth_address", data.get("stealth_address"))
+        _set(tx, "tx_public_key", data.get("tx_public_key"))
+        _set(tx, "view_tag", data.get("view_tag"))
+        _set(tx, "key_image", data.get("key_image"))
+        _set(tx, "inputs", data.get("inputs"))
+        _set(tx, "ring_proof", data.get("ring_proof"))
+        _set(tx, "range_proof", data.get("range_proof"))
+        _set(tx, "tx_id", data["tx_id"])
+        _set(tx, "is_confidential", is_confidential)
+        return tx.seal()
+    
+    def to_bytes(self) -> bytes:
+        """Encode transaction in the compact binary format"""
+        encoded = self._bytes
+        if encoded is None:
+            encoded = encode_transaction(self)
+            if self._sealed:
+                _set(self, "_bytes", encoded)
+        return encoded
+    
+    @classmethod
+    def from_bytes(cls, data) -> 'Transaction':
+        """Decode a transaction from the compact binary format"""
+        tx_data, _ = decode_transaction(data)
+        return cls.from_dict(tx_data)
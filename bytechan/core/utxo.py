@@ -0,0 +1,245 @@
+"""
+Unspent output set with undo data and periodic snapshots
+
+Snapshot layout (little endian):
+
+    header:     8s magic, u64 height, 32s hash of the last applied block,
+                u64 output count
+    output:     32s tx_id, u32 height, u8 flags (1: amount hidden),
+                number amount (unless hidden), str owner
+
+number and str are encoded as in the transaction codec.
+"""
+
+import os
+import struct
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from bytechan.core.serialization import (
+    CodecError, _pack_number, _pack_str, _unpack_number, _unpack_str
+)
+
+
+UTXO_SNAPSHOT_MAGIC = b"BCUTXO\x00\x01"
+
+_SNAPSHOT_HEADER = struct.Struct("<8sQ32sQ")
+_OUTPUT_HEAD = struct.Struct("<32sIB")
+_AMOUNT_HIDDEN = 0x01
+
+
+@dataclass
+class UnspentOutput:
+    """The output a transaction created, while nobody has spent it"""
+    owner: str
+    amount: Optional[float]  # None for confidential amounts
+    height: int
+
+
+class UTXOSet:
+    """
+    Every unspent output on the chain, keyed by the creating tx_id.
+    
+    Each transaction creates one output paying its recipient, and a
+    transaction that lists inputs consumes those outputs in full (any
+    excess over its amount is the fee). Transactions without inputs use
+    the account model and consume nothing.
+    
+    Applying a block records undo data (outputs it spent, outputs it
+    created) for the last undo_depth blocks, so a reorg is undone in
+    place. With a directory the set is written to a snapshot every
+    snapshot_interval blocks, and a restart loads the snapshot and
+    replays only the blocks after it.
+    """
+    
+    SNAPSHOT_FILE = "utxo.snapshot"
+    
+    def __init__(self, directory: Optional[str] = None, snapshot_interval: int = 1000,
+                 undo_depth: int = 1000):
+        self.directory = directory
+        self.snapshot_interval = snapshot_interval
+        self.undo_depth = undo_depth
+        self.outputs: Dict[str, UnspentOutput] = {}
+        self._undo: List[Tuple[List[str], List[Tuple[str, UnspentOutput]]]] = []
+        self._base_height = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+    
+    @property
+    def height(self) -> int:
+        """Number of blocks applied to the set"""
+        return self._base_height + len(self._undo)
+    
+    def __len__(self) -> int:
+        return len(self.outputs)
+    
+    def __contains__(self, tx_id: str) -> bool:
+        return tx_id in self.outputs
+    
+    def get(self, tx_id: str) -> Optional[UnspentOutput]:
+        return self.outputs.get(tx_id)
+    
+    def covers(self, tx, created: Optional[Dict[str, UnspentOutput]] = None,
+               spent: Set[str] = frozenset()) -> bool:
+        """
+        True if the inputs of tx are unspent, owned by its sender and
+        worth at least its amount
+        created and spent carry the effect of earlier transactions in
+        the same block
+        """
+        inputs = tx.inputs
+        if not inputs or len(set(inputs)) != len(inputs):
+            return False
+        
+        total = 0.0
+        hidden = tx.is_confidential
+        for tx_id in inputs:
+            if tx_id in spent:
+                return False
+            output = self.outputs.get(tx_id)
+            if output is None and created is not None:
+                output = created.get(tx_id)
+            if output is None or output.owner != tx.sender:
+                return False
+            if output.amount is None:
+                hidden = True
+            else:
+                total += output.amount
+        
+        # Confidential amounts are balanced by their range proofs instead
+        return hidden or total >= tx.amount
+    
+    def check_block(self, transactions: Iterable) -> bool:
+        """True if every input in the block spends an output exactly once"""
+        created: Dict[str, UnspentOutput] = {}
+        spent: Set[str] = set()
+        for tx in transactions:
+            if tx.inputs is not None:
+                if not self.covers(tx, created, spent):
+                    return False
+                spent.update(tx.inputs)
+            if tx.tx_id in self.outputs or tx.tx_id in created:
+                return False
+            created[tx.tx_id] = self._output_of(tx, 0)
+        return True
+    
+    @staticmethod
+    def _output_of(tx, height: int) -> UnspentOutput:
+        return UnspentOutput(tx.recipient, None if tx.is_confidential else tx.amount, height)
+    
+    def apply_block(self, block):
+        """Spend the inputs and add the outputs of a newly appended block"""
+        self._apply(block)
+        if self.directory is not None and self.height % self.snapshot_interval == 0:
+            self.save_snapshot(block.hash)
+    
+    def _apply(self, block):
+        created: List[str] = []
+        spent: List[Tuple[str, UnspentOutput]] = []
+        for tx in block.transactions:
+            for tx_id in tx.inputs or ():
+                output = self.outputs.pop(tx_id, None)
+                if output is not None:
+                    spent.append((tx_id, output))
+            self.outputs[tx.tx_id] = self._output_of(tx, block.index)
+            created.append(tx.tx_id)
+        
+        self._undo.append((created, spent))
+        if len(self._undo) > self.undo_depth:
+            del self._undo[0]
+            self._base_height += 1
+    
+    def revert_block(self, block):
+        """
+        Undo the most recently applied block
+        Raises ValueError once the block is older than the kept undo data
+        """
+        if not self._undo:
+            raise ValueError("No undo data for this block")
+        
+        created, spent = self._undo.pop()
+        for tx_id in created:
+            self.outputs.pop(tx_id, None)
+        for tx_id, output in spent:
+            self.outputs[tx_id] = output
+    
+    def rebuild(self, blocks: Iterable):
+        """Reset the set and replay the given blocks"""
+        self.outputs = {}
+        self._undo = []
+        self._base_height = 0
+        self._replay(blocks)
+    
+    def _replay(self, blocks: Iterable):
+        """Apply blocks, then take a single snapshot at the end"""
+        last = None
+        for block in blocks:
+            self._apply(block)
+            last = block
+        if self.directory is not None and last is not None:
+            self.save_snapshot(last.hash)
+    
+    def catch_up(self, blocks):
+        """
+        Bring the set in line with a chain on startup
+        The snapshot is used if its block is still on the chain, so only
+        the blocks after it are replayed
+        """
+        snapshot = self._load_snapshot()
+        if snapshot is None:
+            self.rebuild(blocks)
+            return
+        
+        height, block_hash, outputs = snapshot
+        if height > len(blocks) or height == 0 or blocks[height - 1].hash != block_hash:
+            self.rebuild(blocks)
+            return
+        
+        self.outputs = outputs
+        self._undo = []
+        self._base_height = height
+        self._replay(blocks[index] for index in range(height, len(blocks)))
+    
+    def _snapshot_path(self) -> str:
+        return os.path.join(self.directory, self.SNAPSHOT_FILE)
+    
+    def save_snapshot(self, block_hash: str):
+        """Write the whole set, tagged with the last applied block"""
+        parts = [_SNAPSHOT_HEADER.pack(UTXO_SNAPSHOT_MAGIC, self.height,
+                                       bytes.fromhex(block_hash), len(self.outputs))]
+        for tx_id, output in self.outputs.items():
+            hidden = output.amount is None
+            parts.append(_OUTPUT_HEAD.pack(bytes.fromhex(tx_id), output.height,
+                                           _AMOUNT_HIDDEN if hidden else 0))
+            if not hidden:
+                parts.append(_pack_number(output.amount))
+            parts.append(_pack_str(output.owner))
+        
+        temporary = self._snapshot_path() + ".tmp"
+        with open(temporary, "wb") as f:
+            f.write(b"".join(parts))
+        os.replace(temporary, self._snapshot_path())
+    
+    def _load_snapshot(self) -> Optional[Tuple[int, str, Dict[str, UnspentOutput]]]:
+        """(height, block hash, outputs) from the snapshot, if there is a usable one"""
+        if self.directory is None or not os.path.exists(self._snapshot_path()):
+            return None
+        with open(self._snapshot_path(), "rb") as f:
+            data = f.read()
+        
+        try:
+            magic, height, block_hash, count = _SNAPSHOT_HEADER.unpack_from(data)
+            if magic != UTXO_SNAPSHOT_MAGIC:
+                return None
+            offset = _SNAPSHOT_HEADER.size
+            outputs = {}
+            for _ in range(count):
+                tx_id, output_height, flags = _OUTPUT_HEAD.unpack_from(data, offset)
+                offset += _OUTPUT_HEAD.size
+                amount = None
+                if not flags & _AMOUNT_HIDDEN:
+                    amount, offset = _unpack_number(data, offset)
+                owner, offset = _unpack_str(data, offset)
+                outputs[tx_id.hex()] = UnspentOutput(owner, amount, output_height)
+        except (struct.error, IndexError, CodecError, UnicodeDecodeError):
+            return None
+        return height, block_hash.hex(), outputs
@@ -0,0 +1,197 @@
+"""
+Block acceptance pipeline
+
+A block is accepted in three stages:
+
+    1. structure:  linkage, version and hash, the block reward,
+                   per-transaction rules, proof presence, key images
+                   and unspent outputs.
+                   All cheap and needing chain state, so run in process.
+    2. proofs:     ring signatures and range proofs of every transaction.
+                   Proofs already verified at mempool admission are
+                   found in the chain's SignatureCache and skipped. The
+                   rest go through the batch verifiers, which decode
+                   each ring member once per batch. They are
+                   independent of each other, so with workers > 1 they
+                   are fanned out to a process pool in chunks, and the
+                   first failing chunk cancels the rest.
+    3. commit:     only a block that passed both stages touches the chain
+                   and its indexes.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Iterable, List, Optional, Tuple
+from bytechan.core.block import BLOCK_VERSION_LEGACY
+from bytechan.crypto.bulletproofs import Bulletproof
+from bytechan.crypto.ring_signature import RingSignature
+from bytechan.crypto.signature_cache import SignatureCache
+
+
+# (tx_id, ring_proof, range_proof): what a worker needs to check a transaction
+ProofItem = Tuple[str, Optional[dict], Optional[dict]]
+
+# Transactions per task sent to the pool
+DEFAULT_CHUNK_SIZE = 64
+
+
+def proofs_present(tx) -> bool:
+    """
+    Structural proof rules: a confidential amount needs a range proof,
+    and a ring proof must publish the transaction's key image
+    """
+    if tx.is_confidential and tx.range_proof is None:
+        return False
+    if tx.ring_proof is not None:
+        if not isinstance(tx.ring_proof, dict) or tx.ring_proof.get("key_image") != tx.key_image:
+            return False
+    return True
+
+
+def proof_item(tx) -> ProofItem:
+    return tx.tx_id, tx.ring_proof, tx.range_proof
+
+
+def proof_cache_key(tx) -> Tuple[str, bytes]:
+    """
+    Signature cache key of a transaction's proofs
+    The digest covers every field, proofs included, and is memoized
+    once the transaction is sealed
+    """
+    return tx.tx_id, tx.digest()
+
+
+def verify_proof_item(item: ProofItem) -> bool:
+    """Check the ring signature over the tx_id and the range proof"""
+    tx_id, ring_proof, range_proof = item
+    if ring_proof is not None and not RingSignature().verify(tx_id, ring_proof):
+        return False
+    if range_proof is not None and not Bulletproof().verify_range_proof(range_proof):
+        return False
+    return True
+
+
+def verify_proofs(tx, cache: Optional[SignatureCache] = None) -> bool:
+    """
+    Structural and cryptographic proof checks of one transaction
+    With a cache, proofs that verified before are not checked again
+    """
+    if not proofs_present(tx):
+        return False
+    if tx.ring_proof is None and tx.range_proof is None:
+        return True
+    if cache is None:
+        return verify_proof_item(proof_item(tx))
+    
+    key = proof_cache_key(tx)
+    if key in cache:
+        return True
+    if not verify_proof_item(proof_item(tx)):
+        return False
+    cache.add(key)
+    return True
+
+
+def verify_proof_items(items: List[ProofItem]) -> bool:
+    """True if every item verifies, checking the rings and range proofs as batches"""
+    rings = [(tx_id, ring_proof) for tx_id, ring_proof, _ in items if ring_proof is not None]
+    if not RingSignature().verify_batch(rings).all_valid:
+        return False
+    range_proofs = [range_proof for _, _, range_proof in items if range_proof is not None]
+    return Bulletproof().verify_batch(range_proofs).all_valid
+
+
+class BlockValidator:
+    """
+    Accepts blocks onto a chain through the staged pipeline.
+    
+    With workers > 1 a process pool is started on first use and kept
+    for later blocks, so a validator should be closed (or used as a
+    context manager) once a batch is done. Blocks with fewer proofs
+    than one chunk are verified in process, where a pool round trip
+    would cost more than it saves.
+    """
+    
+    def __init__(self, blockchain, workers: int = 1, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.blockchain = blockchain
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+    
+    def __enter__(self) -> 'BlockValidator':
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+    
+    def accept(self, block) -> bool:
+        """Validate a block and append it to the chain if every stage passes"""
+        if not self.check_structure(block):
+            return False
+        if not self.check_proofs(block.transactions):
+            return False
+        self.blockchain._append_block(block)
+        return True
+    
+    def check_structure(self, block) -> bool:
+        """Stage 1: everything but the proofs, against the current chain"""
+        blockchain = self.blockchain
+        if not blockchain._extends_tip(block):
+            return False
+        
+        # The legacy hash covers to_dict, which hides confidential amounts
+        if block.version == BLOCK_VERSION_LEGACY and any(tx.is_confidential for tx in block.transactions):
+            return False
+        
+        # One reward at most, and no more than the chain pays
+        rewards = [tx for tx in block.transactions if tx.sender == "NETWORK"]
+        if len(rewards) > 1 or any(tx.amount > blockchain.mining_reward for tx in rewards):
+            return False
+        
+        for tx in block.transactions:
+            if not tx.is_valid() or not proofs_present(tx):
+                return False
+        
+        if not blockchain._key_images_unspent(block.transactions):
+            return False
+        
+        return blockchain.utxos.check_block(block.transactions)
+    
+    def check_proofs(self, transactions: Iterable) -> bool:
+        """Stage 2: verify every ring signature and range proof, stopping at the first failure"""
+        cache = self.blockchain.signature_cache
+        keys = []
+        items = []
+        for tx in transactions:
+            if tx.ring_proof is None and tx.range_proof is None:
+                continue
+            key = proof_cache_key(tx)
+            if key not in cache:
+                keys.append(key)
+                items.append(proof_item(tx))
+        
+        if not self._verify_items(items):
+            return False
+        for key in keys:
+            cache.add(key)
+        return True
+    
+    def _verify_items(self, items: List[ProofItem]) -> bool:
+        if self.workers <= 1 or len(items) <= self.chunk_size:
+            return verify_proof_items(items)
+        
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        pending = {self._executor.submit(verify_proof_items, items[i:i + self.chunk_size])
+                   for i in range(0, len(items), self.chunk_size)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            if not all(future.result() for future in done):
+                for future in pending:
+                    future.cancel()
+                return False
+        return True
@@ -0,0 +1,15 @@
+"""
+Cryptographic primitives for ByteChan
+"""
+
+from bytechan.crypto.keys import KeyPair
+from bytechan.crypto.ring_signature import RingSignature
+from bytechan.crypto.stealth_address import StealthAddress
+from bytechan.crypto.bulletproofs import Bulletproof
+
+__all__ = [
+    "KeyPair",
+    "RingSignature",
+    "StealthAddress",
+    "Bulletproof",
+]
@@ -0,0 +1,21 @@
+"""
+Result type shared by the batch proof verifiers
+"""
+
+from dataclasses import dataclass, field
+from typing import List
+
+
+@dataclass
+class BatchVerificationResult:
+    """Outcome of verifying many proofs together"""
+    valid: List[bool] = field(default_factory=list)
+    
+    @property
+    def all_valid(self) -> bool:
+        return all(self.valid)
+    
+    @property
+    def failures(self) -> List[int]:
+        """Positions of the proofs that failed"""
+        return [i for i, ok in enumerate(self.valid) if not ok]
@@ -0,0 +1,67 @@
+"""
+Cache of signatures and proofs that already verified
+"""
+
+import sys
+from collections import OrderedDict
+from typing import Tuple
+
+
+# Rough per-entry cost of the OrderedDict slot, its link node and the key tuple
+ENTRY_OVERHEAD = 200
+
+
+class SignatureCache:
+    """
+    Bounded LRU set of (tx_id, signature digest) pairs that verified.
+    
+    A transaction's ring signature and range proof are checked when it
+    is admitted to the mempool and again when its block is validated.
+    Recording successes under a digest of the exact signature data lets
+    the second check skip the cryptographic work; a changed signature
+    has a different digest and is verified in full. Failures are never
+    cached. Entries are evicted least recently used first once their
+    estimated size exceeds max_bytes.
+    """
+    
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, bytes], int]" = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __contains__(self, key: Tuple[str, bytes]) -> bool:
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return True
+        self.misses += 1
+        return False
+    
+    def add(self, key: Tuple[str, bytes]):
+        """Record that the signature data under key verified"""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return
+        
+        size = ENTRY_OVERHEAD + sys.getsizeof(key[0]) + sys.getsizeof(key[1])
+        self._entries[key] = size
+        self.size_bytes += size
+        while self.size_bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self.size_bytes -= evicted
+    
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+    
+    def clear(self):
+        self._entries.clear()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
@@ -4,6 +4,7 @@ Stealth address implementation for recipient privacy
 
 import hashlib
 import secrets
+from typing import List, Optional
 
 
 class StealthAddress:
@@ -31,44 +32,66 @@ class StealthAddress:
     
     def generate_stealth_address(self) -> str:
         """Generate a new one-time stealth address"""
-        # Generate random nonce
+        return self.generate_stealth_output()["stealth_address"]
+    
+    def generate_stealth_output(self) -> dict:
+        """
+        Generate a one-time address together with the transaction public
+        key and view tag that let this wallet recognise it when scanning
+        """
+        # Generate random nonce, published as the transaction public key
         nonce = secrets.token_hex(16)
-        
-        # Create shared secret
-        shared_secret = hashlib.sha256(
-            (nonce + self.view_key).encode()
-        ).hexdigest()
-        
-        # Generate one-time public key
-        one_time_key = hashlib.sha256(
-            (shared_secret + self.spend_key).encode()
-        ).hexdigest()
-        
-        # Format as stealth address
-        address_hash = hashlib.sha256(one_time_key.encode()).hexdigest()
-        return f"st1{address_hash[:40]}"
+        shared_secret = derive_shared_secret(nonce, self.view_key)
+        return {
+            "stealth_address": derive_stealth_address(shared_secret, self.spend_key),
+            "tx_public_key": nonce,
+            "view_tag": view_tag(shared_secret)
+        }
     
-    def scan_for_outputs(self, blockchain, wallet_address: str) -> List[dict]:
+    def owns_output(self, stealth_address: str, tx_public_key: str,
+                    tag: Optional[int] = None) -> bool:
+        """
+        Check an output against this wallet's keys
+        A mismatching view tag rejects the output before the address is derived
+        """
+        shared_secret = derive_shared_secret(tx_public_key, self.view_key)
+        if tag is not None and view_tag(shared_secret) != tag:
+            return False
+        return derive_stealth_address(shared_secret, self.spend_key) == stealth_address
+    
+    def scan_for_outputs(self, blockchain, wallet_address: str,
+                         include_proofs: bool = False) -> List[dict]:
         """
         Scan blockchain for outputs belonging to this wallet
         Uses view key to detect without spending
+        With include_proofs each output carries a merkle inclusion proof
+        that can be checked against the block header alone
         """
         owned_outputs = []
         
         for block in blockchain.chain:
-            for tx in block.transactions:
-                if tx.stealth_address and self._is_mine(tx.stealth_address):
-                    owned_outputs.append({
+            for position, tx in enumerate(block.transactions):
+                if tx.stealth_address and self._is_mine(
+                        tx.stealth_address, tx.tx_public_key, tx.view_tag):
+                    output = {
                         "tx_id": tx.tx_id,
                         "amount": tx.amount,
                         "stealth_address": tx.stealth_address,
                         "block": block.index
-                    })
+                    }
+                    if include_proofs:
+                        output["merkle_proof"] = block.merkle_tree.proof(position).to_dict()
+                    owned_outputs.append(output)
         
         return owned_outputs
     
-    def _is_mine(self, stealth_address: str) -> bool:
+    def _is_mine(self, stealth_address: str, tx_public_key: Optional[str] = None,
+                 tag: Optional[int] = None) -> bool:
         """Check if a stealth address belongs to this wallet"""
+        if tx_public_key is not None:
+            return self.owns_output(stealth_address, tx_public_key, tag)
+        
+        # Outputs without a public key predate view tags and cannot be derived
         # Simplified check - production needs proper cryptographic verification
         return stealth_address.startswith("st1")
     
@@ -78,3 +101,24 @@ class StealthAddress:
         random_data = secrets.token_hex(32)
         address_hash = hashlib.sha256(random_data.encode()).hexdigest()
         return f"st1{address_hash[:40]}"
+
+
+def derive_shared_secret(tx_public_key: str, view_key: str) -> str:
+    """Secret shared by the sender and the holder of the view key"""
+    return hashlib.sha256((tx_public_key + view_key).encode()).hexdigest()
+
+
+def derive_stealth_address(shared_secret: str, spend_key: str) -> str:
+    """One-time address for a shared secret and spend key"""
+    one_time_key = hashlib.sha256((shared_secret + spend_key).encode()).hexdigest()
+    address_hash = hashlib.sha256(one_time_key.encode()).hexdigest()
+    return f"st1{address_hash[:40]}"
+
+
+def view_tag(shared_secret: str) -> int:
+    """
+    One byte derived from the shared secret
+    Scanning compares it first, so all but about 1 in 256 outputs that
+    are not ours skip the address derivation
+    """
+    return hashlib.sha256(("view_tag" + shared_secret).encode()).digest()[0]
@@ -0,0 +1,18 @@
+"""
+P2P networking layer
+"""
+
+from bytechan.network.p2p import Network, Peer, PeerConnection
+from bytechan.network.compact import CompactBlock, CompactRelayStats
+from bytechan.network.sync import HeadersFirstSync, SyncError, SyncStats
+
+__all__ = [
+    "Network",
+    "Peer",
+    "PeerConnection",
+    "CompactBlock",
+    "CompactRelayStats",
+    "HeadersFirstSync",
+    "SyncError",
+    "SyncStats",
+]
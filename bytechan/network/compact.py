@@ -0,0 +1,217 @@
+"""
+Compact block relay
+
+A compact block is the block header plus a short ID per transaction.
+Peers usually hold most of a new block's transactions in their pool
+already, so they can rebuild it locally and only fetch what is missing.
+
+Layout (little endian):
+
+    compact block:
+        124s    block header (BlockHeader wire form)
+        u32     short ID count, then 6 bytes per ID in block order
+        u32     prefilled count, then per transaction:
+                u32 position, u32 length, encoded transaction
+    
+    get block transactions:  u32 request ID, 32s block hash,
+                             u32 count, u32 position each
+    block transactions:      u32 request ID, u32 count,
+                             then u32 length + encoded transaction each
+"""
+
+import hashlib
+import struct
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from bytechan.core.block import Block, BlockHeader
+from bytechan.core.transaction import Transaction
+from bytechan.network.protocol import REQUEST_ID, ProtocolError
+
+
+SHORT_ID_SIZE = 6
+
+_COUNT = struct.Struct("<I")
+_PREFILLED = struct.Struct("<II")
+_TXN_REQUEST = struct.Struct("<I32sI")
+
+
+def short_id(block_hash: str, tx_id: str) -> bytes:
+    """
+    Per-block short transaction ID
+    Salting with the block hash means a collision found for one block
+    does not carry over to the next
+    """
+    return hashlib.sha256(bytes.fromhex(block_hash) + bytes.fromhex(tx_id)).digest()[:SHORT_ID_SIZE]
+
+
+@dataclass
+class CompactRelayStats:
+    """Counters for compact blocks received by this node"""
+    blocks_received: int = 0
+    blocks_reconstructed: int = 0
+    blocks_completed: int = 0
+    fallbacks: int = 0
+    transactions_from_pool: int = 0
+    transactions_fetched: int = 0
+    
+    @property
+    def block_hit_rate(self) -> float:
+        """Share of blocks rebuilt purely from the local pool"""
+        if not self.blocks_received:
+            return 0.0
+        return self.blocks_reconstructed / self.blocks_received
+    
+    @property
+    def transaction_hit_rate(self) -> float:
+        """Share of non-prefilled transactions found in the local pool"""
+        total = self.transactions_from_pool + self.transactions_fetched
+        if not total:
+            return 0.0
+        return self.transactions_from_pool / total
+
+
+@dataclass
+class CompactBlock:
+    """Header, short IDs for pooled transactions and prefilled others"""
+    header: BlockHeader
+    short_ids: List[bytes]
+    prefilled: Dict[int, Transaction] = field(default_factory=dict)
+    
+    @property
+    def transaction_count(self) -> int:
+        return len(self.short_ids) + len(self.prefilled)
+    
+    @classmethod
+    def from_block(cls, block: Block) -> 'CompactBlock':
+        """
+        Compact form of a block
+        Mining rewards never pass through a pool, so they are always sent in full
+        """
+        short_ids = []
+        prefilled = {}
+        for position, tx in enumerate(block.transactions):
+            if tx.sender == "NETWORK":
+                prefilled[position] = tx
+            else:
+                short_ids.append(short_id(block.hash, tx.tx_id))
+        return cls(BlockHeader.from_block(block), short_ids, prefilled)
+    
+    def to_bytes(self) -> bytes:
+        parts = [
+            self.header.to_bytes(),
+            _COUNT.pack(len(self.short_ids)),
+            b"".join(self.short_ids),
+            _COUNT.pack(len(self.prefilled))
+        ]
+        for position, tx in sorted(self.prefilled.items()):
+            encoded = tx.to_bytes()
+            parts.append(_PREFILLED.pack(position, len(encoded)))
+            parts.append(encoded)
+        return b"".join(parts)
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'CompactBlock':
+        try:
+            header = BlockHeader.from_bytes(data[:BlockHeader.WIRE_SIZE])
+            offset = BlockHeader.WIRE_SIZE
+            count = _COUNT.unpack_from(data, offset)[0]
+            offset += _COUNT.size
+            end = offset + count * SHORT_ID_SIZE
+            if end > len(data):
+                raise ProtocolError("Truncated compact block")
+            short_ids = [data[i:i + SHORT_ID_SIZE] for i in range(offset, end, SHORT_ID_SIZE)]
+            offset = end
+            
+            prefilled = {}
+            count = _COUNT.unpack_from(data, offset)[0]
+            offset += _COUNT.size
+            for _ in range(count):
+                position, length = _PREFILLED.unpack_from(data, offset)
+                offset += _PREFILLED.size
+                prefilled[position] = Transaction.from_bytes(data[offset:offset + length])
+                offset += length
+        except (struct.error, ValueError) as e:
+            raise ProtocolError(f"Malformed compact block: {e}")
+        
+        compact = cls(header, short_ids, prefilled)
+        if any(position >= compact.transaction_count for position in prefilled):
+            raise ProtocolError("Prefilled transaction out of range")
+        return compact
+    
+    def match_pool(self, mempool) -> List[Optional[Transaction]]:
+        """
+        Fill in every transaction position that the pool can supply
+        Positions left as None must be fetched; short IDs shared by two
+        pooled transactions are ambiguous and also left empty
+        """
+        candidates: Dict[bytes, Optional[Transaction]] = {}
+        for tx in mempool.transactions():
+            key = short_id(self.header.hash, tx.tx_id)
+            candidates[key] = None if key in candidates else tx
+        
+        slots: List[Optional[Transaction]] = []
+        ids = iter(self.short_ids)
+        for position in range(self.transaction_count):
+            if position in self.prefilled:
+                slots.append(self.prefilled[position])
+            else:
+                slots.append(candidates.get(next(ids)))
+        return slots
+    
+    def to_block(self, transactions: List[Transaction]) -> Block:
+        """Assemble the full block once every position is filled"""
+        header = self.header
+        return Block(
+            index=header.index,
+            timestamp=header.timestamp,
+            transactions=transactions,
+            previous_hash=header.previous_hash,
+            nonce=header.nonce,
+            version=header.version,
+            target=header.target
+        )
+
+
+def encode_get_block_txn(request_id: int, block_hash: str, positions: List[int]) -> bytes:
+    """Ask for the transactions at the listed positions of a block"""
+    return (_TXN_REQUEST.pack(request_id, bytes.fromhex(block_hash), len(positions))
+            + b"".join(_COUNT.pack(position) for position in positions))
+
+
+def decode_get_block_txn(payload: bytes) -> Tuple[int, str, List[int]]:
+    """Parse a transaction request into (request_id, block_hash, positions)"""
+    try:
+        request_id, block_hash, count = _TXN_REQUEST.unpack_from(payload)
+        if len(payload) != _TXN_REQUEST.size + count * _COUNT.size:
+            raise ProtocolError("Malformed block transaction request")
+        positions = [_COUNT.unpack_from(payload, _TXN_REQUEST.size + i * _COUNT.size)[0]
+                     for i in range(count)]
+    except struct.error:
+        raise ProtocolError("Malformed block transaction request")
+    return request_id, block_hash.hex(), positions
+
+
+def encode_block_txn(request_id: int, transactions: List[Transaction]) -> bytes:
+    """Response with the requested transactions in request order"""
+    parts = [REQUEST_ID.pack(request_id), _COUNT.pack(len(transactions))]
+    for tx in transactions:
+        encoded = tx.to_bytes()
+        parts.append(_COUNT.pack(len(encoded)))
+        parts.append(encoded)
+    return b"".join(parts)
+
+
+def decode_block_txn(body: bytes) -> List[Transaction]:
+    """Parse the body of a block transactions response"""
+    try:
+        count = _COUNT.unpack_from(body)[0]
+        offset = _COUNT.size
+        transactions = []
+        for _ in range(count):
+            length = _COUNT.unpack_from(body, offset)[0]
+            offset += _COUNT.size
+            transactions.append(Transaction.from_bytes(body[offset:offset + length]))
+            offset += length
+    except (struct.error, ValueError) as e:
+        raise ProtocolError(f"Malformed block transactions: {e}")
+    return transactions
@@ -3,9 +3,60 @@ Peer-to-peer networking layer with privacy features
 """
 
 import asyncio
-import json
-from typing import List, Set
+import inspect
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Set, Tuple
 from dataclasses import dataclass
+from bytechan.core.block import Block, BlockHeader
+from bytechan.core.serialization import CodecError
+from bytechan.core.transaction import Transaction
+from bytechan.network.compact import (
+    CompactBlock, CompactRelayStats, decode_block_txn, decode_get_block_txn,
+    encode_block_txn, encode_get_block_txn
+)
+from bytechan.network.protocol import (
+    MAX_FRAME_SIZE, MAX_INVENTORY, MessageType, ProtocolError, decode_blocks,
+    decode_get_blocks, decode_get_headers, decode_hello, decode_inventory, encode_blocks,
+    encode_frame, encode_get_blocks, encode_headers, encode_hello, encode_inventory,
+    read_frame, split_request_id
+)
+from bytechan.network.sync import HeadersFirstSync, SyncStats
+
+
+# Seconds a new connection has to complete the handshake
+HANDSHAKE_TIMEOUT = 10.0
+
+# Seconds to wait for missing transactions of a compact block
+COMPACT_BLOCK_TIMEOUT = 5.0
+
+# How far below the tip compact block transaction requests are served
+COMPACT_BLOCK_DEPTH = 16
+
+# Seconds before a transaction requested from one peer is asked of another
+GET_DATA_TIMEOUT = 2.0
+
+
+class SeenSet:
+    """
+    Bounded set of recently seen IDs
+    Once full, the least recently touched ID is forgotten
+    """
+    
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._items: "OrderedDict[str, None]" = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._items)
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self._items
+    
+    def add(self, key: str):
+        self._items[key] = None
+        self._items.move_to_end(key)
+        if len(self._items) > self.capacity:
+            self._items.popitem(last=False)
 
 
 @dataclass
@@ -17,18 +68,124 @@ class Peer:
     last_seen: float
 
 
+class PeerConnection:
+    """
+    Open stream to one peer.
+    
+    Outgoing frames go through a bounded per-peer queue drained by a
+    writer task that waits for the socket to drain after every write.
+    A slow peer therefore only fills its own queue; once it is full,
+    further frames for that peer are dropped instead of blocking the
+    broadcast to everyone else.
+    """
+    
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                 peer: Peer, outbound: bool, queue_size: int = 1024,
+                 known_capacity: int = 5000):
+        self.reader = reader
+        self.writer = writer
+        self.peer = peer
+        self.outbound = outbound
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        # Transactions this peer already has or was told about
+        self.known = SeenSet(known_capacity)
+        self.pending_inventory: List[str] = []
+        self.frames_sent = 0
+        self.bytes_sent = 0
+        self.frames_dropped = 0
+        self.closed = False
+        self._writer_task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        """Start draining the write queue"""
+        self._writer_task = asyncio.ensure_future(self._write_loop())
+    
+    def send(self, frame: bytes) -> bool:
+        """Queue a frame without waiting, False if the peer is backed up"""
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            self.frames_dropped += 1
+            return False
+    
+    async def _write_loop(self):
+        try:
+            while True:
+                frame = await self.queue.get()
+                try:
+                    self.writer.write(frame)
+                    await self.writer.drain()
+                    self.frames_sent += 1
+                    self.bytes_sent += len(frame)
+                finally:
+                    self.queue.task_done()
+        except ConnectionError:
+            self.closed = True
+    
+    async def flush(self):
+        """Wait until every queued frame has been written"""
+        await self.queue.join()
+    
+    async def close(self):
+        """Stop the writer and close the stream"""
+        self.closed = True
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+            self._writer_task = None
+        if self.writer.is_closing():
+            return
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
 class Network:
     """
     P2P network manager with built-in privacy features
     Supports Tor and I2P for network-level privacy
     """
     
-    def __init__(self, port: int = 18080, use_tor: bool = False):
+    def __init__(self, port: int = 18080, use_tor: bool = False,
+                 host: str = "127.0.0.1", blockchain=None):
         self.port = port
-        self.peers: Set[Peer] = set()
+        self.host = host
+        self.peers: Dict[str, PeerConnection] = {}
         self.use_tor = use_tor
         self.node_id = self._generate_node_id()
         self.max_peers = 50
+        self.write_queue_size = 1024
+        self.blockchain = blockchain
+        self.compact_blocks = True
+        self.compact_stats = CompactRelayStats()
+        self.announce_interval = 0.05
+        self.duplicate_transactions = 0
+        self._seen = SeenSet(50000)
+        self._relay_cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._relay_cache_size = 5000
+        self._requested: Dict[str, float] = {}
+        self._announce_task: Optional[asyncio.Task] = None
+        self.handlers: Dict[MessageType, Callable] = {
+            MessageType.TRANSACTION: self._on_transaction,
+            MessageType.BLOCK: self._on_block,
+            MessageType.GET_HEADERS: self._on_get_headers,
+            MessageType.HEADERS: self._on_response,
+            MessageType.GET_BLOCKS: self._on_get_blocks,
+            MessageType.BLOCKS: self._on_response,
+            MessageType.COMPACT_BLOCK: self._on_compact_block,
+            MessageType.GET_BLOCK_TXN: self._on_get_block_txn,
+            MessageType.BLOCK_TXN: self._on_response,
+            MessageType.INV: self._on_inv,
+            MessageType.GET_DATA: self._on_get_data,
+        }
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._next_request_id = 0
+        self._pending_requests: Dict[Tuple[str, int], asyncio.Future] = {}
     
     def _generate_node_id(self) -> str:
         """Generate unique node identifier"""
@@ -45,6 +202,21 @@ class Network:
         # Start listening for connections
         await self._listen_for_peers()
     
+    async def stop(self):
+        """Stop listening and disconnect from every peer"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        
+        for connection in list(self.peers.values()):
+            await connection.close()
+        self.peers.clear()
+        
+        for task in list(self._tasks):
+            task.cancel()
+        self._announce_task = None
+    
     async def _setup_tor_connection(self):
         """Setup Tor hidden service"""
         # Simplified - production would use actual Tor integration
@@ -53,19 +225,325 @@ class Network:
     
     async def _listen_for_peers(self):
         """Listen for incoming peer connections"""
-        # Simplified implementation
+        self._server = await asyncio.start_server(self._handle_inbound, self.host, self.port)
+        
+        # Port 0 asks the OS for a free port
+        self.port = self._server.sockets[0].getsockname()[1]
         print(f"Listening for peers on port {self.port}")
     
-    def connect_to_peer(self, peer_address: str, peer_port: int):
+    async def _handle_inbound(self, reader: asyncio.StreamReader,
+                              writer: asyncio.StreamWriter):
+        """Accept a connection opened by another node"""
+        if len(self.peers) >= self.max_peers:
+            writer.close()
+            return
+        
+        address = writer.get_extra_info("peername")[0]
+        await self._handshake(reader, writer, address, outbound=False)
+    
+    async def connect_to_peer(self, peer_address: str,
+                              peer_port: int) -> Optional[PeerConnection]:
         """Connect to a specific peer"""
+        if len(self.peers) >= self.max_peers:
+            return None
+        
+        try:
+            reader, writer = await asyncio.open_connection(peer_address, peer_port)
+        except OSError as e:
+            print(f"Could not connect to {peer_address}:{peer_port}: {e}")
+            return None
+        
+        connection = await self._handshake(reader, writer, peer_address, outbound=True)
+        if connection is not None:
+            print(f"Connected to peer: {peer_address}:{peer_port}")
+        return connection
+    
+    async def _handshake(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                         address: str, outbound: bool) -> Optional[PeerConnection]:
+        """Exchange node IDs and register the peer"""
+        try:
+            writer.write(encode_frame(MessageType.HELLO, encode_hello(self.node_id, self.port)))
+            await writer.drain()
+            message_type, payload = await asyncio.wait_for(read_frame(reader), HANDSHAKE_TIMEOUT)
+            if message_type != MessageType.HELLO:
+                raise ProtocolError("Expected handshake")
+            node_id, port = decode_hello(payload)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError,
+                ConnectionError, ProtocolError):
+            writer.close()
+            return None
+        
+        # Refuse ourselves, duplicates and connections beyond the limit
+        if (node_id == self.node_id or node_id in self.peers
+                or len(self.peers) >= self.max_peers):
+            writer.close()
+            return None
+        
         peer = Peer(
-            address=peer_address,
-            port=peer_port,
-            node_id="",
+            address=address,
+            port=port,
+            node_id=node_id,
             last_seen=asyncio.get_event_loop().time()
         )
-        self.peers.add(peer)
-        print(f"Connected to peer: {peer_address}:{peer_port}")
+        connection = PeerConnection(reader, writer, peer, outbound, self.write_queue_size)
+        self.peers[node_id] = connection
+        connection.start()
+        self._spawn(self._read_loop(connection))
+        return connection
+    
+    def _spawn(self, coroutine) -> asyncio.Task:
+        """Run a background task that is cancelled on stop"""
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+    
+    async def _read_loop(self, connection: PeerConnection):
+        """Dispatch incoming frames until the peer disconnects"""
+        try:
+            while True:
+                message_type, payload = await read_frame(connection.reader)
+                connection.peer.last_seen = asyncio.get_event_loop().time()
+                
+                handler = self.handlers.get(message_type)
+                if handler is None:
+                    continue
+                result = handler(connection, payload)
+                if inspect.isawaitable(result):
+                    await result
+        except (asyncio.IncompleteReadError, ConnectionError, ProtocolError, CodecError):
+            pass
+        except Exception as e:
+            # Anything else a peer's bytes trigger drops that peer, not the node
+            print(f"Disconnecting peer {connection.peer.node_id[:16]}: {e!r}")
+        finally:
+            if self.peers.get(connection.peer.node_id) is connection:
+                del self.peers[connection.peer.node_id]
+            await connection.close()
+    
+    def _fan_out(self, frame: bytes, exclude: Optional[PeerConnection] = None) -> int:
+        """Queue a frame on every peer, returns how many accepted it"""
+        queued = 0
+        for connection in list(self.peers.values()):
+            if connection is not exclude and connection.send(frame):
+                queued += 1
+        return queued
+    
+    async def request(self, connection: PeerConnection, message_type: MessageType,
+                      build_payload: Callable[[int], bytes]) -> bytes:
+        """
+        Send a request and wait for the response carrying the same ID
+        build_payload receives the request ID and returns the payload;
+        the response body is returned without its ID
+        """
+        self._next_request_id = (self._next_request_id + 1) & 0xFFFFFFFF
+        key = (connection.peer.node_id, self._next_request_id)
+        future = asyncio.get_event_loop().create_future()
+        self._pending_requests[key] = future
+        try:
+            if not connection.send(encode_frame(message_type, build_payload(key[1]))):
+                raise ConnectionError("Peer is not accepting requests")
+            return await future
+        finally:
+            self._pending_requests.pop(key, None)
+    
+    def _on_response(self, connection: PeerConnection, payload: bytes):
+        """Hand a response to the request waiting for it"""
+        request_id, body = split_request_id(payload)
+        future = self._pending_requests.get((connection.peer.node_id, request_id))
+        if future is not None and not future.done():
+            future.set_result(body)
+    
+    def _on_get_headers(self, connection: PeerConnection, payload: bytes):
+        """Serve a range of block headers"""
+        if self.blockchain is None:
+            return
+        request_id, start, count = decode_get_headers(payload)
+        chain = self.blockchain.chain
+        end = min(len(chain), start + count)
+        headers = [BlockHeader.from_block(chain[height]) for height in range(start, end)]
+        connection.send(encode_frame(MessageType.HEADERS, encode_headers(request_id, headers)))
+    
+    def _on_get_blocks(self, connection: PeerConnection, payload: bytes):
+        """Serve full blocks, as many as fit in one frame"""
+        if self.blockchain is None:
+            return
+        request_id, heights = decode_get_blocks(payload)
+        chain = self.blockchain.chain
+        blocks = []
+        size = 0
+        for height in heights:
+            if height >= len(chain):
+                continue
+            data = chain[height].to_bytes()
+            size += len(data) + 8
+            if size > MAX_FRAME_SIZE:
+                break
+            blocks.append(data)
+        connection.send(encode_frame(MessageType.BLOCKS, encode_blocks(request_id, blocks)))
+    
+    def _on_transaction(self, connection: PeerConnection, payload: bytes):
+        """Accept a transaction body and announce new ones onward"""
+        transaction = Transaction.from_bytes(payload)
+        tx_id = transaction.tx_id
+        connection.known.add(tx_id)
+        self._requested.pop(tx_id, None)
+        
+        # Anything seen before was already accepted once
+        if tx_id in self._seen:
+            self.duplicate_transactions += 1
+            return
+        
+        # A rejected body is not remembered, so another peer's may still be fetched
+        if self.blockchain is None or self.blockchain.add_transaction(transaction):
+            self._seen.add(tx_id)
+            self._cache_for_relay(tx_id, payload)
+            self._queue_announcement(tx_id, exclude=connection)
+    
+    def _on_inv(self, connection: PeerConnection, payload: bytes):
+        """Request announced transactions we have not seen or already asked for"""
+        now = asyncio.get_event_loop().time()
+        wanted = []
+        for tx_id in decode_inventory(payload):
+            connection.known.add(tx_id)
+            if tx_id in self._seen:
+                continue
+            requested_at = self._requested.get(tx_id)
+            if requested_at is not None and now - requested_at < GET_DATA_TIMEOUT:
+                continue
+            self._requested[tx_id] = now
+            wanted.append(tx_id)
+        
+        if wanted:
+            connection.send(encode_frame(MessageType.GET_DATA, encode_inventory(wanted)))
+        
+        # Forget requests that were never answered
+        if len(self._requested) > self._seen.capacity:
+            self._requested = {
+                tx_id: at for tx_id, at in self._requested.items()
+                if now - at < GET_DATA_TIMEOUT
+            }
+    
+    def _on_get_data(self, connection: PeerConnection, payload: bytes):
+        """Send the bodies of requested transactions that we still hold"""
+        for tx_id in decode_inventory(payload):
+            data = self._relay_cache.get(tx_id)
+            if data is None and self.blockchain is not None:
+                transaction = self.blockchain.mempool.get(tx_id)
+                data = transaction.to_bytes() if transaction is not None else None
+            if data is not None:
+                connection.known.add(tx_id)
+                connection.send(encode_frame(MessageType.TRANSACTION, data))
+    
+    def _cache_for_relay(self, tx_id: str, data: bytes):
+        """Keep encoded bodies of recent transactions for GET_DATA"""
+        self._relay_cache[tx_id] = data
+        if len(self._relay_cache) > self._relay_cache_size:
+            self._relay_cache.popitem(last=False)
+    
+    def _queue_announcement(self, tx_id: str, exclude: Optional[PeerConnection] = None) -> int:
+        """Add a transaction to the next inventory batch of every peer lacking it"""
+        queued = 0
+        for connection in list(self.peers.values()):
+            if connection is not exclude and tx_id not in connection.known:
+                connection.pending_inventory.append(tx_id)
+                queued += 1
+        
+        if queued and self._announce_task is None:
+            self._announce_task = self._spawn(self._announce_after_delay())
+        return queued
+    
+    async def _announce_after_delay(self):
+        """Flush batched announcements once the interval has passed"""
+        await asyncio.sleep(self.announce_interval)
+        self._announce_task = None
+        
+        for connection in list(self.peers.values()):
+            pending = [tx_id for tx_id in dict.fromkeys(connection.pending_inventory)
+                       if tx_id not in connection.known]
+            connection.pending_inventory = []
+            for start in range(0, len(pending), MAX_INVENTORY):
+                batch = pending[start:start + MAX_INVENTORY]
+                if connection.send(encode_frame(MessageType.INV, encode_inventory(batch))):
+                    for tx_id in batch:
+                        connection.known.add(tx_id)
+    
+    def _on_block(self, connection: PeerConnection, payload: bytes):
+        """Accept a relayed block and pass it on if it extended our chain"""
+        block = Block.from_bytes(payload)
+        if self.blockchain is not None and self.blockchain.add_block(block):
+            self._fan_out(encode_frame(MessageType.BLOCK, payload), exclude=connection)
+    
+    def _on_compact_block(self, connection: PeerConnection, payload: bytes):
+        """Rebuild an announced block in the background"""
+        # Fetching missing transactions needs this connection's read loop
+        self._spawn(self._accept_compact_block(connection, payload))
+    
+    async def _accept_compact_block(self, connection: PeerConnection, payload: bytes):
+        """
+        Rebuild a compact block from the mempool, fetching whatever is
+        missing, and fall back to the full block if that does not match
+        """
+        if self.blockchain is None:
+            return
+        compact = CompactBlock.from_bytes(payload)
+        header = compact.header
+        if header.index != len(self.blockchain.chain):
+            return
+        
+        stats = self.compact_stats
+        stats.blocks_received += 1
+        slots = compact.match_pool(self.blockchain.mempool)
+        missing = [position for position, tx in enumerate(slots) if tx is None]
+        stats.transactions_from_pool += len(slots) - len(compact.prefilled) - len(missing)
+        
+        try:
+            if missing:
+                body = await asyncio.wait_for(self.request(
+                    connection, MessageType.GET_BLOCK_TXN,
+                    lambda request_id: encode_get_block_txn(request_id, header.hash, missing)
+                ), COMPACT_BLOCK_TIMEOUT)
+                fetched = decode_block_txn(body)
+                stats.transactions_fetched += len(fetched)
+                for position, tx in zip(missing, fetched):
+                    slots[position] = tx
+            
+            block = compact.to_block(slots) if None not in slots else None
+            if block is not None and header.matches(block):
+                if missing:
+                    stats.blocks_completed += 1
+                else:
+                    stats.blocks_reconstructed += 1
+            else:
+                stats.fallbacks += 1
+                body = await asyncio.wait_for(self.request(
+                    connection, MessageType.GET_BLOCKS,
+                    lambda request_id: encode_get_blocks(request_id, [header.index])
+                ), COMPACT_BLOCK_TIMEOUT)
+                blocks = [Block.from_bytes(data) for data in decode_blocks(body)]
+                if not blocks or not header.matches(blocks[0]):
+                    return
+                block = blocks[0]
+        except (asyncio.TimeoutError, ConnectionError, ProtocolError, CodecError):
+            return
+        
+        if self.blockchain.add_block(block):
+            self._fan_out(encode_frame(MessageType.COMPACT_BLOCK, payload), exclude=connection)
+    
+    def _on_get_block_txn(self, connection: PeerConnection, payload: bytes):
+        """Serve transactions of a recent block by position"""
+        if self.blockchain is None:
+            return
+        request_id, block_hash, positions = decode_get_block_txn(payload)
+        chain = self.blockchain.chain
+        transactions = []
+        for height in range(len(chain) - 1, max(len(chain) - 1 - COMPACT_BLOCK_DEPTH, -1), -1):
+            block = chain[height]
+            if block.hash == block_hash:
+                transactions = [block.transactions[position] for position in positions
+                                if position < len(block.transactions)]
+                break
+        connection.send(encode_frame(MessageType.BLOCK_TXN, encode_block_txn(request_id, transactions)))
     
     def broadcast_transaction(self, transaction) -> bool:
         """Broadcast transaction to all peers"""
@@ -73,32 +551,42 @@ class Network:
             print("No peers connected. Transaction stored locally.")
             return False
         
-        tx_data = json.dumps(transaction.to_dict())
         print(f"Broadcasting transaction {transaction.tx_id[:16]}... to {len(self.peers)} peers")
         
-        # In production, actually send to peers
-        return True
+        # Peers are sent an announcement and fetch the body if they need it
+        self._seen.add(transaction.tx_id)
+        self._cache_for_relay(transaction.tx_id, transaction.to_bytes())
+        return self._queue_announcement(transaction.tx_id) > 0
     
     def broadcast_block(self, block) -> bool:
         """Broadcast newly mined block"""
         if len(self.peers) == 0:
             return False
         
-        block_data = json.dumps(block.to_dict())
         print(f"Broadcasting block {block.index} to network")
-        return True
+        if self.compact_blocks:
+            frame = encode_frame(MessageType.COMPACT_BLOCK, CompactBlock.from_block(block).to_bytes())
+        else:
+            frame = encode_frame(MessageType.BLOCK, block.to_bytes())
+        return self._fan_out(frame) > 0
     
     def get_mixin_outputs(self, count: int) -> List[str]:
         """
-        Get random outputs from blockchain for use as mixins in ring signatures
+        Get outputs from the blockchain for use as mixins in ring signatures
+        They are sampled by age from the chain's global output index
         """
-        # Simplified - production would query actual UTXO set
-        import secrets
-        mixins = [f"output_{secrets.token_hex(16)}" for _ in range(count)]
-        return mixins
+        if self.blockchain is None:
+            raise ValueError("No blockchain to sample outputs from")
+        return self.blockchain.outputs.sample_members(count)
     
-    def sync_blockchain(self, blockchain):
-        """Synchronize blockchain with network"""
+    async def sync_blockchain(self, blockchain=None, **options) -> SyncStats:
+        """
+        Synchronize blockchain with network
+        Headers are fetched first, then bodies in parallel from every
+        connected peer; options are passed to HeadersFirstSync
+        """
+        blockchain = self.blockchain if blockchain is None else blockchain
         print("Syncing with network...")
-        # In production, request blocks from peers
-        print("Blockchain synchronized")
+        stats = await HeadersFirstSync(self, blockchain, **options).run()
+        print(f"Blockchain synchronized: {stats.blocks} new blocks")
+        return stats
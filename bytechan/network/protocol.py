@@ -0,0 +1,187 @@
+"""
+Wire protocol framing for ByteChan peer connections
+"""
+
+import asyncio
+import struct
+from enum import IntEnum
+from typing import List, Tuple
+from bytechan.core.block import BlockHeader
+
+
+# Every frame is a length-prefixed payload tagged with a message type
+FRAME_HEADER = struct.Struct("<IB")
+MAX_FRAME_SIZE = 32 * 1024 * 1024
+
+HELLO_PAYLOAD = struct.Struct("<16sH")
+
+# Requests carry an ID that the matching response echoes back
+REQUEST_ID = struct.Struct("<I")
+GET_HEADERS_PAYLOAD = struct.Struct("<IQH")
+BLOCK_COUNT = struct.Struct("<H")
+BLOCK_HEIGHT = struct.Struct("<Q")
+BLOCK_LENGTH = struct.Struct("<I")
+MAX_HEADERS_PER_REQUEST = 2000
+MAX_BLOCKS_PER_REQUEST = 128
+
+# Inventory lists: count followed by raw 32-byte transaction IDs
+INVENTORY_COUNT = struct.Struct("<H")
+MAX_INVENTORY = 1000
+
+
+class MessageType(IntEnum):
+    """Message types understood by peers"""
+    HELLO = 1
+    TRANSACTION = 2
+    BLOCK = 3
+    GET_HEADERS = 4
+    HEADERS = 5
+    GET_BLOCKS = 6
+    BLOCKS = 7
+    COMPACT_BLOCK = 8
+    GET_BLOCK_TXN = 9
+    BLOCK_TXN = 10
+    INV = 11
+    GET_DATA = 12
+
+
+class ProtocolError(Exception):
+    """Raised when a peer sends data that violates the protocol"""
+
+
+def encode_frame(message_type: int, payload: bytes = b"") -> bytes:
+    """Frame a payload for sending"""
+    if len(payload) > MAX_FRAME_SIZE:
+        raise ProtocolError(f"Payload of {len(payload)} bytes exceeds frame limit")
+    return FRAME_HEADER.pack(len(payload), message_type) + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Tuple[MessageType, bytes]:
+    """Read one complete frame from a stream"""
+    header = await reader.readexactly(FRAME_HEADER.size)
+    length, message_type = FRAME_HEADER.unpack(header)
+    if length > MAX_FRAME_SIZE:
+        raise ProtocolError(f"Frame of {length} bytes exceeds limit")
+    
+    try:
+        message_type = MessageType(message_type)
+    except ValueError:
+        raise ProtocolError(f"Unknown message type {message_type}")
+    
+    payload = await reader.readexactly(length) if length else b""
+    return message_type, payload
+
+
+def encode_hello(node_id: str, port: int) -> bytes:
+    """Handshake payload: 16-byte node ID and listening port"""
+    return HELLO_PAYLOAD.pack(bytes.fromhex(node_id), port)
+
+
+def decode_hello(payload: bytes) -> Tuple[str, int]:
+    """Parse a handshake payload into (node_id, port)"""
+    try:
+        node_id, port = HELLO_PAYLOAD.unpack(payload)
+    except struct.error:
+        raise ProtocolError("Malformed handshake")
+    return node_id.hex(), port
+
+
+def split_request_id(payload: bytes) -> Tuple[int, bytes]:
+    """Separate a response into (request_id, body)"""
+    if len(payload) < REQUEST_ID.size:
+        raise ProtocolError("Missing request ID")
+    return REQUEST_ID.unpack_from(payload)[0], payload[REQUEST_ID.size:]
+
+
+def encode_get_headers(request_id: int, start: int, count: int) -> bytes:
+    """Ask for up to count headers starting at a height"""
+    return GET_HEADERS_PAYLOAD.pack(request_id, start, min(count, MAX_HEADERS_PER_REQUEST))
+
+
+def decode_get_headers(payload: bytes) -> Tuple[int, int, int]:
+    """Parse a header request into (request_id, start, count)"""
+    try:
+        request_id, start, count = GET_HEADERS_PAYLOAD.unpack(payload)
+    except struct.error:
+        raise ProtocolError("Malformed header request")
+    return request_id, start, min(count, MAX_HEADERS_PER_REQUEST)
+
+
+def encode_headers(request_id: int, headers: List[BlockHeader]) -> bytes:
+    """Response body: fixed-size headers back to back"""
+    return REQUEST_ID.pack(request_id) + b"".join(header.to_bytes() for header in headers)
+
+
+def decode_headers(body: bytes) -> List[BlockHeader]:
+    """Parse the body of a headers response"""
+    size = BlockHeader.WIRE_SIZE
+    if len(body) % size:
+        raise ProtocolError("Malformed headers response")
+    return [BlockHeader.from_bytes(body[offset:offset + size])
+            for offset in range(0, len(body), size)]
+
+
+def encode_get_blocks(request_id: int, heights: List[int]) -> bytes:
+    """Ask for the blocks at the listed heights"""
+    if len(heights) > MAX_BLOCKS_PER_REQUEST:
+        raise ProtocolError(f"Cannot request more than {MAX_BLOCKS_PER_REQUEST} blocks")
+    return (REQUEST_ID.pack(request_id) + BLOCK_COUNT.pack(len(heights))
+            + b"".join(BLOCK_HEIGHT.pack(height) for height in heights))
+
+
+def decode_get_blocks(payload: bytes) -> Tuple[int, List[int]]:
+    """Parse a block request into (request_id, heights)"""
+    try:
+        request_id, body = split_request_id(payload)
+        count = BLOCK_COUNT.unpack_from(body)[0]
+        if count > MAX_BLOCKS_PER_REQUEST or len(body) != BLOCK_COUNT.size + count * BLOCK_HEIGHT.size:
+            raise ProtocolError("Malformed block request")
+        heights = [BLOCK_HEIGHT.unpack_from(body, BLOCK_COUNT.size + i * BLOCK_HEIGHT.size)[0]
+                   for i in range(count)]
+    except struct.error:
+        raise ProtocolError("Malformed block request")
+    return request_id, heights
+
+
+def encode_blocks(request_id: int, blocks: List[bytes]) -> bytes:
+    """Response body: length-prefixed encoded blocks"""
+    parts = [REQUEST_ID.pack(request_id)]
+    for data in blocks:
+        parts.append(BLOCK_LENGTH.pack(len(data)))
+        parts.append(data)
+    return b"".join(parts)
+
+
+def decode_blocks(body: bytes) -> List[bytes]:
+    """Split the body of a blocks response into encoded blocks"""
+    blocks = []
+    offset = 0
+    while offset < len(body):
+        if offset + BLOCK_LENGTH.size > len(body):
+            raise ProtocolError("Truncated blocks response")
+        length = BLOCK_LENGTH.unpack_from(body, offset)[0]
+        offset += BLOCK_LENGTH.size
+        if offset + length > len(body):
+            raise ProtocolError("Truncated blocks response")
+        blocks.append(body[offset:offset + length])
+        offset += length
+    return blocks
+
+
+def encode_inventory(tx_ids: List[str]) -> bytes:
+    """Announce or request transactions by ID"""
+    if len(tx_ids) > MAX_INVENTORY:
+        raise ProtocolError(f"Cannot list more than {MAX_INVENTORY} transactions")
+    return INVENTORY_COUNT.pack(len(tx_ids)) + b"".join(bytes.fromhex(tx_id) for tx_id in tx_ids)
+
+
+def decode_inventory(payload: bytes) -> List[str]:
+    """Parse an inventory list into transaction IDs"""
+    try:
+        count = INVENTORY_COUNT.unpack_from(payload)[0]
+    except struct.error:
+        raise ProtocolError("Malformed inventory")
+    if count > MAX_INVENTORY or len(payload) != INVENTORY_COUNT.size + count * 32:
+        raise ProtocolError("Malformed inventory")
+    start = INVENTORY_COUNT.size
+    return [payload[offset:offset + 32].hex() for offset in range(start, len(payload), 32)]
@@ -0,0 +1,221 @@
+"""
+Headers-first block download
+"""
+
+import asyncio
+import heapq
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+from bytechan.core.block import Block, BlockHeader, BLOCK_VERSION_LEGACY
+from bytechan.core.difficulty import target_to_work
+from bytechan.core.serialization import CodecError
+from bytechan.network.protocol import (
+    MAX_BLOCKS_PER_REQUEST, MAX_HEADERS_PER_REQUEST, MessageType, ProtocolError,
+    decode_blocks, decode_headers, encode_get_blocks, encode_get_headers
+)
+
+
+class SyncError(Exception):
+    """Raised when the chain cannot be downloaded from the available peers"""
+
+
+@dataclass
+class SyncStats:
+    """Counters from one synchronization run"""
+    headers: int = 0
+    blocks: int = 0
+    requests: int = 0
+    stalls: int = 0
+    rejected: int = 0
+
+
+class HeadersFirstSync:
+    """
+    Download the chain headers first, then the block bodies in parallel.
+    
+    Every peer is asked for its header chain at once, up to max_headers
+    above our tip per run. Each chain is checked for linkage, the stored
+    hash, proof of work against the committed target, and a target no
+    easier than the retarget over the headers before it calls for,
+    before any body is requested; legacy headers prove no work and are
+    refused. The valid chain with the most work is kept; longer chains
+    win ties. Bodies are then
+    requested in batches from every peer that offered that chain,
+    limited to a sliding window ahead of the next height to append so
+    memory stays bounded. A request that times out is
+    handed to another peer and the slow peer is dropped after repeated
+    stalls. Blocks are checked against their header and appended to the
+    chain strictly in order as soon as the next height is available.
+    """
+    
+    def __init__(self, network, blockchain, window: int = 256, batch_size: int = 16,
+                 request_timeout: float = 5.0, max_stalls: int = 3,
+                 max_headers: int = 50 * MAX_HEADERS_PER_REQUEST):
+        self.network = network
+        self.blockchain = blockchain
+        self.max_headers = max_headers
+        self.window = window
+        self.batch_size = min(batch_size, MAX_BLOCKS_PER_REQUEST)
+        self.request_timeout = request_timeout
+        self.max_stalls = max_stalls
+        self.stats = SyncStats()
+    
+    async def run(self, peers=None) -> SyncStats:
+        """Bring the blockchain up to the best header chain among peers"""
+        peers = list(self.network.peers.values() if peers is None else peers)
+        if not peers:
+            raise SyncError("No peers to sync from")
+        
+        headers, sources = await self._download_headers(peers)
+        if headers:
+            await self._download_bodies(headers, sources)
+        return self.stats
+    
+    async def _request(self, connection, message_type: MessageType, build):
+        self.stats.requests += 1
+        return await asyncio.wait_for(
+            self.network.request(connection, message_type, build),
+            self.request_timeout
+        )
+    
+    async def _download_headers(self, peers) -> Tuple[List[BlockHeader], list]:
+        """
+        Fetch and validate headers above our tip from every peer and keep
+        the chain with the most work. Returns it with the peers that
+        offered it
+        """
+        results = await asyncio.gather(*(self._headers_from(connection) for connection in peers),
+                                       return_exceptions=True)
+        best: List[BlockHeader] = []
+        best_rank = None
+        sources = []
+        for connection, result in zip(peers, results):
+            if isinstance(result, (asyncio.TimeoutError, ConnectionError, ProtocolError, ValueError)):
+                self.stats.stalls += 1
+                continue
+            if isinstance(result, BaseException):
+                raise result
+            
+            rank = (self._chain_work(result), len(result))
+            if best_rank is None or rank > best_rank:
+                best, best_rank, sources = result, rank, [connection]
+            elif rank == best_rank and result and result[-1].hash == best[-1].hash:
+                sources.append(connection)
+        
+        if best_rank is None:
+            raise SyncError("No peer returned a valid header chain")
+        self.stats.headers = len(best)
+        return best, sources
+    
+    def _chain_work(self, headers: List[BlockHeader]) -> int:
+        """Expected hashes behind a header chain; legacy headers prove none"""
+        return sum(target_to_work(header.target) for header in headers
+                   if header.version != BLOCK_VERSION_LEGACY)
+    
+    async def _headers_from(self, connection) -> List[BlockHeader]:
+        tip = self.blockchain.get_latest_block()
+        previous_hash = tip.hash
+        version = tip.version
+        # Header targets are checked against a retarget replayed past our tip
+        window = self.blockchain.retarget.copy()
+        headers: List[BlockHeader] = []
+        
+        while True:
+            start = tip.index + 1 + len(headers)
+            count = min(MAX_HEADERS_PER_REQUEST, self.max_headers - len(headers))
+            body = await self._request(
+                connection, MessageType.GET_HEADERS,
+                lambda request_id: encode_get_headers(request_id, start, count)
+            )
+            batch = decode_headers(body)
+            if len(batch) > count:
+                raise ProtocolError("More headers than requested")
+            for header in batch:
+                if (header.index != start
+                        or header.previous_hash != previous_hash
+                        or header.version < version
+                        or header.target > self.blockchain.next_target(header.version, window)
+                        or not header.is_self_consistent()):
+                    raise ProtocolError(f"Invalid header at height {start}")
+                headers.append(header)
+                window.add_block(header.timestamp, header.target)
+                previous_hash = header.hash
+                version = header.version
+                start += 1
+            
+            # A short batch ends the peer's chain; the rest waits for the next run
+            if len(batch) < count or len(headers) >= self.max_headers:
+                return headers
+    
+    async def _download_bodies(self, headers: List[BlockHeader], peers):
+        base = headers[0].index
+        total = len(headers)
+        missing = list(range(total))  # offsets not yet requested, min-heap
+        received: Dict[int, Block] = {}
+        in_flight: Dict[asyncio.Future, tuple] = {}
+        stalls = {id(connection): 0 for connection in peers}
+        idle = list(peers)
+        next_offset = 0
+        
+        try:
+            while next_offset < total:
+                # Hand out batches inside the window to every idle peer
+                limit = next_offset + self.window
+                while idle and missing and missing[0] < limit:
+                    batch = []
+                    while missing and missing[0] < limit and len(batch) < self.batch_size:
+                        batch.append(heapq.heappop(missing))
+                    connection = idle.pop(0)
+                    task = asyncio.ensure_future(self._fetch(connection, [base + o for o in batch]))
+                    in_flight[task] = (connection, batch)
+                
+                if not in_flight:
+                    raise SyncError("Every peer stalled")
+                
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    connection, batch = in_flight.pop(task)
+                    try:
+                        blocks = task.result()
+                    except (asyncio.TimeoutError, ConnectionError, ProtocolError, CodecError):
+                        # Give the heights to someone else, keep this peer only if it recovers
+                        self.stats.stalls += 1
+                        stalls[id(connection)] += 1
+                        for offset in batch:
+                            heapq.heappush(missing, offset)
+                        if stalls[id(connection)] < self.max_stalls and not connection.closed:
+                            idle.append(connection)
+                        continue
+                    
+                    by_height = {block.index: block for block in blocks}
+                    complete = True
+                    for offset in batch:
+                        block = by_height.get(base + offset)
+                        if block is not None and headers[offset].matches(block):
+                            received[offset] = block
+                        else:
+                            self.stats.rejected += 1
+                            complete = False
+                            heapq.heappush(missing, offset)
+                    
+                    # Missing or mismatched bodies count against the peer like a stall
+                    if not complete:
+                        stalls[id(connection)] += 1
+                    if stalls[id(connection)] < self.max_stalls:
+                        idle.append(connection)
+                
+                while next_offset in received:
+                    if not self.blockchain.add_block(received.pop(next_offset)):
+                        raise SyncError(f"Block {base + next_offset} was rejected by the chain")
+                    self.stats.blocks += 1
+                    next_offset += 1
+        finally:
+            for task in in_flight:
+                task.cancel()
+    
+    async def _fetch(self, connection, heights: List[int]) -> List[Block]:
+        body = await self._request(
+            connection, MessageType.GET_BLOCKS,
+            lambda request_id: encode_get_blocks(request_id, heights)
+        )
+        return [Block.from_bytes(data) for data in decode_blocks(body)]
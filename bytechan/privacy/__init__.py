@@ -0,0 +1,11 @@
+"""
+Enhanced privacy features
+"""
+
+from bytechan.privacy.mixing import TransactionMixer
+from bytechan.privacy.messaging import SecureMessaging
+
+__all__ = [
+    "TransactionMixer",
+    "SecureMessaging",
+]
@@ -0,0 +1,16 @@
+"""
+Wallet functionality
+"""
+
+from bytechan.wallet.wallet import Wallet
+from bytechan.wallet.scanner import StealthScanner, ScanResult
+from bytechan.wallet.sync import WalletSync, WalletTransfer, SyncResult
+
+__all__ = [
+    "Wallet",
+    "StealthScanner",
+    "ScanResult",
+    "WalletSync",
+    "WalletTransfer",
+    "SyncResult",
+]
@@ -0,0 +1,125 @@
+"""
+Multi-wallet stealth output scanning
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from bytechan.crypto.stealth_address import (
+    StealthAddress, derive_shared_secret, derive_stealth_address, view_tag
+)
+
+
+def _match_outputs(keys: List[Tuple[str, str, str]],
+                   outputs: List[Tuple[int, int, str, str, Optional[int]]]) -> List[Tuple[str, int, int]]:
+    """
+    Process pool task: match candidate outputs against every wallet
+    keys are (wallet_id, view_key, spend_key); outputs are (height,
+    position, stealth_address, tx_public_key, view_tag). Returns
+    (wallet_id, height, position) for each owned output
+    """
+    matches = []
+    for height, position, address, tx_public_key, tag in outputs:
+        for wallet_id, view_key, spend_key in keys:
+            shared_secret = derive_shared_secret(tx_public_key, view_key)
+            if tag is not None and view_tag(shared_secret) != tag:
+                continue
+            if derive_stealth_address(shared_secret, spend_key) == address:
+                matches.append((wallet_id, height, position))
+                break
+    return matches
+
+
+@dataclass
+class ScanResult:
+    """Outputs found by one scan, per wallet, and where to resume"""
+    outputs: Dict[str, List[dict]] = field(default_factory=dict)
+    start_height: int = 0
+    next_height: int = 0
+
+
+class StealthScanner:
+    """
+    Scans the chain for outputs of many wallets at once.
+    
+    Every block is read once and each output is tested against all
+    wallets' view keys, with the view tag rejecting almost every
+    foreign output after a single hash. Block ranges can be spread over
+    a process pool. The scanner remembers the next height to scan, and
+    save/load persist it so a restarted service resumes where it
+    stopped. Outputs without a transaction public key cannot be
+    attributed to a wallet and are skipped.
+    """
+    
+    def __init__(self, wallets: Dict[str, StealthAddress], workers: int = 1,
+                 chunk_size: int = 256, next_height: int = 0):
+        self.wallets = dict(wallets)
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.next_height = next_height
+    
+    def _keys(self) -> List[Tuple[str, str, str]]:
+        return [(wallet_id, stealth.view_key, stealth.spend_key)
+                for wallet_id, stealth in self.wallets.items()]
+    
+    @staticmethod
+    def _candidates(blockchain, start: int, end: int) -> List[tuple]:
+        """Outputs in [start, end) that carry a transaction public key"""
+        candidates = []
+        for height in range(start, end):
+            for position, tx in enumerate(blockchain.chain[height].transactions):
+                if tx.stealth_address and tx.tx_public_key is not None:
+                    candidates.append(
+                        (height, position, tx.stealth_address, tx.tx_public_key, tx.view_tag)
+                    )
+        return candidates
+    
+    def scan(self, blockchain, end_height: Optional[int] = None) -> ScanResult:
+        """Scan from the saved height up to end_height (default: the tip)"""
+        end = len(blockchain.chain) if end_height is None else min(end_height, len(blockchain.chain))
+        start = min(self.next_height, end)
+        keys = self._keys()
+        ranges = [(low, min(low + self.chunk_size, end))
+                  for low in range(start, end, self.chunk_size)]
+        
+        if self.workers > 1 and len(ranges) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                futures = [pool.submit(_match_outputs, keys, self._candidates(blockchain, low, high))
+                           for low, high in ranges]
+                matches = [match for future in futures for match in future.result()]
+        else:
+            matches = []
+            for low, high in ranges:
+                matches.extend(_match_outputs(keys, self._candidates(blockchain, low, high)))
+        
+        result = ScanResult({wallet_id: [] for wallet_id in self.wallets}, start, end)
+        for wallet_id, height, position in matches:
+            tx = blockchain.chain[height].transactions[position]
+            result.outputs[wallet_id].append({
+                "tx_id": tx.tx_id,
+                "amount": tx.amount,
+                "stealth_address": tx.stealth_address,
+                "block": height,
+                "position": position
+            })
+        
+        self.next_height = end
+        return result
+    
+    def save(self, path: str):
+        """Persist the resume height"""
+        temporary = path + ".tmp"
+        with open(temporary, "w") as f:
+            json.dump({"next_height": self.next_height}, f)
+        os.replace(temporary, path)
+    
+    @classmethod
+    def load(cls, path: str, wallets: Dict[str, StealthAddress], **options) -> 'StealthScanner':
+        """Create a scanner that resumes from a saved height, if any"""
+        next_height = 0
+        if os.path.exists(path):
+            with open(path) as f:
+                next_height = json.load(f)["next_height"]
+        return cls(wallets, next_height=next_height, **options)
@@ -0,0 +1,191 @@
+"""
+Incremental wallet synchronization
+"""
+
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Tuple
+from bytechan.wallet.wallet import Wallet
+
+
+@dataclass
+class WalletTransfer:
+    """A transaction moving funds into or out of a synced wallet"""
+    tx_id: str
+    height: int
+    position: int
+    address: str
+    amount: float
+    incoming: bool
+
+
+@dataclass
+class WalletState:
+    """Everything the sync engine knows about one wallet"""
+    transfers: List[WalletTransfer] = field(default_factory=list)
+    balance: float = 0.0
+    
+    @property
+    def outputs(self) -> List[WalletTransfer]:
+        """Owned outputs: every transfer into the wallet"""
+        return [transfer for transfer in self.transfers if transfer.incoming]
+    
+    def apply(self, transfer: WalletTransfer):
+        self.transfers.append(transfer)
+        # Same operation order as the chain's balance index
+        if transfer.incoming:
+            self.balance = self.balance + transfer.amount
+        else:
+            self.balance = self.balance - transfer.amount
+    
+    def truncate(self, height: int):
+        """Forget transfers above a height and recompute the balance"""
+        kept = [transfer for transfer in self.transfers if transfer.height <= height]
+        self.transfers = []
+        self.balance = 0.0
+        for transfer in kept:
+            self.apply(transfer)
+
+
+@dataclass
+class SyncResult:
+    """What one refresh changed"""
+    new_transfers: Dict[str, List[WalletTransfer]]
+    rolled_back: int
+    height: int
+
+
+class WalletSync:
+    """
+    Keeps a set of wallets in step with the chain.
+    
+    The engine stores a cursor (the next height to scan) with the hashes
+    of the most recent scanned blocks, plus each wallet's transfers and
+    balance. A refresh first walks those hashes back to the newest block
+    still on the chain, drops anything above it, and then scans only the
+    blocks after the cursor, matching every wallet in the same pass.
+    A reorg deeper than max_reorg_depth falls back to a full rescan.
+    """
+    
+    def __init__(self, wallets: Dict[str, Wallet], max_reorg_depth: int = 100):
+        self.wallets = dict(wallets)
+        self.max_reorg_depth = max_reorg_depth
+        self.height = 0
+        self.recent_hashes: List[Tuple[int, str]] = []
+        self.states: Dict[str, WalletState] = {wallet_id: WalletState() for wallet_id in self.wallets}
+    
+    @property
+    def cursor(self) -> Optional[Tuple[int, str]]:
+        """Height and hash of the last scanned block"""
+        return self.recent_hashes[-1] if self.recent_hashes else None
+    
+    def balance(self, wallet_id: str) -> float:
+        return self.states[wallet_id].balance
+    
+    def outputs(self, wallet_id: str) -> List[WalletTransfer]:
+        return self.states[wallet_id].outputs
+    
+    def refresh(self, blockchain) -> SyncResult:
+        """Roll back past any reorg, then scan the new blocks"""
+        rolled_back = self._rewind(blockchain)
+        new_transfers: Dict[str, List[WalletTransfer]] = {wallet_id: [] for wallet_id in self.wallets}
+        
+        addresses = {wallet.get_address(): wallet_id for wallet_id, wallet in self.wallets.items()}
+        stealth = [(wallet_id, wallet.stealth_generator) for wallet_id, wallet in self.wallets.items()]
+        
+        for height in range(self.height, len(blockchain.chain)):
+            block = blockchain.chain[height]
+            for position, tx in enumerate(block.transactions):
+                for transfer, wallet_id in self._match(tx, height, position, addresses, stealth):
+                    self.states[wallet_id].apply(transfer)
+                    new_transfers[wallet_id].append(transfer)
+            self._remember(height, block.hash)
+        
+        self.height = len(blockchain.chain)
+        for wallet_id, wallet in self.wallets.items():
+            wallet.balance = self.states[wallet_id].balance
+        return SyncResult(new_transfers, rolled_back, self.height)
+    
+    @staticmethod
+    def _match(tx, height: int, position: int, addresses: Dict[str, str], stealth):
+        """Transfers of one transaction that concern any synced wallet"""
+        sender = addresses.get(tx.sender)
+        if sender is not None:
+            yield WalletTransfer(tx.tx_id, height, position, tx.sender, tx.amount, False), sender
+        
+        receiver = addresses.get(tx.recipient)
+        if receiver is None and tx.stealth_address and tx.tx_public_key is not None:
+            for wallet_id, generator in stealth:
+                if generator.owns_output(tx.stealth_address, tx.tx_public_key, tx.view_tag):
+                    receiver = wallet_id
+                    break
+        if receiver is not None:
+            yield WalletTransfer(tx.tx_id, height, position, tx.recipient, tx.amount, True), receiver
+    
+    def _remember(self, height: int, block_hash: str):
+        self.recent_hashes.append((height, block_hash))
+        if len(self.recent_hashes) > self.max_reorg_depth:
+            del self.recent_hashes[0]
+    
+    def _rewind(self, blockchain) -> int:
+        """Drop blocks that are no longer on the chain, returns how many"""
+        chain = blockchain.chain
+        while self.recent_hashes:
+            height, block_hash = self.recent_hashes[-1]
+            if height < len(chain) and chain[height].hash == block_hash:
+                break
+            self.recent_hashes.pop()
+        
+        if self.recent_hashes:
+            fork_height = self.recent_hashes[-1][0]
+        elif self.height:
+            fork_height = -1  # Deeper than the remembered hashes: rescan everything
+        else:
+            return 0
+        
+        rolled_back = self.height - 1 - fork_height
+        if rolled_back:
+            for state in self.states.values():
+                state.truncate(fork_height)
+            self.height = fork_height + 1
+        return rolled_back
+    
+    def save(self, path: str):
+        """Persist the cursor and every wallet's transfers"""
+        data = {
+            "height": self.height,
+            "recent_hashes": self.recent_hashes,
+            "wallets": {
+                wallet_id: [asdict(transfer) for transfer in state.transfers]
+                for wallet_id, state in self.states.items()
+            }
+        }
+        temporary = path + ".tmp"
+        with open(temporary, "w") as f:
+            json.dump(data, f)
+        os.replace(temporary, path)
+    
+    @classmethod
+    def load(cls, path: str, wallets: Dict[str, Wallet], **options) -> 'WalletSync':
+        """
+        Restore a saved engine, if any
+        Wallets missing from the saved state start from height 0, which
+        means the whole engine rescans once
+        """
+        engine = cls(wallets, **options)
+        if not os.path.exists(path):
+            return engine
+        
+        with open(path) as f:
+            data = json.load(f)
+        saved = data["wallets"]
+        if any(wallet_id not in saved for wallet_id in engine.wallets):
+            return engine
+        
+        engine.height = data["height"]
+        engine.recent_hashes = [tuple(entry) for entry in data["recent_hashes"]]
+        for wallet_id, state in engine.states.items():
+            for transfer in saved[wallet_id]:
+                state.apply(WalletTransfer(**transfer))
+        return engine
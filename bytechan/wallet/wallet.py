@@ -4,8 +4,11 @@ Wallet implementation for ByteChan
 
 import hashlib
 import secrets
-from typing import Optional
+from typing import Optional, Tuple
+from bytechan.core.outputs import output_member
+from bytechan.core.transaction import Transaction
 from bytechan.crypto.keys import KeyPair
+from bytechan.crypto.ring_signature import RingSignature
 from bytechan.crypto.stealth_address import StealthAddress
 
 
@@ -36,13 +39,55 @@ class Wallet:
         """Generate a new stealth address"""
         return self.stealth_generator.generate_stealth_address()
     
+    def get_stealth_output(self) -> dict:
+        """Generate a stealth address with its transaction public key and view tag"""
+        return self.stealth_generator.generate_stealth_output()
+    
     def get_seed(self) -> str:
         """Get the wallet seed (backup)"""
         return self.seed
     
     def sign_transaction(self, transaction) -> str:
-        """Sign a transaction with private key"""
-        return self.keypair.sign(transaction.tx_id)
+        """
+        Sign a transaction with private key
+        The transaction is sealed: it can no longer be edited directly
+        """
+        return self.keypair.sign(transaction.seal().tx_id)
+    
+    def create_ring_transaction(self, recipient: str, amount: float, blockchain,
+                                ring_size: int = 11, spend: Optional[Tuple[int, int]] = None,
+                                privacy_level: str = "HIGH") -> Transaction:
+        """
+        Build a ring-signed transaction
+        spend is the (height, position) of the output being spent, by
+        default the wallet's newest incoming output; the rest of the ring
+        is decoys sampled from the chain's output index
+        """
+        if spend is None:
+            spend = self._newest_output(blockchain)
+        real_member = output_member(blockchain.outputs.number(*spend))
+        
+        ring_signature = RingSignature(ring_size=ring_size)
+        ring = ring_signature.generate_ring(real_member, outputs=blockchain.outputs)
+        tx = Transaction(
+            sender=self.get_address(),
+            recipient=recipient,
+            amount=amount,
+            privacy_level=privacy_level
+        )
+        # A one-time key per output gives each output its own key image
+        signature = ring_signature.sign(tx.tx_id, self.keypair.private_key + real_member, ring)
+        tx.apply_ring_signature(ring_size=ring_size, signature=signature)
+        return tx
+    
+    def _newest_output(self, blockchain) -> Tuple[int, int]:
+        """(height, position) of the most recent output paid to this wallet"""
+        address = self.get_address()
+        for height in range(len(blockchain.chain) - 1, -1, -1):
+            for position, tx in enumerate(blockchain.chain[height].transactions):
+                if tx.recipient == address:
+                    return height, position
+        raise ValueError("Wallet has no outputs to spend")
     
     def update_balance(self, blockchain):
         """Update wallet balance from blockchain"""
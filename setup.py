@@ -38,6 +38,10 @@ setup(
         "pytest>=7.4.0",
     ],
     extras_require={
+        # NumPy-backed batch paths; everything falls back to pure Python without it
+        "fast": [
+            "numpy>=1.24.0",
+        ],
         "dev": [
             "pytest>=7.4.0",
             "pytest-cov>=4.1.0",
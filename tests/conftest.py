@@ -0,0 +1,19 @@
+"""
+Shared fixtures for the test suite
+"""
+
+import pytest
+from bytechan import Blockchain
+
+
+@pytest.fixture
+def new_chain():
+    """
+    Factory for chains held at difficulty 1, so blocks mined back to back
+    or built by hand at difficulty 1 extend them; options go to Blockchain
+    """
+    def make(**options):
+        blockchain = Blockchain(fixed_difficulty=True, **options)
+        blockchain.difficulty = 1
+        return blockchain
+    return make
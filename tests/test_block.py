@@ -0,0 +1,283 @@
+"""
+Unit tests for block hashing and serialization
+"""
+
+import hashlib
+import json
+import pytest
+from bytechan import Blockchain, Block, Transaction, Wallet
+from bytechan.core import block as block_module
+from bytechan.core.block import BlockHeader, BLOCK_VERSION_LEGACY, BLOCK_VERSION_HEADER, HEADER_SIZE, NONCE
+from bytechan.core.merkle import MerkleTree
+from bytechan.core.serialization import CodecError, _pack_number
+
+
+def _make_transactions(count):
+    """Create simple transfers between fresh wallets"""
+    return [
+        Transaction(sender=f"bc1sender{i}", recipient=f"bc1recipient{i}", amount=1.0 + i)
+        for i in range(count)
+    ]
+
+
+def _tamper(block, position, **fields):
+    """Swap in an edited copy of a sealed transaction, as a forger would"""
+    tx = block.transactions[position]
+    block.transactions[position] = Transaction.from_dict({**tx.to_dict(), **fields})
+
+
+def test_header_hash_uses_prefix_and_nonce():
+    """Test header blocks hash the fixed prefix followed by the nonce"""
+    block = Block(index=1, timestamp=1704067300.0, transactions=_make_transactions(3),
+                  previous_hash="ab" * 32, nonce=42)
+    
+    prefix = block.header_prefix()
+    assert len(prefix) + NONCE.size == HEADER_SIZE
+    assert block.hash == hashlib.sha256(prefix + NONCE.pack(42)).hexdigest()
+
+
+def test_header_hash_commits_to_transactions():
+    """Test that tampering with a transaction changes the header hash"""
+    block = Block(index=1, timestamp=1704067300.0, transactions=_make_transactions(3),
+                  previous_hash="ab" * 32)
+    
+    _tamper(block, 1, amount=1000.0)
+    assert block.calculate_hash() != block.hash
+
+
+def test_mined_header_block_is_valid():
+    """Test midstate mining produces the same hash as a full recompute"""
+    block = Block(index=1, timestamp=1704067300.0, transactions=_make_transactions(5),
+                  previous_hash="ab" * 32)
+    block.mine_block(difficulty=2)
+    
+    assert block.hash.startswith("00")
+    assert block.hash == block.calculate_hash()
+
+
+def test_block_header_round_trip():
+    """Test headers survive the wire form and match only their own body"""
+    block = Block(index=1, timestamp=1704067300.0, transactions=_make_transactions(3),
+                  previous_hash="ab" * 32, nonce=7)
+    header = BlockHeader.from_bytes(BlockHeader.from_block(block).to_bytes())
+    
+    assert header.hash == block.hash
+    assert header.is_self_consistent()
+    assert header.matches(block)
+    
+    _tamper(block, 0, amount=99.0)
+    assert not header.matches(block)
+
+
+def test_legacy_chain_migration():
+    """Test a chain serialized before versioning still loads and can be extended"""
+    legacy = Blockchain(block_version=BLOCK_VERSION_LEGACY)
+    legacy.difficulty = 1
+    wallet = Wallet.create()
+    legacy.mine_pending_transactions(wallet.get_address())
+    
+    # Dictionaries written by older releases had no version field
+    exported = []
+    for block in legacy.chain:
+        data = block.to_dict()
+        del data["version"]
+        exported.append(data)
+    
+    migrated = Blockchain()
+    migrated.difficulty = 1
+    assert migrated.chain[0].hash == exported[0]["hash"]
+    for data in exported[1:]:
+        assert migrated.add_block(Block.from_dict(data)) == True
+    
+    migrated.mine_pending_transactions(wallet.get_address())
+    assert migrated.chain[1].version == BLOCK_VERSION_LEGACY
+    assert migrated.chain[2].version == BLOCK_VERSION_HEADER
+    assert migrated.is_chain_valid() == True
+    assert migrated.get_balance(wallet.get_address()) == 20.0
+
+
+def test_block_version_cannot_downgrade():
+    """Test that a legacy block cannot follow a header block"""
+    blockchain = Blockchain()
+    blockchain.difficulty = 1
+    blockchain.mine_pending_transactions("bc1miner")
+    
+    block = Block(index=2, timestamp=1704067400.0, transactions=[],
+                  previous_hash=blockchain.get_latest_block().hash,
+                  version=BLOCK_VERSION_LEGACY)
+    assert blockchain.add_block(block) == False
+
+
+def test_merkle_tree_incremental_append():
+    """Test appending leaves matches building the tree in one go"""
+    leaves = [hashlib.sha256(str(i).encode()).digest() for i in range(13)]
+    tree = MerkleTree()
+    for count, leaf in enumerate(leaves, start=1):
+        tree.append(leaf)
+        assert tree.root == MerkleTree(leaves[:count]).root
+
+
+def test_merkle_inclusion_proofs():
+    """Test every transaction gets a proof that verifies against the header root"""
+    block = Block(index=1, timestamp=1704067300.0, transactions=_make_transactions(7),
+                  previous_hash="ab" * 32)
+    
+    for tx in block.transactions:
+        proof = block.get_merkle_proof(tx.tx_id)
+        assert Block.verify_merkle_proof(tx, proof, block.merkle_root) == True
+    
+    # A proof does not transfer to another transaction
+    proof = block.get_merkle_proof(block.transactions[0].tx_id)
+    assert Block.verify_merkle_proof(block.transactions[1], proof, block.merkle_root) == False
+
+
+def test_block_add_transaction_updates_commitment(monkeypatch):
+    """Test adding transactions during assembly keeps the hash current without rebuilds"""
+    block = Block(index=1, timestamp=1704067300.0, transactions=[],
+                  previous_hash="ab" * 32)
+    builds = []
+    
+    class CountingTree(block_module.MerkleTree):
+        def _build(self, *args, **kwargs):
+            builds.append(len(self))
+            return super()._build(*args, **kwargs)
+    
+    monkeypatch.setattr(block_module, "MerkleTree", CountingTree)
+    block._merkle_tree = CountingTree()
+    builds.clear()
+    for tx in _make_transactions(5):
+        block.add_transaction(tx)
+        assert block.hash == block.calculate_hash()
+        assert block.merkle_root == block.compute_merkle_root()
+    assert len(block.merkle_tree) == 5
+    assert builds == []
+
+
+def test_transaction_binary_round_trip():
+    """Test binary encoding reproduces the JSON form of transactions"""
+    plain = Transaction(sender="bc1alice", recipient="bc1bob", amount=5)
+    private = Transaction(sender="bc1alice", recipient="bc1bob", amount=2.5, privacy_level="HIGH")
+    private.apply_ring_signature(ring_size=21)
+    private.apply_stealth_address()
+    private.apply_confidential_transaction()
+    custom = Transaction(sender="bc1alice", recipient="bc1bob", amount=1.0, privacy_level="CUSTOM")
+    tagged = Transaction(sender="bc1alice", recipient="bc1bob", amount=3.0)
+    tagged.apply_stealth_address(Wallet.create().get_stealth_output())
+    
+    for tx in (plain, private, custom, tagged):
+        decoded = Transaction.from_bytes(tx.to_bytes())
+        assert decoded.to_dict() == tx.to_dict()
+        assert decoded.digest() == tx.digest()
+
+
+def test_decoded_confidential_transaction_stays_valid():
+    """Test a confidential amount survives decoding, so relayed blocks are accepted"""
+    blockchain = Blockchain()
+    blockchain.difficulty = 1
+    hidden = Transaction(sender="bc1alice", recipient="bc1bob", amount=2.5)
+    hidden.apply_confidential_transaction()
+    
+    decoded = Transaction.from_bytes(hidden.to_bytes())
+    assert decoded.amount == 2.5
+    assert decoded.to_dict()["amount"] == "CONFIDENTIAL"
+    assert decoded.digest() == hidden.digest()
+    assert decoded.is_valid() == True
+    
+    tip = blockchain.get_latest_block()
+    block = Block(index=1, timestamp=tip.timestamp + 1, transactions=[hidden],
+                  previous_hash=tip.hash)
+    block.mine_block(1)
+    
+    # The hash commits to the hidden amount, so it cannot be rewritten in transit
+    encoded = block.to_bytes()
+    assert encoded.count(_pack_number(2.5)) == 1
+    inflated = Block.from_bytes(encoded.replace(_pack_number(2.5), _pack_number(999999.0)))
+    assert inflated.transactions[0].amount == 999999.0
+    assert inflated.calculate_hash() != inflated.hash
+    assert blockchain.add_block(inflated) == False
+    
+    relayed = Block.from_bytes(encoded)
+    assert relayed.hash == block.hash
+    assert blockchain.add_block(relayed) == True
+    assert blockchain.get_balance("bc1bob") == 2.5
+    
+    # A legacy block hash covers only the hidden form, so it may not carry one
+    legacy = Block(index=1, timestamp=tip.timestamp + 1, transactions=[hidden],
+                   previous_hash=tip.hash, version=BLOCK_VERSION_LEGACY)
+    legacy.mine_block(1)
+    legacy_chain = Blockchain(block_version=BLOCK_VERSION_LEGACY)
+    legacy_chain.difficulty = 1
+    assert legacy_chain.add_block(legacy) == False
+
+
+def test_block_binary_round_trip():
+    """Test binary blocks decode to the same dictionary and hash"""
+    blockchain = Blockchain(block_version=BLOCK_VERSION_LEGACY)
+    blockchain.difficulty = 1
+    blockchain.add_transaction(Transaction(sender="bc1alice", recipient="bc1bob", amount=1.5))
+    blockchain.mine_pending_transactions("bc1miner")
+    
+    for block in blockchain.chain:
+        encoded = block.to_bytes()
+        decoded = Block.from_bytes(memoryview(encoded))
+        assert decoded.to_dict() == block.to_dict()
+        assert decoded.calculate_hash() == block.hash
+        assert len(encoded) < len(json.dumps(block.to_dict()))
+
+
+def test_binary_decode_rejects_truncated_data():
+    """Test truncated input raises a codec error"""
+    block = Block(index=1, timestamp=1704067300.0, transactions=_make_transactions(2),
+                  previous_hash="ab" * 32)
+    encoded = block.to_bytes()
+    
+    with pytest.raises(CodecError):
+        Block.from_bytes(encoded[:len(encoded) - 5])
+
+
+def test_binary_decode_rejects_malformed_proofs():
+    """Test broken or overreaching proofs JSON raises a codec error for blocks too"""
+    tx = Transaction(sender="bc1alice", recipient="bc1bob", amount=5.0)
+    tx.apply_confidential_transaction()
+    block = Block(index=1, timestamp=1704067300.0, transactions=[tx], previous_hash="ab" * 32)
+    encoded = block.to_bytes()
+    assert encoded.count(b'{"range_proof"') == 1
+    
+    for broken in (b'["range_proof"', b'{"tx_id_proof"'):
+        data = encoded.replace(b'{"range_proof"', broken)
+        with pytest.raises(CodecError):
+            Block.from_bytes(data)
+        with pytest.raises(CodecError):
+            Transaction.from_bytes(tx.to_bytes().replace(b'{"range_proof"', broken))
+
+
+def test_sealed_transaction_memoizes_and_refuses_edits():
+    """Test sealed transactions cache their forms and change only through mutators until a block holds them"""
+    tx = Transaction(sender="bc1alice", recipient="bc1bob", amount=5.0)
+    assert not hasattr(tx, "__dict__")
+    tx.amount = 6.0  # Unsealed transactions can still be edited
+    assert tx.to_dict()["amount"] == 6.0
+    
+    tx.seal()
+    with pytest.raises(AttributeError):
+        tx.amount = 1000.0
+    assert tx.to_dict() is tx.to_dict()
+    assert tx.to_bytes() is tx.to_bytes()
+    
+    digest, encoded = tx.digest(), tx.to_bytes()
+    tx.apply_stealth_address()
+    assert tx.digest() != digest and tx.to_bytes() != encoded
+    assert tx.to_dict()["stealth_address"] == tx.stealth_address
+    
+    # In a block the digest is committed to by the cached tree and the hash
+    block = Block(index=1, timestamp=1704067300.0, transactions=[tx], previous_hash="ab" * 32)
+    assert tx.sealed and tx.committed
+    digest = tx.digest()
+    with pytest.raises(AttributeError):
+        tx.apply_confidential_transaction()
+    with pytest.raises(AttributeError):
+        tx.apply_ring_signature()
+    assert tx.digest() == digest and not tx.is_confidential
+    assert block.merkle_root == block.compute_merkle_root()
+    assert block.calculate_hash() == block.hash
+    assert all(decoded.committed for decoded in Block.from_bytes(block.to_bytes()).transactions)
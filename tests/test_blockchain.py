@@ -3,7 +3,7 @@ Unit tests for blockchain functionality
 """
 
 import pytest
-from bytechan import Blockchain, Transaction, Wallet
+from bytechan import Block, Blockchain, Transaction, Wallet
 
 
 def test_genesis_block():
@@ -74,3 +74,160 @@ def test_invalid_transaction():
     )
     
     assert blockchain.add_transaction(tx) == False
+
+
+def _tamper(block, position, **fields):
+    """Swap in an edited copy of a sealed transaction, as a forger would"""
+    tx = block.transactions[position]
+    block.transactions[position] = Transaction.from_dict({**tx.to_dict(), **fields})
+
+
+def _scan_balance(blockchain, address):
+    """Reference balance computed by walking the whole chain"""
+    balance = 0.0
+    for block in blockchain.chain:
+        for tx in block.transactions:
+            if tx.sender == address:
+                balance -= tx.amount
+            if tx.recipient == address:
+                balance += tx.amount
+    return balance
+
+
+def test_balance_index_matches_scan():
+    """Test indexed balances agree with a full chain scan"""
+    blockchain = Blockchain()
+    blockchain.difficulty = 1
+    alice = Wallet.create()
+    bob = Wallet.create()
+    
+    blockchain.mine_pending_transactions(alice.get_address())
+    blockchain.add_transaction(Transaction(alice.get_address(), bob.get_address(), 0.1))
+    blockchain.add_transaction(Transaction(bob.get_address(), alice.get_address(), 0.7))
+    blockchain.mine_pending_transactions(bob.get_address())
+    
+    addresses = [alice.get_address(), bob.get_address(), "NETWORK", "unknown"]
+    balances = blockchain.get_balances(addresses)
+    for address in addresses:
+        assert blockchain.get_balance(address) == _scan_balance(blockchain, address)
+        assert balances[address] == _scan_balance(blockchain, address)
+
+
+def test_balance_index_rollback():
+    """Test balances are restored when blocks are rolled back"""
+    blockchain = Blockchain()
+    blockchain.difficulty = 1
+    alice = Wallet.create()
+    bob = Wallet.create()
+    
+    blockchain.mine_pending_transactions(alice.get_address())
+    before = blockchain.get_balance(alice.get_address())
+    
+    blockchain.add_transaction(Transaction(alice.get_address(), bob.get_address(), 3.3))
+    blockchain.mine_pending_transactions(bob.get_address())
+    
+    removed = blockchain.rollback_to(1)
+    assert len(removed) == 1
+    assert len(blockchain.chain) == 2
+    assert blockchain.get_balance(alice.get_address()) == before
+    assert blockchain.get_balance(bob.get_address()) == 0.0
+    
+    # Re-applying the same block restores the original state
+    assert blockchain.add_block(removed[0]) == True
+    assert blockchain.get_balance(bob.get_address()) == _scan_balance(blockchain, bob.get_address())
+
+
+def test_balance_index_keeps_bounded_undo_data():
+    """Test only undo_depth blocks of undo data are kept and a deeper rollback rebuilds"""
+    blockchain = Blockchain()
+    blockchain.difficulty = 1
+    blockchain.balances.undo_depth = 2
+    for i in range(5):
+        blockchain.add_transaction(Transaction("bc1alice", f"bc1peer{i}", 1.0 + i))
+        blockchain.mine_pending_transactions("bc1miner")
+    assert len(blockchain.balances._undo) == 2
+    assert blockchain.balances.height == len(blockchain.chain)
+    
+    blockchain.rollback_to(1)
+    assert blockchain.balances.height == 2
+    for address in ("bc1alice", "bc1miner", "bc1peer0", "bc1peer4"):
+        assert blockchain.get_balance(address) == _scan_balance(blockchain, address)
+
+
+def test_parallel_mining():
+    """Test mining with several worker processes"""
+    blockchain = Blockchain()
+    blockchain.difficulty = 2
+    wallet = Wallet.create()
+    
+    blockchain.mine_pending_transactions(wallet.get_address(), workers=2)
+    block = blockchain.get_latest_block()
+    
+    assert block.hash.startswith("00")
+    assert block.hash == block.calculate_hash()
+    assert blockchain.is_chain_valid() == True
+
+
+def test_mining_result_hashrate():
+    """Test that mining reports attempts and hashrate"""
+    block = Block(index=1, timestamp=0.0, transactions=[], previous_hash="0" * 64)
+    result = block.mine_block(difficulty=2, workers=2)
+    
+    assert result.workers == 2
+    assert result.attempts >= 1
+    assert result.hashrate > 0
+    assert block.nonce == result.nonce
+
+
+def test_incremental_validation_only_checks_new_blocks():
+    """Test incremental validation skips blocks verified by an earlier run"""
+    blockchain = Blockchain()
+    blockchain.difficulty = 1
+    for _ in range(3):
+        blockchain.mine_pending_transactions("bc1miner")
+    assert blockchain.is_chain_valid(incremental=True) == True
+    
+    # Damage an already verified block: only a full validation notices
+    _tamper(blockchain.chain[1], 0, amount=1000.0)
+    blockchain.mine_pending_transactions("bc1miner")
+    assert blockchain.is_chain_valid(incremental=True) == True
+    assert blockchain.is_chain_valid() == False
+
+
+def test_incremental_validation_checks_new_tampering():
+    """Test incremental validation catches problems above the verified height"""
+    blockchain = Blockchain()
+    blockchain.difficulty = 1
+    blockchain.mine_pending_transactions("bc1miner")
+    assert blockchain.is_chain_valid(incremental=True) == True
+    
+    blockchain.mine_pending_transactions("bc1miner")
+    _tamper(blockchain.chain[2], 0, amount=1000.0)
+    assert blockchain.is_chain_valid(incremental=True) == False
+
+
+def test_trusted_checkpoints():
+    """Test checkpoints skip old blocks and reject conflicting chains"""
+    blockchain = Blockchain()
+    blockchain.difficulty = 1
+    for _ in range(3):
+        blockchain.mine_pending_transactions("bc1miner")
+    
+    _tamper(blockchain.chain[1], 0, amount=1000.0)
+    blockchain.add_checkpoint(2, blockchain.chain[2].hash)
+    assert blockchain.is_chain_valid(incremental=True) == True
+    
+    blockchain.add_checkpoint(3, "f" * 64)
+    assert blockchain.is_chain_valid(incremental=True) == False
+
+
+def test_parallel_full_validation():
+    """Test block hashes can be checked in a process pool"""
+    blockchain = Blockchain()
+    blockchain.difficulty = 1
+    for _ in range(4):
+        blockchain.mine_pending_transactions("bc1miner")
+    assert blockchain.is_chain_valid(workers=2) == True
+    
+    _tamper(blockchain.chain[3], 0, recipient="bc1thief")
+    assert blockchain.is_chain_valid(workers=2) == False
@@ -0,0 +1,131 @@
+"""
+Unit tests for columnar block storage
+"""
+
+import pytest
+from bytechan import Blockchain, Transaction
+from bytechan.core import columnar
+from bytechan.core.columnar import ColumnarChain
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    """Run with NumPy, when installed, and with the pure Python fallback"""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(columnar, "np", None)
+    return request.param
+
+
+def _chain_with_transfers():
+    blockchain = Blockchain()
+    blockchain.difficulty = 1
+    for i in range(4):
+        blockchain.add_transaction(Transaction("bc1alice", "bc1bob", 2.5 + i))
+        blockchain.add_transaction(Transaction("bc1bob", "bc1carol", 1))
+        stealth = Transaction("bc1carol", "bc1alice", 0.5)
+        stealth.apply_stealth_address()
+        blockchain.add_transaction(stealth)
+        blockchain.mine_pending_transactions("bc1miner")
+    return blockchain
+
+
+def test_blocks_round_trip():
+    """Test blocks rebuilt from the columns hash the same as the originals"""
+    blockchain = _chain_with_transfers()
+    columns = blockchain.to_columnar()
+    assert columns.height == len(blockchain.chain)
+    assert len(columns) == sum(len(block.transactions) for block in blockchain.chain)
+    
+    for block in blockchain.chain:
+        rebuilt = columns.block(block.index)
+        assert rebuilt.hash == block.hash
+        assert rebuilt.calculate_hash() == block.hash
+        assert rebuilt.to_dict() == block.to_dict()
+    
+    with pytest.raises(IndexError):
+        columns.block(columns.height)
+
+
+def test_aggregates_match_the_chain(backend):
+    """Test address totals, window counts and largest transfers"""
+    blockchain = _chain_with_transfers()
+    columns = blockchain.to_columnar()
+    
+    totals = columns.address_totals()
+    for address in ("bc1alice", "bc1bob", "bc1carol", "bc1miner"):
+        assert totals[address] == pytest.approx(blockchain.get_balance(address))
+        assert columns.balance(address) == pytest.approx(blockchain.get_balance(address))
+    assert columns.balance("bc1nobody") == 0.0
+    
+    timestamps = [tx.timestamp for block in blockchain.chain for tx in block.transactions]
+    start, end = sorted(timestamps)[2], max(timestamps)
+    assert columns.count_in_window(start, end) == sum(1 for t in timestamps if start <= t < end)
+    
+    largest = columns.largest_transfers(3)
+    assert [transfer.amount for transfer in largest] == [10.0, 10.0, 10.0]
+    assert all(transfer.recipient == "bc1miner" for transfer in largest)
+    assert [transfer.amount for transfer in columns.largest_transfers(100)] == sorted(
+        (tx.amount for block in blockchain.chain for tx in block.transactions), reverse=True)
+
+
+def test_confidential_rows_agree_with_balances(backend):
+    """Test confidential amounts count in totals and round trip, but are not listed"""
+    blockchain = _chain_with_transfers()
+    hidden = Transaction("bc1alice", "bc1dave", 42.0)
+    hidden.apply_confidential_transaction()
+    blockchain.add_transaction(hidden)
+    blockchain.mine_pending_transactions("bc1miner")
+    columns = blockchain.to_columnar()
+    
+    totals = columns.address_totals()
+    for address in ("bc1alice", "bc1dave", "bc1miner"):
+        assert totals[address] == pytest.approx(blockchain.get_balance(address))
+        assert columns.balance(address) == pytest.approx(blockchain.get_balance(address))
+    assert columns.balance("bc1dave") == 42.0
+    
+    rebuilt = columns.block(blockchain.get_latest_block().index)
+    assert rebuilt.to_dict() == blockchain.get_latest_block().to_dict()
+    assert rebuilt.transactions[0].amount == 42.0 and rebuilt.transactions[0].is_valid()
+    assert all(transfer.tx_id != hidden.tx_id for transfer in columns.largest_transfers(100))
+
+
+def test_backends_give_the_same_results(monkeypatch):
+    """Test the NumPy and pure Python aggregates agree exactly, ties included"""
+    pytest.importorskip("numpy")
+    blockchain = _chain_with_transfers()
+    columns = blockchain.to_columnar()
+    timestamps = sorted(tx.timestamp for block in blockchain.chain for tx in block.transactions)
+    
+    def aggregates():
+        return (
+            columns.address_totals(),
+            [columns.balance(address) for address in ("bc1alice", "bc1bob", "bc1miner", "bc1nobody")],
+            columns.count_in_window(timestamps[2], timestamps[-1]),
+            [transfer.tx_id for transfer in columns.largest_transfers(3)],
+            [transfer.tx_id for transfer in columns.largest_transfers(100)],
+        )
+    
+    with_numpy = aggregates()
+    monkeypatch.setattr(columnar, "np", None)
+    assert aggregates() == with_numpy
+
+
+def test_append_and_truncate_follow_the_chain():
+    """Test blocks must be appended in order and truncate drops the tail"""
+    blockchain = _chain_with_transfers()
+    columns = ColumnarChain.from_blocks(blockchain.chain[:3])
+    
+    with pytest.raises(ValueError):
+        columns.append_block(blockchain.chain[4])
+    
+    columns.append_block(blockchain.chain[3])
+    columns.truncate(2)
+    assert columns.height == 2
+    assert len(columns) == sum(len(block.transactions) for block in blockchain.chain[:2])
+    assert all(row < len(columns) for row in columns.sparse)
+    
+    for block in blockchain.chain[2:]:
+        columns.append_block(block)
+    assert columns.block(4).hash == blockchain.get_latest_block().hash
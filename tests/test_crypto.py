@@ -2,8 +2,12 @@
 Unit tests for cryptographic functions
 """
 
+import random
 import pytest
 from bytechan.crypto import RingSignature, StealthAddress, Bulletproof
+from bytechan.crypto import bulletproofs
+from bytechan.crypto.ring_signature import MemberKeyCache
+from bytechan.crypto.signature_cache import SignatureCache
 from bytechan.wallet import Wallet
 
 
@@ -52,6 +56,22 @@ def test_bulletproof_out_of_range():
         bp.generate_range_proof(value=2000.0, min_value=0, max_value=1000)
 
 
+def test_malformed_proofs_fail_instead_of_raising():
+    """Test proofs of the wrong shape, as a peer could send, verify as False"""
+    bp = Bulletproof()
+    proof = bp.generate_range_proof(value=1.0)
+    for bad in (["not", "a", "dict"], "proof", None,
+                dict(proof, range=[0, 1]), dict(proof, range={"min": 0}),
+                dict(proof, range={"min": "0", "max": 1})):
+        assert bp.verify_range_proof(bad) == False
+    assert bp.verify_batch([proof, ["x"]]).valid == [True, False]
+    
+    ring_sig = RingSignature(ring_size=2)
+    signature = ring_sig.sign("tx", "key", ["a" * 64, "b" * 64])
+    for bad in ([signature], dict(signature, ring=[["a"], ["b"]])):
+        assert ring_sig.verify("tx", bad) == False
+
+
 def test_key_generation():
     """Test key pair generation"""
     wallet = Wallet.create()
@@ -59,3 +79,121 @@ def test_key_generation():
     assert wallet.keypair.private_key
     assert wallet.keypair.public_key
     assert wallet.keypair.private_key != wallet.keypair.public_key
+
+
+@pytest.fixture(params=["numpy", "python"])
+def hex_backend(request, monkeypatch):
+    """Run with NumPy, when installed, and with the pure Python fallback"""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(bulletproofs, "np", None)
+    return request.param
+
+
+def test_bulletproof_batch_verification(hex_backend):
+    """Test batch verification agrees with per-proof verification on either backend"""
+    bp = Bulletproof()
+    proofs = [bp.generate_range_proof(value=float(i)) for i in range(20)]
+    
+    result = bp.verify_batch(proofs)
+    assert result.all_valid
+    assert result.failures == []
+    
+    proofs[3] = dict(proofs[3], commitment="zz" * 32)
+    proofs[11] = dict(proofs[11], proof="")
+    proofs[15] = dict(proofs[15], commitment=" " + proofs[15]["commitment"][1:])
+    
+    result = bp.verify_batch(proofs)
+    assert result.failures == [3, 11, 15]
+    assert result.valid == [bp.verify_range_proof(proof) for proof in proofs]
+
+
+def _signed_batch(count, ring_size, decoy_pool):
+    """Sign count messages with rings drawn from a shared decoy pool"""
+    ring_sig = RingSignature(ring_size=ring_size)
+    items = []
+    for i in range(count):
+        wallet = Wallet.create()
+        ring = ring_sig.generate_ring(wallet.get_address(), random.sample(decoy_pool, ring_size - 1))
+        message = f"tx_{i}"
+        items.append((message, ring_sig.sign(message, wallet.keypair.private_key, ring)))
+    return items
+
+
+def test_ring_signature_binds_message_and_ring():
+    """Test a signature fails for another message or a swapped member"""
+    ring_sig = RingSignature(ring_size=5)
+    (message, signature), = _signed_batch(1, 5, [f"decoy_{i}" for i in range(10)])
+    
+    assert ring_sig.verify(message, signature)
+    assert not ring_sig.verify("other message", signature)
+    
+    swapped = dict(signature, ring=["decoy_99"] + signature["ring"][1:])
+    assert not ring_sig.verify(message, swapped)
+    
+    duplicated = dict(signature, ring=[signature["ring"][0]] * 5)
+    assert not ring_sig.verify(message, duplicated)
+
+
+def test_ring_signature_batch_verification():
+    """Test batch verification matches per-signature results and shares decoded keys"""
+    items = _signed_batch(20, 11, [f"decoy_{i}" for i in range(30)])
+    items[4] = ("tampered", items[4][1])
+    items[9] = (items[9][0], dict(items[9][1], signature_parts=items[9][1]["signature_parts"][:-1]))
+    
+    cache = MemberKeyCache()
+    ring_sig = RingSignature(key_cache=cache)
+    result = ring_sig.verify_batch(items)
+    
+    assert result.failures == [4, 9]
+    assert result.valid == [ring_sig.verify(message, sig) for message, sig in items]
+    
+    # 30 decoys plus 20 real signers at most, decoded once each
+    assert cache.misses <= 50
+    assert cache.hits > 0
+
+
+def test_ring_signature_batch_rejects_reused_key_image():
+    """Test the second use of a key image in one batch fails"""
+    ring_sig = RingSignature(ring_size=5)
+    wallet = Wallet.create()
+    decoys = [f"decoy_{i}" for i in range(10)]
+    ring = ring_sig.generate_ring(wallet.get_address(), decoys)
+    first = ring_sig.sign("tx_a", wallet.keypair.private_key, ring)
+    second = ring_sig.sign("tx_b", wallet.keypair.private_key, ring)
+    
+    result = ring_sig.verify_batch([("tx_a", first), ("tx_b", second)])
+    assert result.valid == [True, False]
+
+
+def test_member_key_cache_is_bounded():
+    """Test the least recently used member key is evicted"""
+    cache = MemberKeyCache(capacity=2)
+    cache.get("a")
+    cache.get("b")
+    cache.get("a")
+    cache.get("c")
+    cache.get("b")
+    
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses) == (1, 4)
+
+
+def test_signature_cache_keeps_to_memory_budget():
+    """Test verified signatures are cached, counted and evicted by size"""
+    cache = SignatureCache()
+    key = ("tx_a", b"\x01" * 32)
+    assert key not in cache
+    cache.add(key)
+    assert key in cache
+    assert ("tx_a", b"\x02" * 32) not in cache
+    assert (cache.hits, cache.misses, len(cache)) == (1, 2, 1)
+    
+    entry_size = cache.size_bytes
+    cache = SignatureCache(max_bytes=entry_size * 2)
+    for tx_id in ("tx_a", "tx_b", "tx_c"):
+        cache.add((tx_id, b"\x01" * 32))
+    assert len(cache) == 2
+    assert cache.size_bytes <= cache.max_bytes
+    assert ("tx_a", b"\x01" * 32) not in cache and cache.hits == 0
@@ -0,0 +1,228 @@
+"""
+Unit tests for target-based difficulty and LWMA retargeting
+"""
+
+import random
+import pytest
+from bytechan import Block, Blockchain, Transaction
+from bytechan.core.block import BLOCK_VERSION_LEGACY, BlockHeader
+from bytechan.core.difficulty import (
+    MAX_SOLVE_TIME_FACTOR, MAX_TARGET, LWMARetarget, difficulty_to_target,
+    hash_meets_target, target_hex, target_to_difficulty
+)
+from bytechan.core.storage import BlockStore
+
+
+def _brute_force_target(timestamps, targets, window, block_time):
+    """Reference LWMA computed from scratch over the window"""
+    solve_times = [min(max(b - a, 1.0), MAX_SOLVE_TIME_FACTOR * block_time)
+                   for a, b in zip(timestamps, timestamps[1:])]
+    solve_times = [int(round(t * 1000)) for t in solve_times[-window:]]
+    targets = targets[1:][-window:]
+    count = len(solve_times)
+    weighted = sum((i + 1) * t for i, t in enumerate(solve_times))
+    expected = int(round(block_time * 1000)) * count * (count + 1) // 2
+    weighted = max(weighted, expected // 10)
+    return sum(targets) * weighted // (count * expected)
+
+
+def test_targets_match_leading_zero_difficulty():
+    """Test difficulty d is the target 16**(64-d) - 1 and hashes compare as integers"""
+    for difficulty in range(6):
+        target = difficulty_to_target(difficulty)
+        assert target == 16 ** (64 - difficulty) - 1
+        assert target_to_difficulty(target) == difficulty
+        assert hash_meets_target("0" * difficulty + "f" * (64 - difficulty), target)
+        if difficulty:
+            assert not hash_meets_target("0" * (difficulty - 1) + "1" + "0" * (64 - difficulty), target)
+    
+    rng = random.Random(7)
+    for _ in range(200):
+        a, b = rng.getrandbits(256), rng.getrandbits(256)
+        assert (target_hex(a) <= target_hex(b)) == (a <= b)
+    
+    with pytest.raises(ValueError):
+        difficulty_to_target(65)
+
+
+def test_mining_meets_arbitrary_target():
+    """Test a block can be mined against a target between two hex digit steps"""
+    target = MAX_TARGET // 3
+    block = Block(index=1, timestamp=1704067320.0, transactions=[], previous_hash="ab" * 32)
+    block.mine_block(target=target)
+    assert int(block.hash, 16) <= target
+    assert block.hash == block.calculate_hash()
+
+
+def test_running_sums_match_full_recomputation():
+    """Test every O(1) update gives the same target as recomputing the window"""
+    rng = random.Random(11)
+    retarget = LWMARetarget(window=5, block_time=120)
+    timestamps, targets = [], []
+    timestamp = 1704067200.0
+    for _ in range(40):
+        # Include out of order and very slow blocks to exercise the clamps
+        timestamp += rng.choice([rng.expovariate(1 / 120), -30.0, 2000.0])
+        target = rng.randrange(1, MAX_TARGET)
+        retarget.add_block(timestamp, target)
+        timestamps.append(timestamp)
+        targets.append(target)
+        if len(timestamps) > 1:
+            expected = _brute_force_target(timestamps, targets, 5, 120)
+            assert retarget.next_target(0) == min(max(expected, 1), MAX_TARGET)
+    assert len(retarget) == 5
+
+
+def test_retarget_follows_block_times():
+    """Test steady blocks keep the target and fast blocks lower it proportionally"""
+    start = difficulty_to_target(4)
+    steady = LWMARetarget(window=10, block_time=120)
+    fast = LWMARetarget(window=10, block_time=120)
+    for i in range(11):
+        steady.add_block(i * 120.0, start)
+        fast.add_block(i * 60.0, start)
+    assert steady.next_target(0) == start
+    assert fast.next_target(0) == start // 2
+    assert LWMARetarget().next_target(start) == start
+
+
+def test_blockchain_retarget_survives_rollback():
+    """Test mined blocks follow the window and a rollback rebuilds it"""
+    blockchain = Blockchain()
+    blockchain.difficulty = 1
+    assert blockchain.next_target() == difficulty_to_target(1)
+    for _ in range(12):
+        blockchain.mine_pending_transactions("bc1miner")
+    
+    # Blocks a few milliseconds apart: each target drops tenfold from the window's
+    tip = blockchain.get_latest_block()
+    assert tip.target < blockchain.chain[-2].target
+    assert blockchain.next_target() == blockchain.retarget.next_target(0)
+    assert blockchain.target == difficulty_to_target(1)
+    assert blockchain.is_chain_valid() == True
+    
+    sixth_target = blockchain.chain[6].target
+    blockchain.rollback_to(5)
+    assert len(blockchain.retarget) == 5
+    assert blockchain.next_target() == sixth_target
+    blockchain.mine_pending_transactions("bc1miner")
+    assert len(blockchain.retarget) == 6
+
+
+def test_blocks_commit_to_their_target():
+    """Test the target is hashed, encoded and checked against the chain's on acceptance"""
+    source = Blockchain()
+    source.difficulty = 1
+    source.mine_pending_transactions("bc1miner")
+    block = source.get_latest_block()
+    assert block.target == difficulty_to_target(1)
+    assert Block.from_bytes(block.to_bytes()).target == block.target
+    assert BlockHeader.from_block(block).is_self_consistent()
+    
+    # A chain asking for more work refuses it
+    strict = Blockchain(fixed_difficulty=True)
+    strict.difficulty = 2
+    assert strict.add_block(Block.from_bytes(block.to_bytes())) == False
+    
+    # Claiming a harder target than was mined breaks the hash
+    relaxed = Blockchain()
+    relaxed.difficulty = 1
+    forged = Block.from_bytes(block.to_bytes())
+    forged.target = difficulty_to_target(2)
+    assert relaxed.add_block(forged) == False
+    
+    # A correct hash that misses the committed target is no proof of work
+    unmined = Block(index=1, timestamp=block.timestamp, transactions=[],
+                    previous_hash=block.previous_hash, target=difficulty_to_target(1))
+    while unmined.hash[0] == "0":
+        unmined.nonce += 1
+        unmined.hash = unmined.calculate_hash()
+    assert unmined.meets_target() == False
+    assert relaxed.add_block(unmined) == False
+    
+    assert relaxed.add_block(Block.from_bytes(block.to_bytes())) == True
+    assert relaxed.is_chain_valid() == True
+
+
+def test_targets_follow_the_ancestors():
+    """Test a block must meet the target its ancestors call for, not the node's setting"""
+    source = Blockchain()
+    source.difficulty = 1
+    for _ in range(3):
+        source.mine_pending_transactions("bc1miner")
+    
+    # Changing the starting target later does not relax the retargeted blocks
+    lenient = Blockchain()
+    lenient.difficulty = 1
+    for block in source.chain[1:3]:
+        assert lenient.add_block(Block.from_bytes(block.to_bytes())) == True
+    lenient.difficulty = 0
+    
+    required = lenient.next_target()
+    easy = Block(index=3, timestamp=source.chain[3].timestamp, transactions=[],
+                 previous_hash=lenient.get_latest_block().hash)
+    easy.mine_block(target=required * 2)
+    while easy.meets_target(required):
+        easy.nonce += 1
+        easy.hash = easy.calculate_hash()
+    assert lenient.add_block(easy) == False
+    assert lenient.add_block(Block.from_bytes(source.chain[3].to_bytes())) == True
+    
+    # A fixed difficulty chain holds every block to the starting target
+    fixed = Blockchain(fixed_difficulty=True)
+    fixed.difficulty = 1
+    for _ in range(3):
+        fixed.mine_pending_transactions("bc1miner")
+    assert all(block.target == difficulty_to_target(1) for block in fixed.chain[1:])
+    assert fixed.is_chain_valid() == True
+
+
+def test_legacy_blocks_need_proof_of_work():
+    """Test a legacy block, which commits to no target, must meet the starting one"""
+    blockchain = Blockchain(block_version=BLOCK_VERSION_LEGACY)
+    blockchain.difficulty = 2
+    tip = blockchain.get_latest_block()
+    
+    reward = Transaction(sender="NETWORK", recipient="bc1thief", amount=10.0)
+    free = Block(index=1, timestamp=tip.timestamp + 120, transactions=[reward],
+                 previous_hash=tip.hash, version=BLOCK_VERSION_LEGACY)
+    free.hash = free.calculate_hash()
+    while free.meets_target(blockchain.target):
+        free.nonce += 1
+        free.hash = free.calculate_hash()
+    assert free.meets_target() == False
+    assert BlockHeader.from_block(free).is_self_consistent() == False
+    assert blockchain.add_block(free) == False
+    
+    free.mine_block(2)
+    assert blockchain.add_block(free) == True
+    
+    # Nor may one slip into a stored chain checked later
+    forged = Block(index=2, timestamp=free.timestamp + 120, transactions=[],
+                   previous_hash=free.hash, version=BLOCK_VERSION_LEGACY)
+    forged.hash = forged.calculate_hash()
+    while forged.meets_target(blockchain.target):
+        forged.nonce += 1
+        forged.hash = forged.calculate_hash()
+    blockchain.chain.append(forged)
+    assert blockchain.is_chain_valid() == False
+
+
+def test_restart_restores_target_and_window(tmp_path):
+    """Test a reopened store rebuilds the retarget window from the recorded targets"""
+    store = BlockStore(str(tmp_path))
+    blockchain = Blockchain(store=store)
+    blockchain.difficulty = 1
+    for _ in range(12):
+        blockchain.mine_pending_transactions("bc1miner")
+    next_target = blockchain.next_target()
+    store.close()
+    
+    store = BlockStore(str(tmp_path))
+    reloaded = Blockchain(store=store)
+    reloaded.difficulty = 1
+    assert reloaded.next_target() == next_target
+    assert reloaded.is_chain_valid() == True
+    reloaded.mine_pending_transactions("bc1miner")
+    assert reloaded.get_latest_block().target == next_target
+    store.close()
@@ -0,0 +1,127 @@
+"""
+Unit tests for the spent key image index
+"""
+
+import os
+from bytechan import Block, Transaction
+from bytechan.core.key_images import BloomFilter, KeyImageSet
+from bytechan.core.storage import BlockStore
+from bytechan.crypto.ring_signature import RingSignature
+
+
+def _ring_transaction(private_key, amount=1.0):
+    """A ring-signed transfer spending the key image of private_key"""
+    tx = Transaction(sender="bc1alice", recipient="bc1bob", amount=amount)
+    signature = RingSignature(ring_size=3).sign(tx.tx_id, private_key, ["a" * 64, "b" * 64, "c" * 64])
+    tx.apply_ring_signature(ring_size=3, signature=signature)
+    return tx
+
+
+def _next_block(blockchain, transactions):
+    """A mined block extending blockchain with the given transactions"""
+    tip = blockchain.get_latest_block()
+    block = Block(index=tip.index + 1, timestamp=tip.timestamp + 1, transactions=transactions,
+                  previous_hash=tip.hash, version=tip.version)
+    block.mine_block(1)
+    return block
+
+
+def test_mempool_refuses_spent_key_image(new_chain):
+    """Test a second spend of a key image is refused by the pool and the chain"""
+    blockchain = new_chain()
+    assert blockchain.add_transaction(_ring_transaction("key1")) == True
+    assert blockchain.add_transaction(_ring_transaction("key1", amount=2.0)) == False
+    
+    blockchain.mine_pending_transactions("bc1miner")
+    assert _ring_transaction("key1").key_image in blockchain.key_images
+    assert blockchain.add_transaction(_ring_transaction("key1", amount=3.0)) == False
+    assert blockchain.add_transaction(_ring_transaction("key2")) == True
+
+
+def test_block_with_double_spend_rejected(new_chain):
+    """Test blocks spending an image twice, or one already spent, are rejected"""
+    blockchain = new_chain()
+    blockchain.add_transaction(_ring_transaction("key1"))
+    blockchain.mine_pending_transactions("bc1miner")
+    
+    block = _next_block(blockchain, [_ring_transaction("key1", amount=5.0)])
+    assert blockchain.add_block(block) == False
+    
+    block = _next_block(blockchain, [_ring_transaction("key2"), _ring_transaction("key2", amount=2.0)])
+    assert blockchain.add_block(block) == False
+    
+    block = _next_block(blockchain, [_ring_transaction("key2")])
+    assert blockchain.add_block(block) == True
+
+
+def test_rollback_releases_key_images(new_chain):
+    """Test images from rolled back blocks can be spent again"""
+    blockchain = new_chain()
+    blockchain.add_transaction(_ring_transaction("key1"))
+    blockchain.mine_pending_transactions("bc1miner")
+    image = _ring_transaction("key1").key_image
+    assert image in blockchain.key_images
+    
+    blockchain.rollback_to(0)
+    assert image not in blockchain.key_images
+    # The rolled back spend is back in the pool, still holding its image
+    assert blockchain.add_transaction(_ring_transaction("key1", amount=2.0)) == False
+    for tx in blockchain.mempool.transactions():
+        blockchain.mempool.remove(tx.tx_id)
+    assert blockchain.add_transaction(_ring_transaction("key1", amount=2.0)) == True
+
+
+def test_flushed_images_survive_restart(tmp_path, new_chain):
+    """Test images flushed to the sorted file are found after a reopen"""
+    blockchain = new_chain()
+    for i in range(6):
+        blockchain.add_transaction(_ring_transaction(f"key{i}"))
+        blockchain.mine_pending_transactions("bc1miner")
+    key_images = KeyImageSet(directory=str(tmp_path), flush_depth=2)
+    for block in blockchain.chain:
+        key_images.apply_block(block)
+    assert os.path.getsize(os.path.join(str(tmp_path), KeyImageSet.DATA_FILE)) > 0
+    assert len(key_images) == 6
+    assert all(_ring_transaction(f"key{i}").key_image in key_images for i in range(6))
+    key_images.close()
+    
+    reopened = KeyImageSet(directory=str(tmp_path), flush_depth=2)
+    reopened.catch_up(blockchain.chain)
+    assert reopened.height == len(blockchain.chain)
+    assert all(_ring_transaction(f"key{i}").key_image in reopened for i in range(6))
+    assert _ring_transaction("other").key_image not in reopened
+    
+    # Reverting below the flushed height rewrites the file
+    for block in reversed(blockchain.chain[2:]):
+        reopened.revert_block(block)
+    assert _ring_transaction("key0").key_image in reopened
+    assert _ring_transaction("key1").key_image not in reopened
+    assert reopened.height == 2
+    reopened.close()
+
+
+def test_stored_chain_keeps_key_images(tmp_path, new_chain):
+    """Test a stored chain refuses spends recorded before a restart"""
+    store = BlockStore(str(tmp_path))
+    blockchain = new_chain(store=store)
+    blockchain.add_transaction(_ring_transaction("key1"))
+    blockchain.mine_pending_transactions("bc1miner")
+    blockchain.key_images.close()
+    store.close()
+    
+    store = BlockStore(str(tmp_path))
+    reloaded = new_chain(store=store)
+    assert reloaded.add_transaction(_ring_transaction("key1", amount=2.0)) == False
+    reloaded.key_images.close()
+    store.close()
+
+
+def test_bloom_filter_has_no_false_negatives():
+    """Test every added item is reported and most others are not"""
+    bloom = BloomFilter(1000)
+    items = [os.urandom(32) for _ in range(1000)]
+    for item in items:
+        bloom.add(item)
+    assert all(item in bloom for item in items)
+    false_positives = sum(os.urandom(32) in bloom for _ in range(1000))
+    assert false_positives < 50
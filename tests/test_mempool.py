@@ -0,0 +1,94 @@
+"""
+Unit tests for the transaction mempool
+"""
+
+from bytechan import Blockchain, Transaction
+from bytechan.core.mempool import Mempool
+
+
+def _tx(i):
+    return Transaction(sender=f"bc1sender{i}", recipient=f"bc1recipient{i}", amount=1.0)
+
+
+def test_mempool_deduplicates():
+    """Test the same transaction is only pooled once"""
+    mempool = Mempool()
+    tx = _tx(0)
+    
+    assert mempool.add(tx) == True
+    assert mempool.add(tx) == False
+    assert len(mempool) == 1
+
+
+def test_mempool_selects_by_fee_rate():
+    """Test block assembly takes the best paying transactions first"""
+    mempool = Mempool()
+    txs = [_tx(i) for i in range(5)]
+    for fee, tx in zip([0.1, 0.5, 0.3, 0.0, 0.4], txs):
+        mempool.add(tx, fee=fee)
+    
+    selected = mempool.select_for_block(max_txs=3)
+    assert selected == [txs[1], txs[4], txs[2]]
+
+
+def test_mempool_select_respects_byte_limit():
+    """Test selection stays within the byte budget"""
+    mempool = Mempool()
+    txs = [_tx(i) for i in range(10)]
+    for tx in txs:
+        mempool.add(tx, fee=1.0)
+    size = len(txs[0].to_bytes())
+    
+    selected = mempool.select_for_block(max_bytes=size * 3 + size // 2)
+    assert len(selected) == 3
+
+
+def test_mempool_evicts_lowest_fee_rate():
+    """Test a full pool drops its cheapest transaction"""
+    mempool = Mempool(max_transactions=2)
+    cheap, mid, rich = _tx(0), _tx(1), _tx(2)
+    mempool.add(cheap, fee=0.1)
+    mempool.add(mid, fee=0.2)
+    
+    assert mempool.add(rich, fee=0.3) == True
+    assert cheap.tx_id not in mempool
+    assert mempool.add(_tx(3), fee=0.0) == False
+    assert len(mempool) == 2
+
+
+def test_mempool_expires_old_transactions():
+    """Test transactions older than max_age are dropped"""
+    mempool = Mempool(max_age=60)
+    mempool.add(_tx(0), now=1000.0)
+    mempool.add(_tx(1), now=1050.0)
+    
+    assert mempool.expire(now=1070.0) == 1
+    assert len(mempool) == 1
+
+
+def test_mining_uses_mempool_limits():
+    """Test mining includes at most max_txs pool transactions and clears them"""
+    blockchain = Blockchain()
+    blockchain.difficulty = 1
+    for i in range(5):
+        blockchain.add_transaction(_tx(i), fee=i * 0.1)
+    
+    blockchain.mine_pending_transactions("bc1miner", max_txs=2)
+    block = blockchain.get_latest_block()
+    
+    assert len(block.transactions) == 3  # Two transfers and the reward
+    assert block.transactions[0].sender == "bc1sender4"
+    assert len(blockchain.pending_transactions) == 3
+
+
+def test_rollback_returns_transactions_to_mempool():
+    """Test transactions from orphaned blocks can be mined again"""
+    blockchain = Blockchain()
+    blockchain.difficulty = 1
+    tx = _tx(0)
+    blockchain.add_transaction(tx)
+    blockchain.mine_pending_transactions("bc1miner")
+    assert tx.tx_id not in blockchain.mempool
+    
+    blockchain.rollback_to(0)
+    assert tx.tx_id in blockchain.mempool
@@ -0,0 +1,439 @@
+"""
+Integration tests for the P2P transport on localhost
+"""
+
+import asyncio
+import pytest
+from bytechan import Block, Blockchain, Network, Transaction
+from bytechan.core.block import BLOCK_VERSION_LEGACY, BlockHeader
+from bytechan.crypto.ring_signature import RingSignature
+from bytechan.network import CompactBlock, SyncError
+from bytechan.network.compact import decode_get_block_txn, encode_block_txn
+from bytechan.network.p2p import Peer, PeerConnection, SeenSet
+from bytechan.network.protocol import MessageType, encode_frame
+from bytechan.network.sync import HeadersFirstSync
+
+
+async def _start_nodes(count):
+    """Start count nodes on free localhost ports, each with its own chain"""
+    nodes = []
+    for _ in range(count):
+        blockchain = Blockchain()
+        blockchain.difficulty = 1
+        node = Network(port=0, blockchain=blockchain)
+        await node.start()
+        nodes.append(node)
+    return nodes
+
+
+async def _wait_for(condition, timeout=5.0):
+    """Poll until condition() is true"""
+    deadline = asyncio.get_event_loop().time() + timeout
+    while not condition():
+        if asyncio.get_event_loop().time() > deadline:
+            raise AssertionError("Condition not met in time")
+        await asyncio.sleep(0.01)
+
+
+async def _stop_nodes(nodes):
+    for node in nodes:
+        await node.stop()
+
+
+def test_peers_handshake():
+    """Test nodes exchange IDs when connecting"""
+    async def scenario():
+        a, b = await _start_nodes(2)
+        connection = await a.connect_to_peer("127.0.0.1", b.port)
+        assert connection is not None
+        assert connection.peer.node_id == b.node_id
+        await _wait_for(lambda: a.node_id in b.peers)
+        await _stop_nodes([a, b])
+    
+    asyncio.run(scenario())
+
+
+def test_max_peers_is_enforced():
+    """Test outbound connections stop at max_peers"""
+    async def scenario():
+        a, b, c = await _start_nodes(3)
+        a.max_peers = 1
+        assert await a.connect_to_peer("127.0.0.1", b.port) is not None
+        assert await a.connect_to_peer("127.0.0.1", c.port) is None
+        await _stop_nodes([a, b, c])
+    
+    asyncio.run(scenario())
+
+
+def test_transaction_propagates_through_relay():
+    """Test a transaction broadcast by one node reaches a node two hops away"""
+    async def scenario():
+        a, b, c = await _start_nodes(3)
+        await a.connect_to_peer("127.0.0.1", b.port)
+        await b.connect_to_peer("127.0.0.1", c.port)
+        
+        tx = Transaction(sender="bc1alice", recipient="bc1bob", amount=1.0)
+        a.blockchain.add_transaction(tx)
+        assert a.broadcast_transaction(tx) == True
+        
+        await _wait_for(lambda: tx.tx_id in c.blockchain.mempool)
+        await _stop_nodes([a, b, c])
+    
+    asyncio.run(scenario())
+
+
+def test_block_propagates():
+    """Test a mined block is appended by connected peers"""
+    async def scenario():
+        a, b = await _start_nodes(2)
+        await a.connect_to_peer("127.0.0.1", b.port)
+        
+        a.blockchain.mine_pending_transactions("bc1miner")
+        a.broadcast_block(a.blockchain.get_latest_block())
+        
+        await _wait_for(lambda: len(b.blockchain.chain) == 2)
+        assert b.blockchain.get_latest_block().hash == a.blockchain.get_latest_block().hash
+        await _stop_nodes([a, b])
+    
+    asyncio.run(scenario())
+
+
+def test_slow_peer_queue_drops_instead_of_blocking():
+    """Test a full per-peer write queue rejects frames without waiting"""
+    async def scenario():
+        # Never started, so nothing drains the queue
+        stalled = PeerConnection(None, None, Peer("127.0.0.1", 0, "00" * 16, 0.0),
+                                 outbound=True, queue_size=2)
+        
+        results = [stalled.send(b"frame") for _ in range(3)]
+        assert results == [True, True, False]
+        assert stalled.frames_dropped == 1
+    
+    asyncio.run(scenario())
+
+
+def test_unexpected_handler_error_drops_only_that_peer(capsys):
+    """Test a payload that makes a handler raise disconnects the peer and the node keeps serving"""
+    async def scenario():
+        a, b, c = await _start_nodes(3)
+        await a.connect_to_peer("127.0.0.1", b.port)
+        await _wait_for(lambda: a.node_id in b.peers)
+        
+        def broken(connection, payload):
+            raise RuntimeError("handler bug")
+        b.handlers[MessageType.BLOCK] = broken
+        a.peers[b.node_id].send(encode_frame(MessageType.BLOCK, b"anything"))
+        await _wait_for(lambda: a.node_id not in b.peers)
+        assert "Disconnecting peer" in capsys.readouterr().out
+        
+        await c.connect_to_peer("127.0.0.1", b.port)
+        tx = Transaction(sender="bc1alice", recipient="bc1bob", amount=1.0)
+        c.blockchain.add_transaction(tx)
+        c.broadcast_transaction(tx)
+        await _wait_for(lambda: tx.tx_id in b.blockchain.mempool)
+        await _stop_nodes([a, b, c])
+    
+    asyncio.run(scenario())
+
+
+def _mine_blocks(blockchain, count):
+    for i in range(count):
+        blockchain.add_transaction(Transaction(sender="bc1alice", recipient="bc1bob", amount=i + 1.0))
+        blockchain.mine_pending_transactions("bc1miner")
+
+
+def test_headers_first_sync_from_several_peers():
+    """Test a new node downloads the chain from multiple peers in order"""
+    async def scenario():
+        a, b, c = await _start_nodes(3)
+        _mine_blocks(a.blockchain, 12)
+        b.blockchain = a.blockchain
+        await c.connect_to_peer("127.0.0.1", a.port)
+        await c.connect_to_peer("127.0.0.1", b.port)
+        
+        stats = await c.sync_blockchain(batch_size=2, window=4)
+        
+        assert stats.headers == 12
+        assert stats.blocks == 12
+        assert [block.hash for block in c.blockchain.chain] == \
+            [block.hash for block in a.blockchain.chain]
+        assert c.blockchain.get_balance("bc1bob") == a.blockchain.get_balance("bc1bob")
+        await _stop_nodes([a, b, c])
+    
+    asyncio.run(scenario())
+
+
+def test_sync_re_requests_from_stalled_peer():
+    """Test block requests that time out are served by another peer"""
+    async def scenario():
+        a, b, c = await _start_nodes(3)
+        _mine_blocks(a.blockchain, 6)
+        b.blockchain = a.blockchain
+        
+        # b answers header requests but never sends block bodies
+        b.handlers[MessageType.GET_BLOCKS] = lambda connection, payload: None
+        await c.connect_to_peer("127.0.0.1", a.port)
+        await c.connect_to_peer("127.0.0.1", b.port)
+        
+        stats = await c.sync_blockchain(batch_size=2, request_timeout=0.2)
+        
+        assert stats.stalls >= 1
+        assert c.blockchain.get_latest_block().hash == a.blockchain.get_latest_block().hash
+        await _stop_nodes([a, b, c])
+    
+    asyncio.run(scenario())
+
+
+def test_sync_rejects_tampered_headers():
+    """Test a header chain that does not hash correctly is refused"""
+    async def scenario():
+        a, c = await _start_nodes(2)
+        _mine_blocks(a.blockchain, 2)
+        a.blockchain.chain[1].nonce += 1
+        await c.connect_to_peer("127.0.0.1", a.port)
+        
+        with pytest.raises(SyncError):
+            await c.sync_blockchain()
+        assert len(c.blockchain.chain) == 1
+        await _stop_nodes([a, c])
+    
+    asyncio.run(scenario())
+
+
+def test_sync_follows_the_chain_with_most_work():
+    """Test every peer is asked and the heaviest valid chain wins over the first or longest"""
+    async def scenario():
+        short, long, heavy, c = await _start_nodes(4)
+        _mine_blocks(short.blockchain, 2)
+        _mine_blocks(long.blockchain, 6)
+        await c.connect_to_peer("127.0.0.1", short.port)
+        await c.connect_to_peer("127.0.0.1", long.port)
+        
+        stats = await c.sync_blockchain()
+        assert stats.headers == 6
+        assert c.blockchain.get_latest_block().hash == long.blockchain.get_latest_block().hash
+        
+        # Four blocks at 16x the work outweigh the six above them
+        heavy.blockchain.difficulty = 2
+        _mine_blocks(heavy.blockchain, 4)
+        fresh = Blockchain()
+        fresh.difficulty = 1
+        await c.connect_to_peer("127.0.0.1", heavy.port)
+        await c.sync_blockchain(blockchain=fresh)
+        assert fresh.get_latest_block().hash == heavy.blockchain.get_latest_block().hash
+        await _stop_nodes([short, long, heavy, c])
+    
+    asyncio.run(scenario())
+
+
+def test_sync_caps_headers_and_ignores_legacy_work():
+    """Test one run fetches at most max_headers and legacy headers add no work"""
+    async def scenario():
+        a, c = await _start_nodes(2)
+        _mine_blocks(a.blockchain, 6)
+        await c.connect_to_peer("127.0.0.1", a.port)
+        
+        stats = await c.sync_blockchain(max_headers=4)
+        assert stats.headers == 4
+        assert len(c.blockchain.chain) == 5
+        stats = await c.sync_blockchain(max_headers=4)
+        assert stats.headers == 2
+        assert c.blockchain.get_latest_block().hash == a.blockchain.get_latest_block().hash
+        
+        sync = HeadersFirstSync(c, c.blockchain)
+        header = BlockHeader.from_block(a.blockchain.chain[1])
+        legacy = BlockHeader.from_block(Block(index=1, timestamp=header.timestamp, transactions=[],
+                                              previous_hash=header.previous_hash,
+                                              version=BLOCK_VERSION_LEGACY))
+        assert sync._chain_work([header, legacy]) == sync._chain_work([header]) > 0
+        await _stop_nodes([a, c])
+    
+    asyncio.run(scenario())
+
+
+def test_compact_block_round_trip_is_smaller():
+    """Test compact blocks keep the header and shrink pooled transactions to short IDs"""
+    blockchain = Blockchain()
+    blockchain.difficulty = 1
+    _mine_blocks(blockchain, 1)
+    for i in range(20):
+        blockchain.add_transaction(Transaction(sender=f"bc1sender{i}", recipient="bc1bob", amount=1.0))
+    blockchain.mine_pending_transactions("bc1miner")
+    block = blockchain.get_latest_block()
+    
+    compact = CompactBlock.from_block(block)
+    decoded = CompactBlock.from_bytes(compact.to_bytes())
+    
+    assert decoded.header.hash == block.hash
+    assert len(decoded.short_ids) == 20
+    assert list(decoded.prefilled) == [20]
+    assert len(compact.to_bytes()) < len(block.to_bytes()) / 4
+
+
+def test_compact_block_rebuilt_from_mempool():
+    """Test a peer holding every transaction rebuilds the block without fetching"""
+    async def scenario():
+        a, b = await _start_nodes(2)
+        await a.connect_to_peer("127.0.0.1", b.port)
+        
+        for i in range(5):
+            tx = Transaction(sender=f"bc1sender{i}", recipient="bc1bob", amount=1.0 + i)
+            a.blockchain.add_transaction(tx)
+            b.blockchain.add_transaction(tx)
+        a.blockchain.mine_pending_transactions("bc1miner")
+        a.broadcast_block(a.blockchain.get_latest_block())
+        
+        await _wait_for(lambda: len(b.blockchain.chain) == 2)
+        assert b.blockchain.get_latest_block().hash == a.blockchain.get_latest_block().hash
+        assert b.compact_stats.blocks_reconstructed == 1
+        assert b.compact_stats.transactions_from_pool == 5
+        assert b.compact_stats.transactions_fetched == 0
+        assert len(b.blockchain.mempool) == 0
+        await _stop_nodes([a, b])
+    
+    asyncio.run(scenario())
+
+
+def test_compact_block_fetches_missing_transactions():
+    """Test only transactions absent from the receiver's pool are requested"""
+    async def scenario():
+        a, b = await _start_nodes(2)
+        await a.connect_to_peer("127.0.0.1", b.port)
+        
+        for i in range(6):
+            tx = Transaction(sender=f"bc1sender{i}", recipient="bc1bob", amount=1.0 + i)
+            a.blockchain.add_transaction(tx)
+            if i % 2 == 0:
+                b.blockchain.add_transaction(tx)
+        a.blockchain.mine_pending_transactions("bc1miner")
+        a.broadcast_block(a.blockchain.get_latest_block())
+        
+        await _wait_for(lambda: len(b.blockchain.chain) == 2)
+        stats = b.compact_stats
+        assert stats.blocks_completed == 1
+        assert stats.transactions_fetched == 3
+        assert stats.transaction_hit_rate == 0.5
+        await _stop_nodes([a, b])
+    
+    asyncio.run(scenario())
+
+
+def test_compact_block_falls_back_to_full_block():
+    """Test a reconstruction that does not match the header fetches the full block"""
+    async def scenario():
+        a, b = await _start_nodes(2)
+        await a.connect_to_peer("127.0.0.1", b.port)
+        
+        # a answers transaction requests with the wrong transaction
+        def wrong_transactions(connection, payload):
+            request_id, _, positions = decode_get_block_txn(payload)
+            wrong = Transaction(sender="bc1mallory", recipient="bc1bob", amount=9.0)
+            connection.send(encode_frame(MessageType.BLOCK_TXN,
+                                         encode_block_txn(request_id, [wrong] * len(positions))))
+        a.handlers[MessageType.GET_BLOCK_TXN] = wrong_transactions
+        
+        a.blockchain.add_transaction(Transaction(sender="bc1alice", recipient="bc1bob", amount=1.0))
+        a.blockchain.mine_pending_transactions("bc1miner")
+        a.broadcast_block(a.blockchain.get_latest_block())
+        
+        await _wait_for(lambda: len(b.blockchain.chain) == 2)
+        assert b.compact_stats.fallbacks == 1
+        assert b.blockchain.get_latest_block().hash == a.blockchain.get_latest_block().hash
+        await _stop_nodes([a, b])
+    
+    asyncio.run(scenario())
+
+
+def test_seen_set_is_bounded():
+    """Test the least recently touched ID is forgotten first"""
+    seen = SeenSet(2)
+    seen.add("a")
+    seen.add("b")
+    seen.add("a")
+    seen.add("c")
+    
+    assert "a" in seen and "c" in seen
+    assert "b" not in seen
+    assert len(seen) == 2
+
+
+def test_rejected_body_does_not_block_the_genuine_one():
+    """Test an invalid body under a real ID is not remembered, so another peer's is fetched"""
+    async def scenario():
+        bad, good, c = await _start_nodes(3)
+        await c.connect_to_peer("127.0.0.1", bad.port)
+        await c.connect_to_peer("127.0.0.1", good.port)
+        
+        tx = Transaction(sender="bc1alice", recipient="bc1bob", amount=1.0)
+        signature = RingSignature(ring_size=3).sign(tx.tx_id, "key1", ["a" * 64, "b" * 64, "c" * 64])
+        tx.apply_ring_signature(ring_size=3, signature=signature)
+        forged = Transaction.from_dict({**tx.to_dict(), "ring_proof": dict(tx.ring_proof, challenge="00" * 32)})
+        assert forged.tx_id == tx.tx_id
+        
+        received = []
+        on_transaction = c.handlers[MessageType.TRANSACTION]
+        
+        def record_transaction(connection, payload):
+            received.append(payload)
+            on_transaction(connection, payload)
+        c.handlers[MessageType.TRANSACTION] = record_transaction
+        
+        bad._seen.add(tx.tx_id)
+        bad._cache_for_relay(tx.tx_id, forged.to_bytes())
+        bad._queue_announcement(tx.tx_id)
+        await _wait_for(lambda: len(received) == 1)
+        assert tx.tx_id not in c.blockchain.mempool
+        
+        good.blockchain.add_transaction(tx)
+        good.broadcast_transaction(tx)
+        await _wait_for(lambda: tx.tx_id in c.blockchain.mempool)
+        await _stop_nodes([bad, good, c])
+    
+    asyncio.run(scenario())
+
+
+def test_announcements_are_batched():
+    """Test transactions broadcast together are announced in one inventory"""
+    async def scenario():
+        a, b = await _start_nodes(2)
+        await a.connect_to_peer("127.0.0.1", b.port)
+        
+        inventories = []
+        on_inv = b.handlers[MessageType.INV]
+        
+        def record_inv(connection, payload):
+            inventories.append(payload)
+            on_inv(connection, payload)
+        b.handlers[MessageType.INV] = record_inv
+        
+        for i in range(10):
+            tx = Transaction(sender=f"bc1sender{i}", recipient="bc1bob", amount=1.0)
+            a.blockchain.add_transaction(tx)
+            a.broadcast_transaction(tx)
+        
+        await _wait_for(lambda: len(b.blockchain.mempool) == 10)
+        assert len(inventories) == 1
+        await _stop_nodes([a, b])
+    
+    asyncio.run(scenario())
+
+
+def test_gossip_mesh_sends_each_body_once():
+    """Test a fully connected mesh fetches every transaction body only once per node"""
+    async def scenario():
+        nodes = await _start_nodes(4)
+        for i, node in enumerate(nodes):
+            for other in nodes[i + 1:]:
+                await node.connect_to_peer("127.0.0.1", other.port)
+        await _wait_for(lambda: all(len(node.peers) == 3 for node in nodes))
+        
+        tx = Transaction(sender="bc1alice", recipient="bc1bob", amount=1.0)
+        nodes[0].blockchain.add_transaction(tx)
+        nodes[0].broadcast_transaction(tx)
+        
+        await _wait_for(lambda: all(tx.tx_id in node.blockchain.mempool for node in nodes))
+        await asyncio.sleep(0.2)
+        assert sum(node.duplicate_transactions for node in nodes) == 0
+        await _stop_nodes(nodes)
+    
+    asyncio.run(scenario())
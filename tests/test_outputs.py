@@ -0,0 +1,95 @@
+"""
+Unit tests for the global output index and decoy sampling
+"""
+
+import random
+from collections import namedtuple
+import pytest
+from bytechan import Blockchain, Network, Transaction, Wallet
+from bytechan.core.outputs import OutputIndex, output_member, parse_output_member
+
+
+FakeBlock = namedtuple("FakeBlock", "timestamp transactions")
+
+
+def _mine_blocks(blockchain, count):
+    for i in range(count):
+        for j in range(i % 3):
+            blockchain.add_transaction(Transaction(sender=f"bc1sender{j}", recipient="bc1bob", amount=i + j + 1.0))
+        blockchain.mine_pending_transactions(f"bc1miner{i}")
+
+
+def test_output_numbers_follow_the_chain():
+    """Test output numbers map back to their block and position, also after rollback"""
+    blockchain = Blockchain()
+    blockchain.difficulty = 1
+    _mine_blocks(blockchain, 6)
+    
+    outputs = blockchain.outputs
+    assert len(outputs) == sum(len(block.transactions) for block in blockchain.chain)
+    for height, block in enumerate(blockchain.chain):
+        for position in range(len(block.transactions)):
+            assert outputs.locate(outputs.number(height, position)) == (height, position)
+    
+    blockchain.rollback_to(3)
+    assert outputs.height == 4
+    assert len(outputs) == sum(len(block.transactions) for block in blockchain.chain)
+    with pytest.raises(IndexError):
+        outputs.locate(len(outputs))
+
+
+def test_sample_is_distinct_and_excludes():
+    """Test decoys are distinct, skip excluded and too recent outputs"""
+    outputs = OutputIndex()
+    for height in range(50):
+        outputs.apply_block(FakeBlock(1000.0 + height * 120, [None] * 2))
+    
+    decoys = outputs.sample(20, exclude=[5, 6], min_age=10, rng=random.Random(1))
+    assert len(set(decoys)) == 20
+    assert 5 not in decoys and 6 not in decoys
+    assert all(number < outputs.number(40, 0) for number in decoys)
+    
+    with pytest.raises(ValueError):
+        outputs.sample(79, exclude=[0, 1], min_age=10)
+    
+    members = outputs.sample_members(3, exclude=[output_member(7)])
+    assert all(parse_output_member(member) != 7 for member in members)
+
+
+def test_sample_favours_recent_outputs():
+    """Test the gamma age distribution picks recent outputs more than uniform would"""
+    outputs = OutputIndex()
+    for height in range(10000):
+        outputs.apply_block(FakeBlock(height * 120.0, [None]))
+    
+    decoys = outputs.sample(2000, rng=random.Random(7))
+    recent = sum(number >= 9000 for number in decoys)
+    assert recent > 500  # Uniform sampling would give about 200
+
+
+def test_wallet_ring_transaction_uses_chain_outputs():
+    """Test a built transaction rings real outputs and spends each only once"""
+    blockchain = Blockchain()
+    blockchain.difficulty = 1
+    wallet = Wallet.create()
+    _mine_blocks(blockchain, 8)
+    blockchain.mine_pending_transactions(wallet.get_address())
+    
+    tx = wallet.create_ring_transaction("bc1bob", 1.0, blockchain, ring_size=5)
+    assert blockchain.add_transaction(tx) == True
+    
+    again = wallet.create_ring_transaction("bc1carol", 2.0, blockchain, ring_size=5)
+    assert again.key_image == tx.key_image
+    assert blockchain.add_transaction(again) == False
+
+
+def test_network_mixins_come_from_the_chain():
+    """Test mixins are references to outputs that exist"""
+    blockchain = Blockchain()
+    blockchain.difficulty = 1
+    _mine_blocks(blockchain, 8)
+    network = Network(port=0, blockchain=blockchain)
+    
+    mixins = network.get_mixin_outputs(6)
+    assert len(set(mixins)) == 6
+    assert all(parse_output_member(member) < len(blockchain.outputs) for member in mixins)
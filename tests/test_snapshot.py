@@ -0,0 +1,123 @@
+"""
+Unit tests for chain snapshots
+"""
+
+import pytest
+from bytechan import Blockchain, Transaction
+from bytechan.core.snapshot import SnapshotError
+from bytechan.core.storage import BlockStore
+
+
+def _node(**kwargs):
+    blockchain = Blockchain(**kwargs)
+    blockchain.difficulty = 1
+    return blockchain
+
+
+def _source_chain(blocks=6):
+    blockchain = _node()
+    for i in range(blocks):
+        blockchain.add_transaction(Transaction(sender="bc1alice", recipient=f"bc1peer{i}", amount=i + 1.0))
+        blockchain.mine_pending_transactions("bc1miner")
+    return blockchain
+
+
+def test_snapshot_round_trip(tmp_path):
+    """Test a chain exported in several chunks imports into a fresh node"""
+    source = _source_chain()
+    path = str(tmp_path / "chain.snap")
+    assert source.export_snapshot(path, blocks_per_chunk=2) == len(source.chain)
+    
+    node = _node()
+    assert node.import_snapshot(path) == len(source.chain) - 1
+    assert [block.hash for block in node.chain] == [block.hash for block in source.chain]
+    assert node.get_balance("bc1miner") == source.get_balance("bc1miner")
+    assert node.is_chain_valid() == True
+    
+    # Importing again skips the blocks it already has
+    assert node.import_snapshot(path) == 0
+
+
+def test_corrupt_chunk_is_rejected(tmp_path):
+    """Test a flipped byte fails the chunk checksum"""
+    source = _source_chain()
+    path = str(tmp_path / "chain.snap")
+    source.export_snapshot(path, blocks_per_chunk=3)
+    
+    data = bytearray(open(path, "rb").read())
+    data[-100] ^= 0xFF  # Inside the last compressed chunk
+    open(path, "wb").write(bytes(data))
+    
+    node = _node()
+    with pytest.raises(SnapshotError):
+        node.import_snapshot(path)
+
+
+def test_trusted_import_skips_transaction_checks(tmp_path, monkeypatch):
+    """Test blocks up to a checkpoint are not revalidated, later ones are"""
+    source = _source_chain()
+    path = str(tmp_path / "chain.snap")
+    source.export_snapshot(path)
+    
+    checked = []
+    original = Transaction.is_valid
+    def counting_is_valid(tx):
+        checked.append(tx.tx_id)
+        return original(tx)
+    monkeypatch.setattr(Transaction, "is_valid", counting_is_valid)
+    
+    node = _node()
+    node.add_checkpoint(4, source.chain[4].hash)
+    node.import_snapshot(path, trust_checkpoints=True)
+    assert node.get_latest_block().hash == source.get_latest_block().hash
+    assert sorted(checked) == sorted(tx.tx_id for block in source.chain[5:] for tx in block.transactions)
+
+
+def test_trusted_import_checks_the_checkpoint(tmp_path):
+    """Test a snapshot that misses the checkpoint hash is discarded"""
+    source = _source_chain()
+    path = str(tmp_path / "chain.snap")
+    source.export_snapshot(path)
+    
+    node = _node()
+    node.add_checkpoint(4, "ab" * 32)
+    with pytest.raises(SnapshotError):
+        node.import_snapshot(path, trust_checkpoints=True)
+    assert len(node.chain) == 1
+    assert len(node.mempool) == 0
+
+
+def test_truncated_snapshot_drops_trusted_blocks(tmp_path):
+    """Test a snapshot cut off before the checkpoint keeps none of the blocks trusted on its word"""
+    source = _source_chain()
+    path = str(tmp_path / "chain.snap")
+    source.export_snapshot(path, blocks_per_chunk=2)
+    
+    data = open(path, "rb").read()
+    open(path, "wb").write(data[:len(data) // 2])
+    
+    node = _node()
+    node.add_checkpoint(6, source.chain[6].hash)
+    with pytest.raises(SnapshotError):
+        node.import_snapshot(path, trust_checkpoints=True)
+    assert len(node.chain) == 1
+    assert len(node.mempool) == 0
+    assert node.get_balance("bc1miner") == 0.0
+
+
+def test_import_into_stored_chain(tmp_path):
+    """Test a snapshot bootstraps a disk-backed node that survives restart"""
+    source = _source_chain()
+    path = str(tmp_path / "chain.snap")
+    source.export_snapshot(path)
+    
+    store = BlockStore(str(tmp_path / "node"))
+    node = _node(store=store, live_blocks=2)
+    node.import_snapshot(path)
+    store.close()
+    
+    store = BlockStore(str(tmp_path / "node"))
+    reloaded = Blockchain(store=store)
+    assert reloaded.get_latest_block().hash == source.get_latest_block().hash
+    assert reloaded.get_balance("bc1miner") == source.get_balance("bc1miner")
+    store.close()
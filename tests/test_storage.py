@@ -0,0 +1,91 @@
+"""
+Unit tests for persistent block storage
+"""
+
+import os
+from bytechan import Blockchain, Transaction, Wallet
+from bytechan.core.storage import BlockStore
+
+
+def _mine_blocks(blockchain, count, address):
+    """Mine count blocks with one transfer each"""
+    for i in range(count):
+        blockchain.add_transaction(Transaction(sender=address, recipient=f"bc1peer{i}", amount=0.5))
+        blockchain.mine_pending_transactions(address)
+
+
+def test_chain_survives_restart(tmp_path):
+    """Test a stored chain reloads with the same blocks and balances"""
+    wallet = Wallet.create()
+    store = BlockStore(str(tmp_path))
+    blockchain = Blockchain(store=store)
+    blockchain.difficulty = 1
+    _mine_blocks(blockchain, 5, wallet.get_address())
+    hashes = [block.hash for block in blockchain.chain]
+    balance = blockchain.get_balance(wallet.get_address())
+    store.close()
+    
+    store = BlockStore(str(tmp_path))
+    reloaded = Blockchain(store=store, live_blocks=2)
+    reloaded.difficulty = 1
+    assert [block.hash for block in reloaded.chain] == hashes
+    assert reloaded.get_balance(wallet.get_address()) == balance
+    assert reloaded.is_chain_valid() == True
+    assert len(reloaded.chain.live_blocks()) <= 2
+    store.close()
+
+
+def test_confidential_transactions_survive_restart(tmp_path):
+    """Test a reopened store reproduces confidential amounts, balances and validity"""
+    store = BlockStore(str(tmp_path))
+    blockchain = Blockchain(store=store)
+    blockchain.difficulty = 1
+    hidden = Transaction(sender="bc1carol", recipient="bc1dave", amount=3.0)
+    hidden.apply_confidential_transaction()
+    assert blockchain.add_transaction(hidden) == True
+    blockchain.mine_pending_transactions("bc1miner")
+    _mine_blocks(blockchain, 2, "bc1miner")
+    assert blockchain.get_balance("bc1dave") == 3.0
+    store.close()
+    
+    store = BlockStore(str(tmp_path))
+    reloaded = Blockchain(store=store, live_blocks=1)
+    reloaded.difficulty = 1
+    assert reloaded.get_balance("bc1dave") == 3.0
+    assert reloaded.get_balance("bc1carol") == -3.0
+    assert reloaded.chain[1].transactions[0].to_dict() == hidden.to_dict()
+    assert reloaded.is_chain_valid() == True
+    store.close()
+
+
+def test_stored_chain_rollback(tmp_path):
+    """Test rolling back truncates the store"""
+    store = BlockStore(str(tmp_path))
+    blockchain = Blockchain(store=store)
+    blockchain.difficulty = 1
+    _mine_blocks(blockchain, 3, "bc1miner")
+    
+    blockchain.rollback_to(1)
+    assert len(store) == 2
+    
+    _mine_blocks(blockchain, 1, "bc1miner")
+    assert blockchain.chain[2].previous_hash == blockchain.chain[1].hash
+    assert blockchain.is_chain_valid() == True
+    store.close()
+
+
+def test_store_recovers_from_partial_write(tmp_path):
+    """Test a torn write at the end of the segment file is discarded"""
+    store = BlockStore(str(tmp_path))
+    blockchain = Blockchain(store=store)
+    blockchain.difficulty = 1
+    _mine_blocks(blockchain, 2, "bc1miner")
+    store.close()
+    
+    with open(os.path.join(str(tmp_path), BlockStore.DATA_FILE), "ab") as f:
+        f.write(b"\x40\x00\x00\x00partial")
+    
+    store = BlockStore(str(tmp_path))
+    assert len(store) == 3
+    assert store.get(2).hash == blockchain.chain[2].hash
+    store.close()
@@ -0,0 +1,112 @@
+"""
+Unit tests for the unspent output set
+"""
+
+from bytechan import Block, Transaction
+from bytechan.core.storage import BlockStore
+from bytechan.core.utxo import UTXOSet
+
+
+def _reward(blockchain, address):
+    """Mine a block paying address, returns the reward's tx_id"""
+    blockchain.mine_pending_transactions(address)
+    return blockchain.get_latest_block().transactions[-1].tx_id
+
+
+def test_inputs_must_be_unspent_and_owned(new_chain):
+    """Test spends are checked against the set in the pool and on chain"""
+    blockchain = new_chain()
+    coin = _reward(blockchain, "bc1alice")
+    assert coin in blockchain.utxos
+    
+    assert blockchain.add_transaction(Transaction("bc1bob", "bc1carol", 1.0, inputs=[coin])) == False
+    assert blockchain.add_transaction(Transaction("bc1alice", "bc1bob", 11.0, inputs=[coin])) == False
+    assert blockchain.add_transaction(Transaction("bc1alice", "bc1bob", 4.0, inputs=[coin])) == True
+    assert blockchain.add_transaction(Transaction("bc1alice", "bc1carol", 4.0, inputs=[coin])) == False
+    
+    blockchain.mine_pending_transactions("bc1miner")
+    assert coin not in blockchain.utxos
+    assert blockchain.add_transaction(Transaction("bc1alice", "bc1carol", 4.0, inputs=[coin])) == False
+
+
+def test_block_spending_an_output_twice_is_rejected(new_chain):
+    """Test two transactions in one block cannot spend the same output"""
+    blockchain = new_chain()
+    coin = _reward(blockchain, "bc1alice")
+    tip = blockchain.get_latest_block()
+    
+    transactions = [
+        Transaction("bc1alice", "bc1bob", 4.0, inputs=[coin]),
+        Transaction("bc1alice", "bc1carol", 4.0, inputs=[coin])
+    ]
+    block = Block(index=tip.index + 1, timestamp=tip.timestamp + 1, transactions=transactions,
+                  previous_hash=tip.hash, version=tip.version)
+    block.mine_block(1)
+    assert blockchain.add_block(block) == False
+    
+    # Spending an output created earlier in the same block is fine
+    change = Transaction("bc1alice", "bc1alice2", 9.0, inputs=[coin])
+    transactions = [change, Transaction("bc1alice2", "bc1bob", 9.0, inputs=[change.tx_id])]
+    block = Block(index=tip.index + 1, timestamp=tip.timestamp + 1, transactions=transactions,
+                  previous_hash=tip.hash, version=tip.version)
+    block.mine_block(1)
+    assert blockchain.add_block(block) == True
+
+
+def test_rollback_restores_spent_outputs(new_chain):
+    """Test undo data puts spent outputs back and removes created ones"""
+    blockchain = new_chain()
+    coin = _reward(blockchain, "bc1alice")
+    spend = Transaction("bc1alice", "bc1bob", 4.0, inputs=[coin])
+    blockchain.add_transaction(spend)
+    blockchain.mine_pending_transactions("bc1miner")
+    assert coin not in blockchain.utxos and spend.tx_id in blockchain.utxos
+    
+    blockchain.rollback_to(1)
+    assert coin in blockchain.utxos and spend.tx_id not in blockchain.utxos
+    assert blockchain.utxos.height == 2
+
+
+def test_rollback_past_undo_data_rebuilds(new_chain):
+    """Test a reorg deeper than the kept undo data still ends up consistent"""
+    blockchain = new_chain()
+    blockchain.utxos.undo_depth = 2
+    coins = [_reward(blockchain, "bc1alice") for _ in range(5)]
+    blockchain.rollback_to(1)
+    assert coins[0] in blockchain.utxos
+    assert not any(coin in blockchain.utxos for coin in coins[1:])
+    assert blockchain.utxos.height == 2
+
+
+def test_restart_loads_snapshot(tmp_path, monkeypatch, new_chain):
+    """Test a restart loads the latest snapshot and replays only later blocks"""
+    store = BlockStore(str(tmp_path))
+    blockchain = new_chain(store=store)
+    blockchain.utxos.snapshot_interval = 3
+    coin = _reward(blockchain, "bc1alice")
+    blockchain.add_transaction(Transaction("bc1alice", "bc1bob", 4.0, inputs=[coin]))
+    for _ in range(4):
+        blockchain.mine_pending_transactions("bc1miner")
+    outputs = dict(blockchain.utxos.outputs)
+    blockchain.key_images.close()
+    store.close()
+    
+    def no_rebuild(self, blocks):
+        raise AssertionError("replayed from genesis")
+    monkeypatch.setattr(UTXOSet, "rebuild", no_rebuild)
+    
+    store = BlockStore(str(tmp_path))
+    reloaded = new_chain(store=store)
+    assert reloaded.utxos.outputs == outputs
+    assert reloaded.utxos.height == len(reloaded.chain)
+    reloaded.key_images.close()
+    store.close()
+
+
+def test_inputs_round_trip_through_codec():
+    """Test inputs survive the binary format and are covered by the digest"""
+    tx = Transaction("bc1alice", "bc1bob", 4.0, inputs=["ab" * 32, "cd" * 32])
+    decoded = Transaction.from_bytes(tx.to_bytes())
+    assert decoded.inputs == tx.inputs
+    assert decoded.digest() == tx.digest()
+    assert Transaction("bc1alice", "bc1bob", 4.0).inputs is None
@@ -0,0 +1,138 @@
+"""
+Unit tests for the block acceptance pipeline
+"""
+
+from bytechan import Block, Transaction
+from bytechan.core.validation import BlockValidator, verify_proofs
+from bytechan.crypto.ring_signature import RingSignature
+
+
+def _ring_transaction(private_key, amount=1.0):
+    tx = Transaction(sender="bc1alice", recipient="bc1bob", amount=amount)
+    signature = RingSignature(ring_size=3).sign(tx.tx_id, private_key, ["a" * 64, "b" * 64, "c" * 64])
+    tx.apply_ring_signature(ring_size=3, signature=signature)
+    return tx
+
+
+def _forged(tx):
+    """Copy of tx whose ring signature no longer matches its challenge"""
+    proof = dict(tx.ring_proof, challenge="00" * 32)
+    return Transaction.from_dict({**tx.to_dict(), "ring_proof": proof})
+
+
+def _next_block(tip, transactions):
+    block = Block(index=tip.index + 1, timestamp=tip.timestamp + 1, transactions=transactions,
+                  previous_hash=tip.hash)
+    block.mine_block(1)
+    return block
+
+
+def test_bad_proofs_are_rejected_without_side_effects(new_chain):
+    """Test a forged signature or missing range proof leaves the chain untouched"""
+    blockchain = new_chain()
+    forged = _forged(_ring_transaction("key1"))
+    assert blockchain.add_transaction(forged) == False
+    
+    tip = blockchain.get_latest_block()
+    block = _next_block(tip, [Transaction("bc1alice", "bc1bob", 2.0), forged])
+    assert blockchain.add_block(block) == False
+    assert len(blockchain.chain) == 1
+    assert forged.key_image not in blockchain.key_images
+    assert blockchain.get_balance("bc1bob") == 0.0
+    
+    hidden = Transaction("bc1alice", "bc1bob", 2.0)
+    hidden.apply_confidential_transaction()
+    unproven = Transaction.from_dict({**hidden.to_dict(), "range_proof": None})
+    assert blockchain.add_block(_next_block(tip, [unproven])) == False
+    assert blockchain.add_block(_next_block(tip, [hidden, _ring_transaction("key1")])) == True
+
+
+def test_block_reward_is_bounded(new_chain):
+    """Test a block may pay one reward of at most the mining reward"""
+    blockchain = new_chain()
+    tip = blockchain.get_latest_block()
+    
+    def reward(amount):
+        return Transaction(sender="NETWORK", recipient="bc1miner", amount=amount)
+    
+    assert blockchain.add_block(_next_block(tip, [reward(blockchain.mining_reward + 1)])) == False
+    assert blockchain.add_block(_next_block(tip, [reward(5.0), reward(5.0)])) == False
+    assert blockchain.get_balance("bc1miner") == 0.0
+    assert blockchain.add_block(_next_block(tip, [reward(blockchain.mining_reward)])) == True
+    assert blockchain.get_balance("bc1miner") == blockchain.mining_reward
+
+
+def test_proofs_round_trip_through_codec():
+    """Test ring and range proofs survive the binary format and stay valid"""
+    tx = _ring_transaction("key1")
+    tx.apply_confidential_transaction()
+    decoded = Transaction.from_bytes(tx.to_bytes())
+    assert decoded.ring_proof == tx.ring_proof
+    assert decoded.range_proof == tx.range_proof
+    assert decoded.digest() == tx.digest()
+    assert verify_proofs(decoded) == True
+
+
+def test_parallel_pipeline_matches_serial(new_chain):
+    """Test the pool path accepts good blocks and stops at the first bad one"""
+    source = new_chain()
+    blocks = []
+    tip = source.get_latest_block()
+    for height in range(3):
+        transactions = [_ring_transaction(f"key{height}-{i}") for i in range(6)]
+        if height == 2:
+            transactions[4] = _forged(transactions[4])
+        tip = _next_block(tip, transactions)
+        blocks.append(tip)
+    
+    serial = new_chain()
+    parallel = new_chain()
+    assert serial.add_blocks(blocks) == 2
+    with BlockValidator(parallel, workers=2, chunk_size=2) as validator:
+        assert [validator.accept(block) for block in blocks] == [True, True, False]
+    assert [block.hash for block in parallel.chain] == [block.hash for block in serial.chain]
+    assert parallel.is_chain_valid(workers=2) == True
+
+
+def test_block_validation_reuses_mempool_verification(monkeypatch, new_chain):
+    """Test proofs checked at admission are not verified again in the block"""
+    blockchain = new_chain()
+    pooled = [_ring_transaction(f"key{i}") for i in range(3)]
+    for tx in pooled:
+        assert blockchain.add_transaction(tx) == True
+    
+    # A block relayed from a peer carries decoded copies of the same transactions
+    relayed = [Transaction.from_bytes(tx.to_bytes()) for tx in pooled]
+    fresh = _ring_transaction("key3")
+    block = _next_block(blockchain.get_latest_block(), relayed + [fresh])
+    
+    # Whatever the cache misses goes through the batch ring verifier
+    verified = []
+    original = RingSignature.verify_batch
+    
+    def recording_verify_batch(ring_signature, items):
+        verified.extend(message for message, _ in items)
+        return original(ring_signature, items)
+    monkeypatch.setattr(RingSignature, "verify_batch", recording_verify_batch)
+    assert blockchain.add_block(block) == True
+    assert verified == [fresh.tx_id]
+    assert blockchain.signature_cache.hits == 3
+    
+    # A tampered proof has a different digest and is checked in full
+    assert verify_proofs(_forged(fresh), blockchain.signature_cache) == False
+
+
+def test_tampered_relay_of_pooled_transaction_misses_cache(new_chain):
+    """Test a relayed copy with an altered ring proof is verified in full and refused"""
+    blockchain = new_chain()
+    pooled = _ring_transaction("key1")
+    assert blockchain.add_transaction(pooled) == True
+    
+    tampered = _forged(Transaction.from_bytes(pooled.to_bytes()))
+    assert tampered.tx_id == pooled.tx_id
+    misses = blockchain.signature_cache.misses
+    assert blockchain.add_block(_next_block(blockchain.get_latest_block(), [tampered])) == False
+    assert blockchain.signature_cache.hits == 0
+    assert blockchain.signature_cache.misses == misses + 1
+    assert len(blockchain.chain) == 1
+    assert len(blockchain.signature_cache) == 1
@@ -0,0 +1,191 @@
+"""
+Unit tests for wallet synchronization and stealth output scanning
+"""
+
+import pytest
+from bytechan import Block, Transaction, Wallet
+from bytechan.core.merkle import MerkleProof
+from bytechan.crypto import StealthAddress
+from bytechan.wallet import StealthScanner, WalletSync
+
+
+def test_refresh_scans_only_new_blocks(new_chain):
+    """Test a second refresh picks up just the blocks mined since the first"""
+    blockchain = new_chain()
+    alice = Wallet.create()
+    bob = Wallet.create()
+    engine = WalletSync({"alice": alice, "bob": bob})
+    
+    blockchain.mine_pending_transactions(alice.get_address())
+    first = engine.refresh(blockchain)
+    assert len(first.new_transfers["alice"]) == 1
+    assert engine.cursor == (1, blockchain.chain[1].hash)
+    
+    blockchain.add_transaction(Transaction(sender=alice.get_address(),
+                                           recipient=bob.get_address(), amount=4.0))
+    blockchain.mine_pending_transactions(bob.get_address())
+    second = engine.refresh(blockchain)
+    
+    assert [t.height for t in second.new_transfers["alice"]] == [2]
+    assert [t.incoming for t in second.new_transfers["bob"]] == [True, True]
+    assert engine.balance("alice") == blockchain.get_balance(alice.get_address())
+    assert engine.balance("bob") == blockchain.get_balance(bob.get_address())
+    assert bob.balance == 14.0
+
+
+def test_refresh_finds_stealth_outputs(new_chain):
+    """Test outputs paid to a wallet's stealth addresses are owned by it"""
+    blockchain = new_chain()
+    alice = Wallet.create()
+    tx = Transaction(sender="bc1sender", recipient="bc1placeholder", amount=3.0)
+    tx.apply_stealth_address(alice.get_stealth_output())
+    blockchain.add_transaction(tx)
+    blockchain.mine_pending_transactions("bc1miner")
+    
+    engine = WalletSync({"alice": alice})
+    engine.refresh(blockchain)
+    
+    assert [output.tx_id for output in engine.outputs("alice")] == [tx.tx_id]
+    assert engine.balance("alice") == 3.0
+
+
+def test_refresh_rolls_back_reorg(new_chain):
+    """Test transfers from orphaned blocks are dropped and the new branch scanned"""
+    blockchain = new_chain()
+    alice = Wallet.create()
+    bob = Wallet.create()
+    engine = WalletSync({"alice": alice, "bob": bob})
+    
+    blockchain.mine_pending_transactions(alice.get_address())
+    blockchain.mine_pending_transactions(alice.get_address())
+    engine.refresh(blockchain)
+    assert engine.balance("alice") == 20.0
+    
+    blockchain.rollback_to(1)
+    blockchain.mine_pending_transactions(bob.get_address())
+    result = engine.refresh(blockchain)
+    
+    assert result.rolled_back == 1
+    assert engine.balance("alice") == 10.0
+    assert engine.balance("bob") == 10.0
+
+
+def test_sync_state_persists(tmp_path, new_chain):
+    """Test a reloaded engine resumes from its saved cursor"""
+    blockchain = new_chain()
+    alice = Wallet.create()
+    path = str(tmp_path / "wallets.json")
+    
+    engine = WalletSync.load(path, {"alice": alice})
+    blockchain.mine_pending_transactions(alice.get_address())
+    engine.refresh(blockchain)
+    engine.save(path)
+    
+    blockchain.mine_pending_transactions(alice.get_address())
+    restored = WalletSync.load(path, {"alice": alice})
+    assert restored.height == 2
+    assert restored.balance("alice") == 10.0
+    
+    result = restored.refresh(blockchain)
+    assert [t.height for t in result.new_transfers["alice"]] == [2]
+    assert restored.balance("alice") == 20.0
+
+
+def test_stealth_scan_with_merkle_proofs(new_chain):
+    """Test scanned outputs carry proofs that verify against the header"""
+    blockchain = new_chain()
+    wallet = Wallet.create()
+    stealth = StealthAddress.create_one_time_address()
+    blockchain.add_transaction(Transaction(
+        sender="bc1sender", recipient=stealth, amount=2.0, stealth_address=stealth
+    ))
+    blockchain.mine_pending_transactions(wallet.get_address())
+    
+    outputs = StealthAddress(wallet.keypair).scan_for_outputs(
+        blockchain, wallet.get_address(), include_proofs=True
+    )
+    assert len(outputs) == 1
+    
+    block = blockchain.chain[outputs[0]["block"]]
+    proof = MerkleProof.from_dict(outputs[0]["merkle_proof"])
+    assert Block.verify_merkle_proof(block.transactions[0], proof, block.merkle_root)
+
+
+def _pay_stealth(blockchain, outputs):
+    """Mine one block paying each stealth output"""
+    for i, output in enumerate(outputs):
+        tx = Transaction(sender=f"bc1sender{i}", recipient="bc1placeholder", amount=1.0 + i)
+        tx.apply_stealth_address(output)
+        blockchain.add_transaction(tx)
+    blockchain.mine_pending_transactions("bc1miner")
+
+
+def test_view_tag_ownership_check():
+    """Test outputs are recognised by their owner only"""
+    alice = Wallet.create()
+    bob = Wallet.create()
+    output = alice.get_stealth_output()
+    
+    assert 0 <= output["view_tag"] < 256
+    assert alice.stealth_generator.owns_output(
+        output["stealth_address"], output["tx_public_key"], output["view_tag"]
+    )
+    assert not bob.stealth_generator.owns_output(
+        output["stealth_address"], output["tx_public_key"], output["view_tag"]
+    )
+
+
+def test_scan_for_outputs_uses_view_keys(new_chain):
+    """Test single-wallet scanning ignores outputs for other wallets"""
+    blockchain = new_chain()
+    alice = Wallet.create()
+    bob = Wallet.create()
+    _pay_stealth(blockchain, [alice.get_stealth_output(), bob.get_stealth_output()])
+    
+    outputs = alice.stealth_generator.scan_for_outputs(blockchain, alice.get_address())
+    assert len(outputs) == 1
+    assert outputs[0]["amount"] == 1.0
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_multi_wallet_scanner(workers, new_chain):
+    """Test one pass finds every wallet's outputs, serially or in a pool"""
+    blockchain = new_chain()
+    wallets = {f"w{i}": Wallet.create() for i in range(3)}
+    for _ in range(3):
+        _pay_stealth(blockchain, [wallet.get_stealth_output() for wallet in wallets.values()])
+    
+    scanner = StealthScanner(
+        {wallet_id: wallet.stealth_generator for wallet_id, wallet in wallets.items()},
+        workers=workers, chunk_size=1
+    )
+    result = scanner.scan(blockchain)
+    
+    assert result.next_height == len(blockchain.chain)
+    for wallet_id, wallet in wallets.items():
+        found = result.outputs[wallet_id]
+        assert [output["block"] for output in found] == [1, 2, 3]
+        assert all(wallet.stealth_generator.owns_output(
+            output["stealth_address"], blockchain.chain[output["block"]]
+            .transactions[output["position"]].tx_public_key
+        ) for output in found)
+
+
+def test_scanner_resumes_from_saved_height(tmp_path, new_chain):
+    """Test a reloaded scanner only scans blocks added since it was saved"""
+    blockchain = new_chain()
+    wallet = Wallet.create()
+    wallets = {"main": wallet.stealth_generator}
+    state = str(tmp_path / "scan.json")
+    
+    _pay_stealth(blockchain, [wallet.get_stealth_output()])
+    scanner = StealthScanner.load(state, wallets)
+    assert len(scanner.scan(blockchain).outputs["main"]) == 1
+    scanner.save(state)
+    
+    _pay_stealth(blockchain, [wallet.get_stealth_output()])
+    resumed = StealthScanner.load(state, wallets)
+    result = resumed.scan(blockchain)
+    
+    assert result.start_height == 2
+    assert [output["block"] for output in result.outputs["main"]] == [2]